@@ -0,0 +1,98 @@
+"""
+Script executions per Task Breakdown action
+
+Drives ``streamlit run`` over its websocket (the ``AppSession`` client from
+rerun_latency.py) through the Task Breakdown page's actions: quick-test
+buttons and typed tasks, with the mandatory-reminder gate off and on. For
+each action it counts the script executions the server ran (one
+``new_session`` per run, ``st.rerun()`` included), the time until the last
+one finished, and whether the breakdown was shown (its celebration
+balloons).
+
+``--app`` points at another version of the app, e.g. the one before a
+change: ``git show HEAD~1:streamlit_app.py > /tmp/before_app.py``. It runs from
+the repository root so it imports this tree's ``focuscoach``.
+
+Usage: python benchmarks/action_reruns.py [--app streamlit_app.py] [--fragments]
+"""
+
+import argparse
+import asyncio
+import os
+
+from rerun_latency import NAVIGATION, PAGES, AppSession, free_port, start_app
+
+MANDATORY = "Enable Mandatory Reminders"
+TASK_AREA = "Describe your task:"
+BREAK_DOWN = "🚀 Break Down This Task"
+SCHEDULE = "✅ Schedule Reminders & Continue"
+
+# (action, mandatory reminders on, [(button label, typed task or None), ...])
+ACTIONS = [
+    ("Quick test", False, [("🧹 Clean Room", None)]),
+    ("Typed task", False, [(BREAK_DOWN, "write a blog post")]),
+    ("Quick test, gated", True, [("📚 Study Exam", None), (SCHEDULE, None)]),
+    ("Typed task, gated", True, [(BREAK_DOWN, "plan a presentation"), (SCHEDULE, None)]),
+]
+
+
+async def perform(session, mandatory, steps):
+    """[(runs, ms, breakdown shown)] for each step of one action"""
+    checkbox = session.find(MANDATORY, sidebar=True)
+    if session.values[checkbox] != mandatory:
+        await session.change(checkbox)
+    results = []
+    for label, typed in steps:
+        if typed is not None:
+            session.values[session.find(TASK_AREA)] = typed
+        button = session.find(label)
+        if button is None:
+            results.append((0, 0.0, False))
+            continue
+        runs, balloons = session.runs, session.elements["balloons"]
+        elapsed, _ = await session.click(button)
+        results.append((session.runs - runs, elapsed, session.elements["balloons"] > balloons))
+    return results
+
+
+async def measure(port):
+    session = AppSession()
+    await session.open("127.0.0.1", port)
+    await session.rerun()
+    session.values[session.find(NAVIGATION, sidebar=True)] = PAGES.index("Task Breakdown")
+    await session.rerun()
+    results = [(name, mandatory, steps, await perform(session, mandatory, steps)) for name, mandatory, steps in ACTIONS]
+    await session.close()
+    return results, session.exceptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="streamlit_app.py", help="app script to drive")
+    parser.add_argument("--fragments", action="store_true", help="run with FOCUSCOACH_FRAGMENTS=1")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_app(port, os.path.abspath(args.app), args.fragments)
+    try:
+        results, exceptions = asyncio.run(measure(port))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.app}: script executions per action\n")
+    print(f"{'Action':<20} {'Step':<46} {'runs':>5} {'ms':>8}  breakdown shown")
+    total = 0
+    for name, mandatory, steps, outcomes in results:
+        for (label, typed), (runs, elapsed, shown) in zip(steps, outcomes):
+            step = label if typed is None else f"{label} ({typed})"
+            total += runs
+            print(f"{name:<20} {step:<46} {runs:>5} {elapsed:>8.1f}  {'yes' if shown else 'no'}")
+            name = ""
+    print(f"\nTotal script executions: {total}")
+    if exceptions:
+        print(f"App raised {len(exceptions)} exceptions, first: {exceptions[0][:200]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Load test for the FocusCoach API server
+
+Starts ``python -m focuscoach.api_server`` in its own process (one core, one
+event loop) and drives it from keep-alive connections for a fixed duration.
+Reports throughput, client-side latency and the server's own histograms.
+Exits non-zero if throughput falls below ``--min-rps``.
+
+Usage: python benchmarks/api_load.py [--connections 32] [--duration 5] [--batch 1]
+                                     [--gzip] [--min-rps 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.metrics import LatencyHistogram  # noqa: E402
+
+TASKS = ["prepare quarterly report", "write a blog post", "clean my room", "study for exam"]
+
+
+def request_bytes(method: str, path: str, payload=None, accept_gzip: bool = False) -> bytes:
+    body = json.dumps(payload).encode() if payload is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    if accept_gzip:
+        head += "Accept-Encoding: gzip\r\n"
+    return head.encode() + b"\r\n" + body
+
+
+async def read_response(reader: asyncio.StreamReader) -> bytes:
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return await reader.readexactly(length)
+
+
+async def worker(host: str, port: int, requests: list, deadline: float, histogram: LatencyHistogram) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        writer.write(requests[sent % len(requests)])
+        await read_response(reader)
+        histogram.observe((time.perf_counter() - started) * 1000)
+        sent += 1
+    writer.close()
+    return sent
+
+
+async def run_load(host: str, port: int, args) -> dict:
+    if args.batch > 1:
+        payloads = [{"tasks": [TASKS[(i + j) % len(TASKS)] for j in range(args.batch)]} for i in range(len(TASKS))]
+    else:
+        payloads = [{"task": task} for task in TASKS]
+    requests = [request_bytes("POST", "/v1/breakdown", payload, args.gzip) for payload in payloads]
+
+    histogram = LatencyHistogram()
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(worker(host, port, requests, deadline, histogram)
+                                    for _ in range(args.connections)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(request_bytes("GET", "/metrics"))
+    server_metrics = json.loads(await read_response(reader))
+    writer.close()
+    return {"requests": sum(counts), "elapsed": elapsed, "client": histogram.snapshot(), "server": server_metrics}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=1, help="tasks per request")
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--min-rps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Keep the server on the template engine so the numbers measure the server itself
+    env = {name: value for name, value in os.environ.items()
+           if name not in ("OPENAI_API_KEY", "FOCUSCOACH_LLM_BASE_URL")}
+    env["PYTHONPATH"] = ROOT
+    server = subprocess.Popen([sys.executable, "-m", "focuscoach.api_server", "--port", "0"],
+                              cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        url = server.stdout.readline().strip().rsplit(" ", 1)[-1]
+        host, port = url.split("//", 1)[1].split(":")
+        result = asyncio.run(run_load(host, int(port), args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    rps = result["requests"] / result["elapsed"]
+    client = result["client"]
+    served = result["server"]["latency"].get("breakdown", {})
+    print(f"{result['requests']} requests over {args.connections} connections in {result['elapsed']:.1f}s "
+          f"(batch={args.batch}, gzip={args.gzip})")
+    print(f"Throughput:      {rps:,.0f} req/s ({rps * args.batch:,.0f} breakdowns/s)")
+    print(f"Client latency:  p50 {client['p50_ms']} ms, p95 {client['p95_ms']} ms, p99 {client['p99_ms']} ms")
+    print(f"Server handling: p50 {served.get('p50_ms')} ms, p99 {served.get('p99_ms')} ms")
+    print(f"Response cache:  {result['server']['response_cache']}")
+    if rps < args.min_rps:
+        print(f"Below target of {args.min_rps:,.0f} req/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
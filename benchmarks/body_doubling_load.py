@@ -0,0 +1,238 @@
+"""
+Body-doubling rooms load client
+
+Starts ``python -m focuscoach.body_doubling`` (or targets ``--url``), opens
+``--clients`` websocket participants spread over rooms of ``--room-size``,
+and for ``--duration`` seconds has each one heartbeat every ``--heartbeat``
+seconds and change status every ``--status-every`` seconds. Every client
+applies snapshots and deltas to its own copy of the room.
+
+Reports connect latency, presence fan-out latency (status sent until each
+room-mate's delta carrying it arrives), frames and bytes received, server
+CPU and RSS, and checks that sampled clients' room state matches the
+server's ``GET /rooms/<room>``.
+
+Usage: python benchmarks/body_doubling_load.py [--clients 10000] [--room-size 10] [--duration 30]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.metrics import LatencyRegistry  # noqa: E402
+from focuscoach.websocket import OP_TEXT, close_frame, connect, encode_frame, read_message  # noqa: E402
+
+STATUSES = ("focusing", "break", "away", "focusing")
+
+
+class Participant:
+    def __init__(self, index, room, stats):
+        self.user = f"user-{index}"
+        self.room = room
+        self.stats = stats
+        self.members = {}
+        self.timer = None
+        self.seq = 0
+        self.writer = None
+
+    def apply(self, message):
+        if message["op"] == "snapshot":
+            self.members = message["members"]
+            self.timer = message["timer"]
+            self.seq = message["seq"]
+            return
+        if message["op"] != "delta" or message["seq"] <= self.seq:
+            return
+        self.seq = message["seq"]
+        for user in message.get("left", ()):
+            self.members.pop(user, None)
+        self.members.update(message.get("joined", {}))
+        received = time.perf_counter()
+        for user, fields in message.get("changed", {}).items():
+            self.members.setdefault(user, {}).update(fields)
+            sent = self.stats.sent.get(fields.get("task"))
+            if sent is not None and user != self.user:
+                self.stats.latency.observe("fanout", (received - sent) * 1000)
+        if "timer" in message:
+            self.timer = message["timer"]
+
+    async def run(self, host, port, args, quiet, stop):
+        started = time.perf_counter()
+        try:
+            reader, self.writer = await connect(host, port, f"/rooms/{self.room}?user={self.user}&name={self.user}",
+                                                timeout=60)
+        except (OSError, asyncio.TimeoutError, ConnectionError) as error:
+            self.stats.failed += 1
+            self.stats.last_error = repr(error)
+            return
+        self.stats.latency.observe("connect", (time.perf_counter() - started) * 1000)
+        self.stats.connected += 1
+        tasks = [asyncio.create_task(self.read(reader)), asyncio.create_task(self.chatter(args, quiet))]
+        await stop.wait()
+        self.writer.write(close_frame(mask=True))
+        try:
+            await asyncio.wait_for(tasks[0], 10)
+        except asyncio.TimeoutError:
+            tasks[0].cancel()
+        self.writer.close()
+
+    async def read(self, reader):
+        try:
+            while True:
+                message = await read_message(reader, self.writer, 1 << 24, mask=True)
+                if message is None:
+                    return
+                self.stats.frames += 1
+                self.stats.bytes += len(message[1])
+                if message[0] == OP_TEXT:
+                    self.apply(json.loads(message[1]))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    async def chatter(self, args, quiet):
+        rng = random.Random(self.user)
+        next_heartbeat = time.monotonic() + rng.uniform(0, args.heartbeat)
+        next_status = time.monotonic() + rng.uniform(0, args.status_every)
+        changes = 0
+        while not quiet.is_set():
+            now = time.monotonic()
+            if now >= next_status:
+                changes += 1
+                task = f"{self.user}:{changes}"
+                self.stats.sent[task] = time.perf_counter()
+                self.send({"op": "status", "status": STATUSES[changes % len(STATUSES)], "task": task})
+                next_status = now + args.status_every
+            if now >= next_heartbeat:
+                self.send({"op": "heartbeat"})
+                next_heartbeat = now + args.heartbeat
+            try:
+                await asyncio.wait_for(quiet.wait(), max(0, min(next_status, next_heartbeat) - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode_frame(json.dumps(message).encode(), mask=True))
+            self.stats.messages_sent += 1
+
+
+class Stats:
+    def __init__(self):
+        self.latency = LatencyRegistry()
+        self.sent = {}
+        self.connected = 0
+        self.failed = 0
+        self.last_error = None
+        self.frames = 0
+        self.bytes = 0
+        self.messages_sent = 0
+
+
+def get_json(url):
+    with urlopen(url, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def process_usage(pid):
+    """(cpu seconds, RSS MB) of a local process from /proc"""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as status:
+        rss = next(int(line.split()[1]) for line in status if line.startswith("VmRSS"))
+    return cpu, rss / 1024
+
+
+async def main(args):
+    server = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        server = subprocess.Popen([sys.executable, "-m", "focuscoach.body_doubling", "--port", "0",
+                                   "--tick", str(args.tick)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        address = server.stdout.readline().split("ws://", 1)[1].split("/", 1)[0]
+        host, port = address.rsplit(":", 1)
+        port = int(port)
+
+    stats = Stats()
+    quiet, stop = asyncio.Event(), asyncio.Event()
+    rooms = max(1, args.clients // args.room_size)
+    participants = [Participant(index, f"room-{index % rooms}", stats) for index in range(args.clients)]
+    started = time.perf_counter()
+    runs = []
+    # Open connections a batch at a time so the listen backlog never overflows
+    for first in range(0, args.clients, args.ramp):
+        runs.extend(asyncio.create_task(participant.run(host, port, args, quiet, stop))
+                    for participant in participants[first:first + args.ramp])
+        while stats.connected + stats.failed < len(runs):
+            await asyncio.sleep(0.01)
+    ramp = time.perf_counter() - started
+    print(f"Connected {stats.connected:,}/{args.clients:,} participants in {rooms:,} rooms in {ramp:.1f}s "
+          f"(failed {stats.failed}{', ' + stats.last_error if stats.last_error else ''})")
+    if server:
+        cpu_before, _ = process_usage(server.pid)
+
+    frames_before, bytes_before = stats.frames, stats.bytes
+    stats.latency.histograms.pop("fanout", None)
+    await asyncio.sleep(args.duration)
+    frames, received = stats.frames - frames_before, stats.bytes - bytes_before
+    if server:
+        cpu_after, rss = process_usage(server.pid)
+
+    quiet.set()
+    # Let the last status changes land before comparing with the server
+    await asyncio.sleep(args.tick * 4)
+    metrics = await asyncio.to_thread(get_json, f"http://{host}:{port}/metrics")
+    sample = random.Random(1).sample(participants, min(20, len(participants)))
+    mismatched = 0
+    for participant in sample:
+        try:
+            members = (await asyncio.to_thread(get_json, f"http://{host}:{port}/rooms/{participant.room}"))["members"]
+        except OSError:
+            members = {}
+        mismatched += participant.members != members
+
+    stop.set()
+    await asyncio.gather(*runs, return_exceptions=True)
+
+    snapshot = stats.latency.snapshot()
+    connect, fanout = snapshot.get("connect", {}), snapshot.get("fanout", {})
+    print(f"Connect latency    p50={connect.get('p50_ms')} ms  p95={connect.get('p95_ms')} ms  "
+          f"p99={connect.get('p99_ms')} ms")
+    print(f"Steady state {args.duration:.0f}s: sent {stats.messages_sent:,} messages, received {frames:,} frames "
+          f"({frames / args.duration:,.0f}/s, {received / args.duration / 1024:,.0f} KiB/s)")
+    print(f"Presence fan-out   p50={fanout.get('p50_ms')} ms  p95={fanout.get('p95_ms')} ms  "
+          f"p99={fanout.get('p99_ms')} ms  ({fanout.get('count', 0):,} deliveries, tick {args.tick * 1000:.0f} ms)")
+    print(f"Server: peak {metrics['peak_connections']:,} connections, {metrics['deltas']:,} deltas, "
+          f"{metrics['frames_out']:,} frames out, resyncs {metrics['resyncs']}, skipped {metrics['skipped']}, "
+          f"flush p95={metrics['latency'].get('flush', {}).get('p95_ms')} ms")
+    if server:
+        print(f"Server CPU {cpu_after - cpu_before:.1f}s over {args.duration:.0f}s steady state, RSS {rss:,.0f} MB")
+    print(f"Room state matches server for {len(sample) - mismatched}/{len(sample)} sampled clients")
+
+    if server:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="host:port of a running server (default: start one)")
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--room-size", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--heartbeat", type=float, default=15, help="seconds between heartbeats per client")
+    parser.add_argument("--status-every", type=float, default=30, help="seconds between status changes per client")
+    parser.add_argument("--tick", type=float, default=0.25, help="server broadcast interval")
+    parser.add_argument("--ramp", type=int, default=500, help="connections opened per batch")
+    asyncio.run(main(parser.parse_args()))
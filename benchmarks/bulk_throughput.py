@@ -0,0 +1,61 @@
+"""
+Throughput benchmark for the bulk breakdown CLI
+
+Writes a synthetic backlog (a third of the tasks with a Gmail address, so the
+personalisation path runs too) and times ``focuscoach.bulk.run`` across worker
+counts and chunk sizes.
+
+Usage: python benchmarks/bulk_throughput.py [--tasks 50000] [--workers 0 1 4] [--chunk-sizes 64 256 1024]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.bulk import run  # noqa: E402
+
+TASKS = ["prepare quarterly report", "write a blog post", "clean my room", "study for exam",
+         "plan a birthday party", "reply to customer complaint", "fix the login bug"]
+
+
+def write_backlog(path: str, count: int):
+    with open(path, "w", encoding="utf-8") as handle:
+        for index in range(count):
+            record = {"id": f"task-{index}", "task": f"{TASKS[index % len(TASKS)]} #{index}"}
+            if index % 3 == 0:
+                record["gmail_address"] = "team@example.com"
+            handle.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, os.cpu_count() or 1])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[64, 256, 1024])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backlog = os.path.join(tmp, "backlog.jsonl")
+        output = os.path.join(tmp, "breakdowns.jsonl")
+        write_backlog(backlog, args.tasks)
+
+        print(f"{args.tasks:,} tasks")
+        print(f"{'workers':>8} {'chunk':>6} {'seconds':>8} {'tasks/s':>10}")
+        for workers in dict.fromkeys(args.workers):
+            for chunk_size in args.chunk_sizes:
+                started = time.perf_counter()
+                with open(os.devnull, "w") as quiet, redirect_stderr(quiet):
+                    run(backlog, output, workers, chunk_size, restart=True, progress_interval=3600)
+                elapsed = time.perf_counter() - started
+                print(f"{workers:>8} {chunk_size:>6} {elapsed:>8.2f} {args.tasks / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
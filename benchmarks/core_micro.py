@@ -0,0 +1,383 @@
+"""
+Microbenchmarks for the focus technique and breakdown core
+
+Times the core calls the app, API server and bulk CLI make per user or per
+task over generated datasets at several scales (10, 10k and 1M deadlines,
+profiles and Pomodoro sessions by default), and reports nanoseconds per
+row. Rows are drawn from a pool of distinct generated records, so a 1M-row
+dataset is a list of references rather than a million dicts.
+
+    run      time every benchmark; ``--save`` writes the results as a JSON baseline
+    compare  time again (or load ``--current``) and flag benchmarks slower than
+             the baseline by more than ``--threshold`` even after ``--retries``
+             re-timings, or missing from the current run; exits non-zero if any are
+
+Every timing is paired with a fixed calibration loop timed just before it,
+and ``compare`` judges the median of those ratios rather than raw times: a
+slow stretch on a busy machine slows the calibration loop too, so it does
+not read as a regression. Raw ns/row are still reported, and baselines are
+still best recorded on the machine that compares. The reference baseline is
+benchmarks/baselines/core_micro.json.
+
+Usage: python benchmarks/core_micro.py run [--scales 10 10000 1000000] [--only NAME] [--repeat 5]
+                                           [--save FILE]
+       python benchmarks/core_micro.py compare [BASELINE] [--current FILE] [--threshold 0.25] [--retries 2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focus_techniques import FocusTechniqueManager, PomodoroTimer  # noqa: E402
+from focuscoach.breakdown import demo_task_breakdown  # noqa: E402
+from focuscoach.deadlines import DEADLINE_KEYWORDS, analyze_deadlines_for_task  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "core_micro.json")
+DEFAULT_SCALES = [10, 10_000, 1_000_000]
+POOL_SIZE = 4096
+
+TASK_TYPES = ["writing", "reading", "planning", "creative", "collaborative", "overwhelming", "repetitive",
+              "complex", "general", "Writing"]
+PREFERENCES = ["needs_accountability", "sensory_sensitive", "gets_overwhelmed"]
+CHALLENGES = ["focus_difficulties", "time_management", "sensory_overload", "executive_function", "motivation",
+              "unknown_challenge"]
+SENSORY_NEEDS = ["visual", "auditory", "tactile", "movement", "proprioceptive", "Visual"]
+MOODS = ["overwhelmed", "frustrated", "tired", "anxious", "motivated", "neutral"]
+DEADLINE_WORDS = ["Review", "Draft", "Submit", "Plan", "Budget", "Invoice", "Launch", "Sync"]
+PRIORITIES = ["low", "medium", "high"]
+# A task that matches the deadline keywords, so the deadline scan and personalisation both run
+KEYWORD_TASK = "prepare quarterly report"
+
+
+class Datasets:
+    """Generated rows per kind and scale, built on first use"""
+
+    def __init__(self, seed: int = 1):
+        self.seed = seed
+        self._pools: Dict[str, List[Any]] = {}
+        self._rows: Dict[Tuple[str, int], List[Any]] = {}
+
+    def rows(self, kind: str, n: int) -> List[Any]:
+        if (kind, n) not in self._rows:
+            pool = self._pools.get(kind)
+            if pool is None:
+                pool = self._pools[kind] = getattr(self, f"_make_{kind}")(random.Random(self.seed))
+            rng = random.Random(self.seed * 31 + n)
+            self._rows[(kind, n)] = [pool[rng.randrange(len(pool))] for _ in range(n)]
+        return self._rows[(kind, n)]
+
+    def drop(self, n: int):
+        for key in [key for key in self._rows if key[1] == n]:
+            del self._rows[key]
+
+    @staticmethod
+    def _make_deadlines(rng: random.Random) -> List[Dict[str, Any]]:
+        deadlines = []
+        start = datetime(2024, 1, 1)
+        for _ in range(POOL_SIZE):
+            # About a quarter mention a deadline keyword, like a real inbox
+            words = rng.sample(DEADLINE_WORDS, 2)
+            if rng.random() < 0.25:
+                words.insert(rng.randrange(3), rng.choice(DEADLINE_KEYWORDS).title())
+            deadlines.append({
+                "title": " ".join(words),
+                "date": (start + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d"),
+                "priority": rng.choices(PRIORITIES, [5, 4, 1])[0],
+                "source": rng.choice(["email", "calendar invite", "shared doc"]),
+            })
+        return deadlines
+
+    @staticmethod
+    def _make_profiles(rng: random.Random) -> List[Dict[str, Any]]:
+        return [{
+            "task_type": rng.choice(TASK_TYPES),
+            "preferences": {preference: True for preference in PREFERENCES if rng.random() < 0.2},
+            "challenges": rng.sample(CHALLENGES, rng.randint(0, 3)),
+            "sensory_needs": rng.sample(SENSORY_NEEDS, rng.randint(0, 3)),
+            "mood": rng.choice(MOODS),
+        } for _ in range(POOL_SIZE)]
+
+    @staticmethod
+    def _make_sessions(rng: random.Random) -> List[PomodoroTimer]:
+        timers = []
+        for _ in range(POOL_SIZE):
+            timer = PomodoroTimer(work_duration=rng.choice([15, 25, 50]))
+            timer.session_count = rng.randrange(8)
+            state = rng.choice(["idle", "work", "break", "completed"])
+            if state == "work":
+                timer.start_work_session()
+            elif state == "break":
+                timer.start_break_session()
+            elif state == "completed":
+                timer.start_work_session()
+                timer.current_session.end_time = datetime.now() - timedelta(minutes=1)
+            timers.append(timer)
+        return timers
+
+
+# Each benchmark takes (datasets, n) and returns (workload, rows it covers)
+
+def bench_suggest_technique(data: Datasets, n: int):
+    manager, profiles = FocusTechniqueManager(), data.rows("profiles", n)
+
+    def run():
+        for profile in profiles:
+            manager.suggest_technique(profile["task_type"], profile["preferences"])
+    return run, n
+
+
+def bench_get_accommodations(data: Datasets, n: int):
+    manager = FocusTechniqueManager()
+    challenges = [CHALLENGES[index % len(CHALLENGES)] for index in range(n)]
+
+    def run():
+        for challenge in challenges:
+            manager.get_accommodations(challenge)
+    return run, n
+
+
+def bench_get_sensory_tips(data: Datasets, n: int):
+    manager, profiles = FocusTechniqueManager(), data.rows("profiles", n)
+
+    def run():
+        for profile in profiles:
+            manager.get_sensory_tips(profile["sensory_needs"])
+    return run, n
+
+
+def bench_create_personalized_plan(data: Datasets, n: int):
+    manager, profiles = FocusTechniqueManager(), data.rows("profiles", n)
+
+    def run():
+        for profile in profiles:
+            manager.create_personalized_plan("write the project update", profile)
+    return run, n
+
+
+def bench_get_session_status(data: Datasets, n: int):
+    timers = data.rows("sessions", n)
+
+    def run():
+        for timer in timers:
+            timer.get_session_status()
+    return run, n
+
+
+def bench_analyze_deadlines_for_task(data: Datasets, n: int):
+    deadlines = data.rows("deadlines", n)
+    return (lambda: analyze_deadlines_for_task(KEYWORD_TASK, deadlines)), n
+
+
+def bench_demo_task_breakdown(data: Datasets, n: int):
+    deadlines = data.rows("deadlines", n)
+    return (lambda: demo_task_breakdown(KEYWORD_TASK, gmail_address="demo@example.com", deadlines=deadlines)), n
+
+
+def calibration_loop() -> Callable[[], Any]:
+    """Fixed interpreter work (dict lookups, string tests, a sort) unrelated to the code under test"""
+    rows = [{"title": f"Task {index}", "priority": PRIORITIES[index % 3], "minutes": index % 50}
+            for index in range(1024)]
+
+    def run():
+        picked = []
+        for row in rows:
+            if row["priority"] != "low" and "1" in row["title"]:
+                picked.append(row["minutes"] * 60)
+        return sorted(picked)
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[Datasets, int], Tuple[Callable[[], Any], int]]] = {
+    "suggest_technique": bench_suggest_technique,
+    "get_accommodations": bench_get_accommodations,
+    "get_sensory_tips": bench_get_sensory_tips,
+    "create_personalized_plan": bench_create_personalized_plan,
+    "get_session_status": bench_get_session_status,
+    "analyze_deadlines_for_task": bench_analyze_deadlines_for_task,
+    "demo_task_breakdown": bench_demo_task_breakdown,
+}
+
+
+def run_benchmarks(names: List[str], scales: List[int], repeat: int, seed: int) -> Dict[str, Any]:
+    """Timings per benchmark and scale over ``repeat`` rounds.
+
+    ``results`` holds the best time in nanoseconds per row. ``relative``
+    holds the median ratio of each timing to the calibration loop timed just
+    before it, which is what ``compare`` judges. Repeats go round-robin across
+    the benchmarks of a scale, so a slow stretch on a busy machine costs each
+    benchmark one timing, not all of them.
+    """
+    data = Datasets(seed)
+    results: Dict[str, Dict[str, float]] = {name: {} for name in names}
+    relative: Dict[str, Dict[str, float]] = {name: {} for name in names}
+    calibration = timeit.Timer(calibration_loop())
+    calibration_number = max(1, calibration.autorange()[0] // 4)
+    for n in scales:
+        timers = {}
+        for name in names:
+            run, rows = BENCHMARKS[name](data, n)
+            timer = timeit.Timer(run)
+            number, _ = timer.autorange()
+            timers[name] = (timer, number, rows, [], [])
+        for _ in range(repeat):
+            for timer, number, rows, timings, ratios in timers.values():
+                reference = calibration.timeit(calibration_number) / calibration_number
+                elapsed = timer.timeit(number) / number / max(rows, 1)
+                timings.append(elapsed * 1e9)
+                ratios.append(elapsed / reference)
+        for name, (_, _, _, timings, ratios) in timers.items():
+            results[name][str(n)] = round(min(timings), 1)
+            relative[name][str(n)] = round(statistics.median(ratios) * 1e6, 2)
+            print(f"  {name:<28} {n:>9,} rows  {results[name][str(n)]:>10,.1f} ns/row", file=sys.stderr)
+        del timers
+        data.drop(n)
+    return {
+        "meta": {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+        # Time per row in millionths of a calibration loop
+        "relative": relative,
+    }
+
+
+def print_table(report: Dict[str, Any]):
+    scales = sorted({int(n) for timings in report["results"].values() for n in timings})
+    print(f"{'ns per row':<28}" + "".join(f"{n:>12,}" for n in scales))
+    for name, timings in report["results"].items():
+        print(f"{name:<28}" + "".join(f"{timings[str(n)]:>12,.1f}" if str(n) in timings else f"{'-':>12}"
+                                      for n in scales))
+
+
+def slowdown(baseline: Dict[str, Any], current: Dict[str, Any], name: str, n: str) -> Optional[float]:
+    """Fractional slowdown of one benchmark and scale, judged on calibrated ratios; None if missing"""
+    before, after = baseline["relative"][name][n], current["relative"].get(name, {}).get(n)
+    if after is None:
+        return None
+    return after / before - 1 if before else 0.0
+
+
+def slower_than(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, str]]:
+    """(benchmark, rows) pairs more than ``threshold`` slower than the baseline"""
+    return [(name, n) for name, timings in baseline["results"].items() for n in timings
+            if (slowdown(baseline, current, name, n) or 0.0) > threshold]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print current against baseline per benchmark and scale; returns the failures.
+
+    Columns show raw ns/row; the change is that of the calibrated ratios. A
+    benchmark missing from the current run counts as a failure.
+    """
+    regressions = []
+    print(f"{'benchmark':<28} {'rows':>9} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, timings in baseline["results"].items():
+        for n, before in timings.items():
+            after = current["results"].get(name, {}).get(n)
+            change = slowdown(baseline, current, name, n)
+            if after is None or change is None:
+                print(f"{name:<28} {int(n):>9,} {before:>10,.1f} {'-':>10}  MISSING")
+                regressions.append(f"{name} at {int(n):,} rows: missing from the current run")
+                continue
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} at {int(n):,} rows: {before:,.1f} -> {after:,.1f} ns/row "
+                                   f"({change:+.0%} calibrated)")
+            elif change < -threshold:
+                flag = "  faster"
+            print(f"{name:<28} {int(n):>9,} {before:>10,.1f} {after:>10,.1f} {change:>+8.0%}{flag}")
+    if baseline["meta"].get("python") != current["meta"].get("python"):
+        print(f"\nNote: baseline recorded on Python {baseline['meta'].get('python')}, "
+              f"current on {current['meta'].get('python')}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("run", "compare"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--scales", type=int, nargs="+", help=f"rows per dataset (default {DEFAULT_SCALES})")
+        sub.add_argument("--only", action="append", choices=list(BENCHMARKS), help="limit to these (repeatable)")
+        sub.add_argument("--repeat", type=int, default=5, help="timed rounds per benchmark and scale")
+        sub.add_argument("--seed", type=int, default=1)
+    commands.choices["run"].add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    compare_parser = commands.choices["compare"]
+    compare_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    compare_parser.add_argument("--current", metavar="FILE", help="compare a saved run instead of timing now")
+    compare_parser.add_argument("--threshold", type=float, default=0.25,
+                                help="flag slowdowns beyond this fraction (default 0.25 = 25%%)")
+    compare_parser.add_argument("--retries", type=int, default=2,
+                                help="times to re-time a suspected regression before flagging it")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_benchmarks(args.only or list(BENCHMARKS), args.scales or DEFAULT_SCALES, args.repeat, args.seed)
+        print_table(report)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+                handle.write("\n")
+            print(f"\nSaved baseline to {args.save}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    if args.only:
+        baseline["results"] = {name: timings for name, timings in baseline["results"].items() if name in args.only}
+    if args.scales:
+        baseline["results"] = {name: {n: value for n, value in timings.items() if int(n) in args.scales}
+                               for name, timings in baseline["results"].items()}
+    if "relative" not in baseline:
+        print(f"{args.baseline} has no calibrated timings; record it again with `run --save`", file=sys.stderr)
+        return 2
+    if args.current:
+        with open(args.current, encoding="utf-8") as handle:
+            current = json.load(handle)
+    else:
+        scales = sorted({int(n) for timings in baseline["results"].values() for n in timings})
+        seed = baseline["meta"].get("seed", args.seed)
+        current = run_benchmarks(list(baseline["results"]), scales, args.repeat, seed)
+        # A slowdown has to survive re-timing before it counts: suspects are
+        # timed again and judged on the median over every attempt
+        attempts: Dict[Tuple[str, str], List[float]] = {}
+        for _ in range(args.retries):
+            suspects = slower_than(baseline, current, args.threshold)
+            if not suspects:
+                break
+            print(f"Re-timing {len(suspects)} suspected regression(s)", file=sys.stderr)
+            for name, n in suspects:
+                retry = run_benchmarks([name], [int(n)], args.repeat, seed)
+                ratios = attempts.setdefault((name, n), [current["relative"][name][n]])
+                ratios.append(retry["relative"][name][n])
+                current["relative"][name][n] = statistics.median(ratios)
+                current["results"][name][n] = min(current["results"][name][n], retry["results"][name][n])
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by over {args.threshold:.0%} or missing:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Sharded dispatch failover check
+
+Starts ``--workers`` dispatcher processes sharing one SQLite lease store, each
+delivering synthetic reminders (every user fires every ``--period`` seconds)
+by appending their keys to a per-worker log. One worker is SIGKILLed part way
+through; the rest are stopped gracefully at the end. Every reminder due in
+the run must appear in the logs exactly once, apart from ones a killed worker
+delivered but had not recorded yet (reported separately).
+
+Usage: python benchmarks/dispatch_failover.py [--workers 3] [--users 5000] [--duration 20] [--ttl 3]
+"""
+
+import argparse
+import glob
+import math
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.dispatch import (DEFAULT_SHARDS, LeaseStore, ShardedDispatcher, notification_key,  # noqa: E402
+                                 shard_for_user)
+
+
+def synthetic_source(users: int, period: float, epoch: float):
+    by_shard = {}
+    for index in range(users):
+        user = f"user-{index}"
+        phase = zlib.crc32(user.encode("utf-8")) % int(period * 1000) / 1000
+        by_shard.setdefault(shard_for_user(user), []).append((user, phase))
+
+    def source(shard, start, end):
+        start_ts, end_ts = max(start.timestamp(), epoch), end.timestamp()
+        for user, phase in by_shard.get(shard, []):
+            fire = phase + period * math.ceil((start_ts - phase) / period)
+            while fire < end_ts:
+                moment = datetime.fromtimestamp(fire)
+                yield {"user_id": user, "fire_at": moment, "offset": 0,
+                       "event": {"title": "Check-in", "uid": user, "start_time": moment}}
+                fire += period
+
+    return source
+
+
+def run_worker(args):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    with open(os.path.join(args.dir, f"{args.worker}.log"), "a", buffering=1) as log:
+        dispatcher = ShardedDispatcher(
+            args.worker, LeaseStore(os.path.join(args.dir, "leases.db")),
+            synthetic_source(args.users, args.period, args.epoch),
+            lambda notification: log.write(notification_key(notification) + "\n"),
+            lease_ttl=args.ttl, catch_up=3600
+        )
+        dispatcher.run(stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--period", type=float, default=5.0, help="seconds between each user's reminders")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--ttl", type=float, default=3.0, help="lease TTL in seconds")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    parser.add_argument("--epoch", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        epoch = time.time()
+        common = ["--dir", tmp, "--epoch", str(epoch), "--users", str(args.users),
+                  "--period", str(args.period), "--ttl", str(args.ttl)]
+        names = [f"worker-{index}" for index in range(args.workers)]
+        procs = {name: subprocess.Popen([sys.executable, __file__, "--worker", name] + common) for name in names}
+
+        time.sleep(args.duration / 3)
+        victim = names[0]
+        procs[victim].send_signal(signal.SIGKILL)
+        print(f"Killed {victim} at {time.time() - epoch:.1f}s")
+        time.sleep(args.duration * 2 / 3)
+        for name in names[1:]:
+            procs[name].send_signal(signal.SIGTERM)
+        for proc in procs.values():
+            proc.wait()
+
+        # Each shard has delivered everything due before its own final watermark
+        store = LeaseStore(os.path.join(tmp, "leases.db"))
+        watermarks = {shard: store.watermark(shard) for shard in range(DEFAULT_SHARDS)}
+        store.close()
+        source = synthetic_source(args.users, args.period, epoch)
+        expected = {notification_key(notification) for shard, through in watermarks.items()
+                    for notification in source(shard, datetime.fromtimestamp(epoch), datetime.fromtimestamp(through))}
+
+        delivered = Counter()
+        by_worker = {}
+        for path in glob.glob(os.path.join(tmp, "*.log")):
+            with open(path) as log:
+                keys = [line.rstrip("\n") for line in log]
+            by_worker[os.path.basename(path)[:-4]] = len(keys)
+            delivered.update(keys)
+
+        duplicates = sum(count - 1 for count in delivered.values())
+        missing = len(expected - set(delivered))
+        unexpected = len(set(delivered) - expected)
+        print(f"Deliveries per worker: {by_worker}")
+        print(f"Due before the final watermarks: {len(expected):,}; delivered {len(delivered):,} distinct; "
+              f"missing {missing}; unexpected {unexpected}; redelivered after the crash {duplicates}")
+        return 1 if missing or unexpected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
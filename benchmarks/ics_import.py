@@ -0,0 +1,111 @@
+"""
+Streaming ICS import benchmark
+
+Generates a synthetic calendar export of about ``--size-mb`` megabytes (ten
+years of single events with long folded descriptions and alarms, plus a few
+thousand recurring series with exceptions) and times
+``focuscoach.ics.load_calendar_events`` for a 30-day window. Peak traced
+memory is reported to show the file is never held in memory.
+
+Usage: python benchmarks/ics_import.py [--size-mb 50] [--series 2000] [--path export.ics] [--keep]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.ics import load_calendar_events  # noqa: E402
+
+TITLES = ["Team Standup", "1:1 with manager", "Project deadline", "Focus time - deep work",
+          "Client presentation", "Dentist", "Sprint planning", "Quarterly report due"]
+RULES = ["FREQ=DAILY", "FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU",
+         "FREQ=MONTHLY;BYDAY=-1FR", "FREQ=MONTHLY;BYMONTHDAY=15", "FREQ=YEARLY", "FREQ=DAILY;COUNT=500"]
+
+
+def _fold(line: str) -> str:
+    # RFC 5545 lines are at most 75 octets; continuation lines start with a space
+    chunks = [line[:75]] + [" " + line[i:i + 74] for i in range(75, len(line), 74)]
+    return "\r\n".join(chunks) + "\r\n"
+
+
+def write_export(path: str, size_mb: float, series: int, now: datetime):
+    rng = random.Random(42)
+    target = int(size_mb * 1024 * 1024)
+    first = now - timedelta(days=3650)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        handle.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//FocusCoach//Benchmark//EN\r\n")
+        for index in range(series):
+            start = first + timedelta(days=rng.randint(0, 3600), hours=rng.randint(7, 17))
+            handle.write(
+                f"BEGIN:VEVENT\r\nUID:series-{index}@bench\r\nSUMMARY:{rng.choice(TITLES)} #{index}\r\n"
+                f"DTSTART:{start:%Y%m%dT%H%M%S}\r\nDURATION:PT30M\r\nRRULE:{rng.choice(RULES)}\r\n"
+                f"EXDATE:{start + timedelta(days=7):%Y%m%dT%H%M%S}\r\nEND:VEVENT\r\n"
+            )
+            if index % 10 == 0:
+                moved = start + timedelta(days=14)
+                handle.write(
+                    f"BEGIN:VEVENT\r\nUID:series-{index}@bench\r\nRECURRENCE-ID:{moved:%Y%m%dT%H%M%S}\r\n"
+                    f"SUMMARY:Moved instance #{index}\r\nDTSTART:{moved + timedelta(hours=1):%Y%m%dT%H%M%S}\r\n"
+                    f"DURATION:PT30M\r\nEND:VEVENT\r\n"
+                )
+        index = 0
+        while handle.tell() < target:
+            start = first + timedelta(minutes=rng.randint(0, 3650 * 24 * 60))
+            description = " ".join(rng.choice(TITLES) for _ in range(rng.randint(5, 40)))
+            handle.write(
+                f"BEGIN:VEVENT\r\nUID:event-{index}@bench\r\nSUMMARY:{rng.choice(TITLES)}\r\n"
+                f"DTSTART:{start:%Y%m%dT%H%M%S}Z\r\nDTEND:{start + timedelta(hours=1):%Y%m%dT%H%M%S}Z\r\n"
+                + _fold(f"DESCRIPTION:{description}")
+                + f"PRIORITY:{rng.randint(0, 9)}\r\nBEGIN:VALARM\r\nTRIGGER:-PT15M\r\nACTION:DISPLAY\r\n"
+                f"END:VALARM\r\nEND:VEVENT\r\n"
+            )
+            index += 1
+        handle.write("END:VCALENDAR\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--series", type=int, default=2000, help="recurring series in the export")
+    parser.add_argument("--path", help="use this file instead of a generated one")
+    parser.add_argument("--keep", action="store_true", help="keep the generated file")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    path = args.path
+    if not path:
+        handle, path = tempfile.mkstemp(suffix=".ics")
+        os.close(handle)
+        started = time.perf_counter()
+        write_export(path, args.size_mb, args.series, now)
+        print(f"Generated {path} in {time.perf_counter() - started:.1f}s")
+
+    try:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        started = time.perf_counter()
+        events = load_calendar_events(path, now, now + timedelta(days=30))
+        elapsed = time.perf_counter() - started
+        print(f"Parsed {size_mb:.1f} MB in {elapsed:.2f}s ({size_mb / elapsed:.1f} MB/s), "
+              f"{len(events):,} events in the next 30 days")
+
+        # Second pass under tracemalloc (slower) just for the memory figure
+        tracemalloc.start()
+        load_calendar_events(path, now, now + timedelta(days=30))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak traced memory: {peak / (1024 * 1024):.1f} MB")
+    finally:
+        if not args.path and not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Import-time benchmark for headless FocusCoach workers
+
+Starts fresh interpreters and times how long it takes to import the core
+package and produce a first breakdown, compared with importing Streamlit.
+Exits non-zero if the headless path misses its budget.
+
+Usage: python benchmarks/import_time.py [--runs 7] [--budget-ms 100]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet prints its own elapsed seconds so interpreter startup is excluded
+SNIPPETS = {
+    "headless core": (
+        "import time; t = time.perf_counter(); "
+        "from focuscoach import demo_task_breakdown, ReminderBook, schedule_mandatory_reminder; "
+        "demo_task_breakdown('prepare quarterly report', gmail_address='demo@example.com'); "
+        "schedule_mandatory_reminder(ReminderBook(), 'report', 'task', ['1 hour before']); "
+        "print(time.perf_counter() - t)"
+    ),
+    "streamlit": (
+        "import time; t = time.perf_counter(); import streamlit; print(time.perf_counter() - t)"
+    ),
+}
+
+
+def time_snippet(code: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return []
+        samples.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SNIPPETS.items():
+        samples = time_snippet(code, args.runs)
+        if not samples:
+            print(f"{name:>14}: not importable here, skipped")
+            continue
+        results[name] = statistics.median(samples)
+        print(f"{name:>14}: median {results[name]:7.1f} ms  (min {min(samples):.1f}, max {max(samples):.1f})")
+
+    headless = results.get("headless core")
+    if headless is None or headless > args.budget_ms:
+        print(f"FAIL: headless import exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"OK: headless import within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Outbox drain benchmark under a retry storm
+
+Enqueues ``--messages`` notifications split across a healthy ``email``
+channel and a ``slack`` channel that fails ``--failure-rate`` of sends and is
+completely down for the first ``--outage`` simulated seconds. Drains on a
+simulated clock (backoff and breaker cooldowns pass instantly) and reports
+wall-clock throughput, attempts per message, duplicate posts seen by the
+channels, and what compaction removes.
+
+Usage: python benchmarks/outbox_drain.py [--messages 50000] [--failure-rate 0.3] [--outage 60] [--path outbox.db]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.outbox import Outbox, OutboxSender  # noqa: E402
+
+
+class FlakyChannel:
+    def __init__(self, name, failure_rate, outage_until, clock, rng):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.outage_until = outage_until
+        self.clock = clock
+        self.rng = rng
+        self.posts = Counter()
+        self.calls = 0
+
+    def __call__(self, messages):
+        self.calls += 1
+        if self.clock() < self.outage_until:
+            raise ConnectionError(f"{self.name} unavailable")
+        errors = []
+        for message in messages:
+            if self.rng.random() < self.failure_rate:
+                errors.append("rate_limited")
+            else:
+                self.posts[message["key"]] += 1
+                errors.append(None)
+        return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--outage", type=float, default=60.0, help="simulated seconds slack is down at the start")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--path", help="SQLite file (default: a temporary file)")
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.path
+    if not path:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "outbox.db")
+
+    clock = [0.0]
+    rng = random.Random(11)
+    outbox = Outbox(path, clock=lambda: clock[0])
+    slack = FlakyChannel("slack", args.failure_rate, args.outage, lambda: clock[0], rng)
+    email = FlakyChannel("email", 0.0, 0.0, lambda: clock[0], rng)
+    sender = OutboxSender(outbox, {"slack": slack, "email": email}, batch_size=args.batch_size,
+                          max_attempts=12, max_backoff=120.0, rng=rng)
+
+    started = time.perf_counter()
+    with outbox.transaction() as tx:
+        for index in range(args.messages):
+            channel = "slack" if index % 2 else "email"
+            tx.put(f"reminder:user-{index % 5000}:{index}", {"index": index})
+            tx.enqueue(channel, {"user": f"user-{index % 5000}", "text": f"Reminder {index}"}, f"reminder-{index}")
+        # A retried request re-enqueues a slice of the same messages
+        for index in range(0, args.messages, 10):
+            tx.enqueue("slack" if index % 2 else "email", {}, f"reminder-{index}")
+    enqueued = time.perf_counter() - started
+
+    started = time.perf_counter()
+    email_done_at = None
+    while True:
+        handled = sender.drain_once()
+        counts = outbox.counts()
+        if email_done_at is None and len(email.posts) == args.messages - args.messages // 2:
+            email_done_at = time.perf_counter() - started
+        if not counts.get("pending"):
+            break
+        if not handled:
+            clock[0] += 1.0  # nothing due yet: let backoff and cooldowns elapse
+    drained = time.perf_counter() - started
+
+    posts = slack.posts + email.posts
+    duplicates = sum(count - 1 for count in posts.values())
+    attempts = len(posts) + sender.retried + sender.dead
+    print(f"{args.messages:,} messages enqueued in {enqueued:.2f}s ({args.messages / enqueued:,.0f}/s, "
+          f"state and outbox in one transaction)")
+    print(f"Drained in {drained:.2f}s wall ({args.messages / drained:,.0f} msg/s), {clock[0]:.0f}s simulated; "
+          f"healthy channel finished after {email_done_at:.2f}s")
+    print(f"Delivered {len(posts):,}, dead {sender.dead}, retries {sender.retried:,} "
+          f"({attempts / args.messages:.2f} attempts/message), duplicate posts {duplicates}, "
+          f"slack batch calls {slack.calls:,}")
+    clock[0] += 1.0
+    print(f"Compaction removed {outbox.compact(keep_delivered=0, keep_log=86400)}; counts now {outbox.counts()}")
+    outbox.close()
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Body-doubling partner matching benchmark
+
+Loads ``--users`` synthetic calendars into ``focuscoach.matching`` and times
+free-slot extraction, the full sweep-line match and an incremental rematch
+after ``--changes`` calendars change. A pairwise matcher (every waiting user
+scored against every other, the O(n^2) approach) runs on ``--pairwise-users``
+and is extrapolated to the full population. Matches (``--check`` of them,
+or all) are validated: both users list each other, share the technique, and
+are free for the whole window.
+
+Usage: python benchmarks/partner_matching.py [--users 100000] [--changes 1000] [--pairwise-users 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.matching import MatchingEngine, free_slots, synthetic_calendars  # noqa: E402
+
+MIN_OVERLAP = timedelta(minutes=25)
+
+
+def pairwise(population, start, end):
+    """Each waiting user compared with every other waiting user, pairing with the longest overlap"""
+    users = [(user_id, set(techniques), free_slots(events, start, end, min_length=MIN_OVERLAP))
+             for user_id, events, techniques in population]
+    matched = set()
+    pairs = 0
+    for position, (user_id, techniques, slots) in enumerate(users):
+        if user_id in matched:
+            continue
+        best, best_overlap = None, MIN_OVERLAP
+        for other_id, other_techniques, other_slots in users[position + 1:]:
+            if other_id in matched or not techniques & other_techniques:
+                continue
+            for slot_start, slot_end in slots:
+                for other_start, other_end in other_slots:
+                    overlap = min(slot_end, other_end) - max(slot_start, other_start)
+                    if overlap >= best_overlap:
+                        best, best_overlap = other_id, overlap
+        if best is not None:
+            matched.update((user_id, best))
+            pairs += 1
+    return pairs
+
+
+def check(engine, calendars, start, end, user_ids):
+    """How many of ``user_ids``' matches break a rule"""
+    problems = 0
+    for user_id in user_ids:
+        match = engine.matches[user_id]
+        events, techniques = calendars[user_id]
+        other_events, other_techniques = calendars[match.partner]
+        back = engine.matches.get(match.partner)
+        free = all(any(slot_start <= match.start and match.end <= slot_end
+                       for slot_start, slot_end in free_slots(user_events, start, end, min_length=MIN_OVERLAP))
+                   for user_events in (events, other_events))
+        problems += not (back and back.partner == user_id and match.technique in techniques
+                         and match.technique in other_techniques and match.end - match.start >= MIN_OVERLAP and free)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=1000)
+    parser.add_argument("--pairwise-users", type=int, default=2000)
+    parser.add_argument("--check", type=int, default=2000, help="pairs to validate (0 = all)")
+    args = parser.parse_args()
+
+    day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    start, end = day, day + timedelta(days=1)
+    population = list(synthetic_calendars(args.users, day))
+    calendars = {user_id: (events, techniques) for user_id, events, techniques in population}
+
+    engine = MatchingEngine(start, end, MIN_OVERLAP)
+    started = time.perf_counter()
+    for user_id, events, techniques in population:
+        engine.set_user(user_id, events, techniques)
+    loaded = time.perf_counter() - started
+    started = time.perf_counter()
+    pairs = engine.rematch()
+    swept = time.perf_counter() - started
+    print(f"{args.users:,} users: free slots {loaded:.2f}s, sweep-line match {swept:.2f}s -> {pairs:,} pairs, "
+          f"{engine.waiting:,} waiting")
+
+    rng = random.Random(5)
+    changed = rng.sample(population, min(args.changes, len(population)))
+    started = time.perf_counter()
+    for user_id, events, techniques in changed:
+        moved = [dict(event, start_time=event["start_time"] + timedelta(minutes=30),
+                      end_time=event["end_time"] + timedelta(minutes=30)) for event in events]
+        calendars[user_id] = (moved, techniques)
+        engine.set_user(user_id, moved, techniques)
+    pairs = engine.rematch()
+    print(f"{len(changed):,} calendars changed: rematch {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{pairs:,} new pairs from {engine.swept_users:,} swept users, {engine.waiting:,} waiting")
+
+    sample = list(engine.matches)
+    if args.check:
+        sample = random.Random(9).sample(sample, min(args.check, len(sample)))
+    print(f"Validated {len(sample):,} matches: {check(engine, calendars, start, end, sample)} problems")
+
+    subset = population[:args.pairwise_users]
+    started = time.perf_counter()
+    pairs = pairwise(subset, start, end)
+    elapsed = time.perf_counter() - started
+    engine = MatchingEngine(start, end, MIN_OVERLAP)
+    started_sweep = time.perf_counter()
+    for user_id, events, techniques in subset:
+        engine.set_user(user_id, events, techniques)
+    swept_pairs = engine.rematch()
+    swept = time.perf_counter() - started_sweep
+    scale = (args.users / len(subset)) ** 2
+    print(f"Pairwise on {len(subset):,} users: {elapsed:.2f}s ({pairs:,} pairs) vs sweep {swept:.3f}s "
+          f"({swept_pairs:,} pairs); pairwise extrapolated to {args.users:,} users ~{elapsed * scale / 60:,.0f} min")
+
+
+if __name__ == "__main__":
+    main()
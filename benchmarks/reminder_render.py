@@ -0,0 +1,98 @@
+"""
+Bulk reminder rendering benchmark
+
+Renders reminders plus their Slack message for a synthetic batch of events
+(spread over the next ten days, ``--users`` distinct users) two ways: one
+``create_encouraging_reminder`` + ``format_calendar_reminder_message`` call per
+event, and ``ReminderRenderer`` into reused buffers. Checks both produce the
+same text for the same variants and reports reminders per minute.
+
+Usage: python benchmarks/reminder_render.py [--events 200000] [--users 20000] [--batch 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.calendar import ENCOURAGING_MESSAGES, create_encouraging_reminder  # noqa: E402
+from focuscoach.reminder_render import ReminderRenderer  # noqa: E402
+from focuscoach.slack import format_calendar_reminder_message  # noqa: E402
+
+TYPES = ["meeting", "deadline", "focus", "presentation", "task"]
+PRIORITIES = ["low", "medium", "high"]
+
+
+def make_events(count: int, now: datetime, rng: random.Random):
+    return [
+        {
+            "title": f"Event {index}",
+            "start_time": now + timedelta(seconds=rng.randint(0, 10 * 86400)),
+            "type": rng.choice(TYPES),
+            "priority": rng.choice(PRIORITIES),
+        }
+        for index in range(count)
+    ]
+
+
+class _Fixed(random.Random):
+    """Makes create_encouraging_reminder pick a known variant for the parity check"""
+
+    def __init__(self, index: int):
+        super().__init__()
+        self.index = index
+
+    def choice(self, seq):
+        return seq[self.index]
+
+
+def check_parity(renderer: ReminderRenderer, events, now: datetime):
+    variants = list(range(len(ENCOURAGING_MESSAGES["upcoming"]))) * (len(events) // 5 + 1)
+    reminders, messages = [], []
+    count = renderer.render_into(reminders, events, [None] * len(events), now=now, variants=variants)
+    renderer.slack_into(messages, events, reminders)
+    for index, event in enumerate(events[:count]):
+        expected = create_encouraging_reminder(event, "upcoming", now=now, rng=_Fixed(variants[index]))
+        assert reminders[index] == expected, (reminders[index], expected)
+        assert messages[index] == format_calendar_reminder_message(event, expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    now = datetime.now()
+    events = make_events(args.events, now, rng)
+    users = [f"user-{rng.randrange(args.users)}" for _ in events]
+    renderer = ReminderRenderer()
+    check_parity(renderer, events[:5000], now)
+
+    started = time.perf_counter()
+    for event in events:
+        format_calendar_reminder_message(event, create_encouraging_reminder(event, "upcoming", now=now, rng=rng))
+    baseline = time.perf_counter() - started
+
+    reminders, messages = [], []
+    started = time.perf_counter()
+    for start in range(0, len(events), args.batch):
+        batch = events[start:start + args.batch]
+        count = renderer.render_into(reminders, batch, users[start:start + args.batch], now=now)
+        renderer.slack_into(messages, batch[:count], reminders)
+    bulk = time.perf_counter() - started
+
+    print(f"{args.events:,} reminders, {args.users:,} users, batches of {args.batch}")
+    print(f"per-call   {baseline:6.2f}s  {args.events / baseline * 60:>12,.0f} reminders/min")
+    print(f"renderer   {bulk:6.2f}s  {args.events / bulk * 60:>12,.0f} reminders/min  ({baseline / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Streamlit interaction (rerun) latency per page
+
+Starts ``streamlit run streamlit_app.py`` twice, once with
+``FOCUSCOACH_FRAGMENTS=0`` (every interaction reruns the whole app) and once
+with fragments on, and drives it the way the browser does: a websocket to
+``/_stcore/stream`` carrying ``rerun_script`` messages with the current widget
+states, plus the fragment id of the widget that changed. For each page it
+changes the page's first input widget, and a sidebar slider, ``--iterations``
+times, and times each from the message being sent to ``script_finished``.
+A one-slider app gives Streamlit's own floor: its browser queue is flushed
+every 10 ms, whatever the app does.
+
+Streamlit does not set TCP_NODELAY on its websocket, so Nagle on the server
+and delayed ACKs on the client add ~40 ms to most interactions on Linux. The
+client acknowledges immediately (TCP_QUICKACK) so the numbers are server
+work; pass ``--delayed-ack`` to see the stall.
+
+Fragments need Streamlit 1.37+; under an older Streamlit both runs are full
+reruns. Run with the interpreter the app is deployed with.
+
+Usage: python benchmarks/rerun_latency.py [--iterations 20] [--page "Focus Sessions"] [--delayed-ack]
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+
+from focuscoach.websocket import OP_BINARY, close_frame, connect, encode_frame, read_message  # noqa: E402
+
+PAGES = ["Task Breakdown", "Focus Sessions", "Focus Techniques", "Gmail Integration", "Slack Integration",
+         "Reminder Scheduler", "About FocusCoach"]
+NAVIGATION = "Choose a page:"
+SIDEBAR_WIDGET = "Preferred focus time (minutes)"
+FLOOR_APP = f"import streamlit as st\nst.slider({SIDEBAR_WIDGET!r}, 5, 60, 25)\n"
+
+# Element type -> WidgetState field its value travels in
+VALUE_FIELDS = {
+    "checkbox": "bool_value",
+    "slider": "double_array_value",
+    "text_input": "string_value",
+    "text_area": "string_value",
+    "selectbox": "int_value",
+    "radio": "int_value",
+    "multiselect": "int_array_value",
+}
+SIDEBAR = 1
+FINISHED_EARLY_FOR_RERUN = 2
+
+
+def nudge(kind, proto, value):
+    """A different valid value for a widget; applying it twice goes back to the start"""
+    if kind == "checkbox":
+        return not value
+    if kind == "slider":
+        low = value[0] + proto.step if value[0] + proto.step <= proto.max else value[0] - proto.step
+        return [proto.default[0] if value[0] != proto.default[0] else low] + list(value[1:])
+    if kind in ("text_input", "text_area"):
+        return value[:-1] if value.endswith(" ") else value + " "
+    if kind in ("selectbox", "radio"):
+        return (value + 1) % max(1, len(proto.options))
+    return [] if value else [0]
+
+
+class AppSession:
+    """One browser tab: widget values, and the last proto seen for each widget (buttons included)"""
+
+    def __init__(self, quickack=True):
+        self.widgets = {}
+        self.values = {}
+        self.exceptions = []
+        # Script runs started and elements received, over the session's lifetime
+        self.runs = 0
+        self.elements = collections.Counter()
+        self.quickack = quickack
+        self.reader = self.writer = self.socket = None
+
+    async def open(self, host, port):
+        self.reader, self.writer = await connect(host, port, "/_stcore/stream")
+        self.socket = self.writer.get_extra_info("socket")
+
+    def find(self, label, sidebar=None):
+        for widget_id, (kind, proto, fragment_id, in_sidebar) in self.widgets.items():
+            if proto.label == label and (sidebar is None or in_sidebar == sidebar):
+                return widget_id
+        return None
+
+    def first_input(self):
+        """The first input widget on the page itself"""
+        for widget_id, (kind, proto, fragment_id, in_sidebar) in self.widgets.items():
+            if not in_sidebar and kind in VALUE_FIELDS:
+                return widget_id
+        return None
+
+    async def rerun(self, fragment_id="", trigger=None):
+        """Send a rerun with the current widget states (and ``trigger`` pressed); returns the ms until it finished"""
+        message = BackMsg()
+        state = message.rerun_script
+        state.SetInParent()
+        for widget_id, value in self.values.items():
+            if widget_id not in self.widgets:
+                continue
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            field = VALUE_FIELDS[self.widgets[widget_id][0]]
+            if isinstance(value, list):
+                getattr(widget, field).data.extend(value)
+            else:
+                setattr(widget, field, value)
+        if trigger:
+            widget = state.widget_states.widgets.add()
+            widget.id = trigger
+            widget.trigger_value = True
+        if fragment_id:
+            state.fragment_id = fragment_id
+        else:
+            # A full run redraws every widget; a fragment run only its own
+            self.widgets = {}
+        started = time.perf_counter()
+        self.writer.write(encode_frame(message.SerializeToString(), OP_BINARY, mask=True))
+        while True:
+            if self.quickack:
+                # Linux clears QUICKACK as it goes; set it again before every read
+                self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            reply = await read_message(self.reader, self.writer, 1 << 26, mask=True)
+            if reply is None:
+                raise ConnectionError("server closed the websocket")
+            if reply[0] != OP_BINARY:
+                continue
+            forward = ForwardMsg()
+            forward.ParseFromString(reply[1])
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self.record(forward)
+            elif kind == "new_session":
+                self.runs += 1
+            elif kind == "script_finished" and forward.script_finished != FINISHED_EARLY_FOR_RERUN:
+                if not fragment_id:
+                    # Like the browser, forget widgets the run did not draw: an id that comes back later
+                    # (widgets whose id follows their value) starts again from its default
+                    self.values = {widget_id: value for widget_id, value in self.values.items()
+                                   if widget_id in self.widgets}
+                return (time.perf_counter() - started) * 1000
+
+    def record(self, forward):
+        delta = forward.delta
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        self.elements[kind] += 1
+        if kind == "exception":
+            self.exceptions.append(element.exception.message)
+        if kind not in VALUE_FIELDS and kind != "button":
+            return
+        proto = getattr(element, kind)
+        fragment_id = getattr(delta, "fragment_id", "")
+        self.widgets[proto.id] = (kind, proto, fragment_id, forward.metadata.delta_path[0] == SIDEBAR)
+        if kind in VALUE_FIELDS and proto.id not in self.values:
+            default = proto.default
+            self.values[proto.id] = list(default) if kind in ("slider", "multiselect") else default
+
+    async def change(self, widget_id):
+        """Change one widget the way a user would; returns (ms, whether only its fragment reran)"""
+        kind, proto, fragment_id, _ = self.widgets[widget_id]
+        self.values[widget_id] = nudge(kind, proto, self.values[widget_id])
+        return await self.rerun(fragment_id), bool(fragment_id)
+
+    async def click(self, widget_id):
+        """Press a button; returns (ms, whether only its fragment reran)"""
+        kind, proto, fragment_id, _ = self.widgets[widget_id]
+        return await self.rerun(fragment_id, trigger=widget_id), bool(fragment_id)
+
+    async def close(self):
+        self.writer.write(close_frame(mask=True))
+        self.writer.close()
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_app(port, script, fragments):
+    env = dict(os.environ, FOCUSCOACH_FRAGMENTS="1" if fragments else "0",
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    # Run from the repository root so .streamlit/config.toml applies
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", script,
+                               "--server.headless", "true", "--server.port", str(port),
+                               "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as response:
+                if response.read() == b"ok":
+                    return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit did not come up")
+
+
+async def measure(port, pages, iterations, quickack):
+    """{page: {"page": [ms...], "sidebar": [ms...], "widget": label, "scoped": bool}}, exceptions"""
+    session = AppSession(quickack)
+    await session.open("127.0.0.1", port)
+    await session.rerun()
+    results = {}
+    for page in pages:
+        navigation = session.find(NAVIGATION, sidebar=True)
+        session.values[navigation] = PAGES.index(page)
+        await session.rerun()
+        # Warm up caches the page builds on first view
+        await session.rerun()
+        result = results[page] = {"page": [], "sidebar": [], "widget": None, "scoped": False}
+        for _ in range(iterations):
+            widget = session.first_input()
+            if widget is not None:
+                result["widget"] = session.widgets[widget][1].label
+                elapsed, result["scoped"] = await session.change(widget)
+                result["page"].append(elapsed)
+            elapsed, _ = await session.change(session.find(SIDEBAR_WIDGET, sidebar=True))
+            result["sidebar"].append(elapsed)
+    await session.close()
+    return results, session.exceptions
+
+
+async def measure_floor(port, iterations, quickack):
+    session = AppSession(quickack)
+    await session.open("127.0.0.1", port)
+    await session.rerun()
+    widget = session.find(SIDEBAR_WIDGET)
+    samples = [(await session.change(widget))[0] for _ in range(iterations)]
+    await session.close()
+    return samples
+
+
+def run(script, fragments, measurement, *args):
+    port = free_port()
+    server = start_app(port, script, fragments)
+    try:
+        return asyncio.run(measurement(port, *args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def median(samples):
+    return statistics.median(samples) if samples else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--page", action="append", choices=PAGES, help="limit to these pages (repeatable)")
+    parser.add_argument("--delayed-ack", action="store_true", help="keep the OS's delayed ACKs on the client")
+    args = parser.parse_args()
+    pages = args.page or PAGES
+    quickack = not args.delayed_ack
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py") as floor_app:
+        floor_app.write(FLOOR_APP)
+        floor_app.flush()
+        floor = median(run(floor_app.name, True, measure_floor, args.iterations, quickack))
+    full, full_errors = run("streamlit_app.py", False, measure, pages, args.iterations, quickack)
+    scoped, scoped_errors = run("streamlit_app.py", True, measure, pages, args.iterations, quickack)
+
+    print(f"Streamlit {streamlit.__version__}, median of {args.iterations} interactions (ms), "
+          f"{'delayed' if args.delayed_ack else 'quick'} ACKs; one-slider app floor {floor:.1f} ms\n")
+    print(f"{'Page':<20} {'Widget changed':<30} {'full':>6} {'fragment':>9} {'speedup':>8}   "
+          f"{'sidebar full':>12} {'fragment':>9} {'speedup':>8}")
+    for page in pages:
+        before, after = full[page], scoped[page]
+        page_before, page_after = median(before["page"]), median(after["page"])
+        side_before, side_after = median(before["sidebar"]), median(after["sidebar"])
+        label = (after["widget"] or "-")[:28] + ("" if after["scoped"] or not after["widget"] else " *")
+        print(f"{page:<20} {label:<30} {page_before:>6.1f} {page_after:>9.1f} {page_before / page_after:>7.1f}x   "
+              f"{side_before:>12.1f} {side_after:>9.1f} {side_before / side_after:>7.1f}x")
+
+    all_before = median([ms for page in pages for key in ("page", "sidebar") for ms in full[page][key]])
+    all_after = median([ms for page in pages for key in ("page", "sidebar") for ms in scoped[page][key]])
+    print(f"\nAll interactions: median {all_before:.1f} ms -> {all_after:.1f} ms ({all_before / all_after:.1f}x); "
+          f"app time above the floor {all_before - floor:.1f} ms -> {max(all_after - floor, 0):.1f} ms")
+    print("* full rerun: the widget is not inside a fragment")
+    for errors in (full_errors, scoped_errors):
+        if errors:
+            print(f"App raised {len(errors)} exceptions, first: {errors[0][:200]}")
+
+
+if __name__ == "__main__":
+    main()
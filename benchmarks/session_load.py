@@ -0,0 +1,270 @@
+"""
+Concurrent-session load test for the Streamlit app
+
+Drives ``streamlit_app.py`` headlessly with Streamlit's AppTest: ``--sessions``
+simulated users share one process, as the sessions of one Streamlit worker
+do, and each repeats a weighted mix of actions (page switches, quick-test
+buttons, typed task breakdowns, event reminder scheduling) for
+``--duration`` seconds. Mandatory reminders stay on, so breakdowns go through
+the reminder gate. Reports reruns/s, rerun latency percentiles per action
+and RSS growth per session, and exits non-zero when a result crosses its
+threshold (see benchmarks/README.md).
+
+AppTest runs the script without the websocket or a browser, so latency here
+is script execution under contention; rerun_latency.py measures the round
+trip of a single session. Needs the pinned Streamlit (1.37): older AppTest
+polls for the end of a run every 100 ms and cannot follow ``st.rerun()``.
+
+Usage: python benchmarks/session_load.py [--sessions 8] [--duration 20] [--seed 1]
+                                         [--min-reruns-per-s N] [--max-p95-ms N]
+                                         [--max-rss-per-session-mb N]
+"""
+
+import argparse
+import contextlib
+import gc
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from unittest.mock import MagicMock
+
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.metrics import LatencyRegistry  # noqa: E402
+
+APP = os.path.join(ROOT, "streamlit_app.py")
+
+# Release gates for the default run (8 sessions, 20 s); see benchmarks/README.md
+THRESHOLDS = {
+    "min_reruns_per_s": 15.0,
+    "max_p95_ms": 1000.0,
+    "max_rss_per_session_mb": 6.0,
+}
+
+PAGES = ["Task Breakdown", "Focus Sessions", "Focus Techniques", "Gmail Integration", "Slack Integration",
+         "Reminder Scheduler", "About FocusCoach"]
+NAVIGATION = "Choose a page:"
+QUICK_TESTS = ["clean_room", "study_exam", "blog_post", "presentation", "job_interview", "quarterly_report",
+               "performance_review", "project_deadline", "difficult_conversation", "team_meeting",
+               "project_proposal", "customer_complaint", "business_plan", "budget_planning", "data_analysis"]
+TYPED_TASKS = ["write a blog post", "plan a presentation", "prepare quarterly report", "tidy the garage",
+               "apply for a new passport"]
+BREAK_DOWN = "🚀 Break Down This Task"
+
+
+def share_worker_state():
+    """Let concurrent AppTest sessions share process-wide state, as the sessions of a real worker do.
+
+    AppTest assumes one test at a time. Around each run it installs a fresh
+    mock runtime and then removes it, and it patches ``global.appTest`` into
+    the config and then unpatches it. Concurrent sessions undo each other's
+    setup mid-run. Each run also gets an empty ``st.cache_data`` and an empty
+    script cache, so it would re-parse and recompile the whole app (~90 ms),
+    where a server compiles it once. Set all of these up once instead.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+    # With a runtime present, every widget interaction from a session thread warns about a missing script context
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").setLevel(logging.ERROR)
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmRSS")) / 1024
+
+
+class Session:
+    """One simulated user: an AppTest plus the page it is on"""
+
+    def __init__(self, rng: random.Random, latency: LatencyRegistry, lock: threading.Lock):
+        self.rng = rng
+        self.latency = latency
+        self.lock = lock
+        self.at = AppTest.from_file(APP, default_timeout=120)
+        self.page = PAGES[0]
+        self.reruns = 0
+        self.errors = 0
+        self.breakdowns = 0
+        self.crash = None
+
+    def rerun(self, action: str):
+        started = time.perf_counter()
+        self.at.run()
+        ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latency.observe("rerun", ms)
+            self.latency.observe(action, ms)
+        self.reruns += 1
+        if self.at.exception:
+            self.errors += 1
+
+    def goto(self, page: str, action: str):
+        if page != self.page:
+            next(box for box in self.at.sidebar.selectbox if box.label == NAVIGATION).select(page)
+            self.rerun(action)
+            self.page = page
+
+    def button(self, key: str):
+        return next((button for button in self.at.button if button.key == key), None)
+
+    def pass_gate(self, action: str):
+        """Schedule the gate's default reminder if the breakdown is waiting on it"""
+        schedule = self.button("gate_schedule")
+        if schedule is not None:
+            schedule.click()
+            self.rerun(action)
+        if len(self.at.get("balloons")):
+            self.breakdowns += 1
+
+    # Actions
+
+    def switch_page(self):
+        self.goto(self.rng.choice([page for page in PAGES if page != self.page]), "page switch")
+
+    def quick_test(self):
+        self.goto("Task Breakdown", "quick test")
+        self.button(self.rng.choice(QUICK_TESTS)).click()
+        self.rerun("quick test")
+        self.pass_gate("quick test")
+
+    def typed_task(self):
+        self.goto("Task Breakdown", "typed task")
+        self.at.text_area(key="task_input").input(self.rng.choice(TYPED_TASKS))
+        next(button for button in self.at.button if button.label == BREAK_DOWN).click()
+        self.rerun("typed task")
+        self.pass_gate("typed task")
+
+    def event_reminder(self):
+        self.goto("Reminder Scheduler", "event reminder")
+        schedule = self.button("schedule_0")
+        if schedule is None:
+            return  # every calendar event already has reminders
+        self.at.checkbox(key="reminder_30_0").check()
+        schedule.click()
+        self.rerun("event reminder")
+
+
+# (action, weight)
+ACTIONS = [
+    (Session.switch_page, 4),
+    (Session.quick_test, 3),
+    (Session.typed_task, 2),
+    (Session.event_reminder, 1),
+]
+
+
+def run_session(session: Session, start: threading.Barrier, deadline_box: list):
+    start.wait()
+    actions, weights = zip(*ACTIONS)
+    try:
+        while time.perf_counter() < deadline_box[0]:
+            session.rng.choices(actions, weights)[0](session)
+    except Exception:
+        # A missing widget, an AppTest timeout or an AppTest internal error ends the session early
+        session.crash = traceback.format_exc()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--min-reruns-per-s", type=float, default=THRESHOLDS["min_reruns_per_s"])
+    parser.add_argument("--max-p95-ms", type=float, default=THRESHOLDS["max_p95_ms"])
+    parser.add_argument("--max-rss-per-session-mb", type=float, default=THRESHOLDS["max_rss_per_session_mb"])
+    args = parser.parse_args()
+
+    share_worker_state()
+    lock = threading.Lock()
+
+    # A throwaway session pays for lazy imports and process-wide caches first
+    warmup = Session(random.Random(0), LatencyRegistry(), lock)
+    warmup.rerun("warm-up")
+    for page in PAGES[1:] + PAGES[:1]:
+        warmup.goto(page, "warm-up")
+    for action, _ in ACTIONS:
+        action(warmup)
+    del warmup
+    gc.collect()
+    rss_before = rss_mb()
+
+    latency = LatencyRegistry()
+    sessions = [Session(random.Random(args.seed * 1000 + index), latency, lock) for index in range(args.sessions)]
+    for session in sessions:
+        session.rerun("first load")
+    gc.collect()
+    rss_loaded = rss_mb()
+
+    start = threading.Barrier(args.sessions + 1)
+    deadline_box = [0.0]
+    threads = [threading.Thread(target=run_session, args=(session, start, deadline_box), daemon=True)
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    deadline_box[0] = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    start.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    rss_after = rss_mb()
+    rss_growth = (rss_after - rss_before) / args.sessions
+
+    snapshot = latency.snapshot()
+    reruns = sum(session.reruns for session in sessions)
+    reruns_per_s = reruns / elapsed
+    rerun = snapshot["rerun"]
+    print(f"{args.sessions} sessions for {elapsed:.1f}s: {reruns:,} reruns, "
+          f"{sum(session.breakdowns for session in sessions):,} breakdowns shown, "
+          f"{sum(session.errors for session in sessions)} runs with exceptions")
+    crashed = [session for session in sessions if session.crash]
+    if crashed:
+        print(f"{len(crashed)} session(s) ended early; first:\n{crashed[0].crash.rstrip()}")
+    print(f"Throughput:  {reruns_per_s:,.1f} reruns/s")
+    print(f"\n{'Rerun latency':<16} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>9}")
+    for name, histogram in sorted(snapshot.items(), key=lambda item: item[0] != "rerun"):
+        print(f"{name:<16} {histogram['count']:>7} {histogram['p50_ms']:>8g} {histogram['p95_ms']:>8g} "
+              f"{histogram['p99_ms']:>8g} {histogram['max_ms']:>9.1f}")
+    print(f"\nRSS: {rss_before:,.0f} MB after warm-up, {rss_after:,.0f} MB at the end: {rss_growth:+.2f} MB per session "
+          f"({(rss_loaded - rss_before) / args.sessions:+.2f} MB to open it, "
+          f"{(rss_after - rss_loaded) / args.sessions:+.2f} MB during the load)")
+
+    failures = []
+    if reruns_per_s < args.min_reruns_per_s:
+        failures.append(f"throughput {reruns_per_s:,.1f} reruns/s below {args.min_reruns_per_s:g}")
+    if rerun["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 rerun latency {rerun['p95_ms']:g} ms above {args.max_p95_ms:g} ms")
+    if rss_growth > args.max_rss_per_session_mb:
+        failures.append(f"RSS growth {rss_growth:.2f} MB per session above {args.max_rss_per_session_mb:g} MB")
+    if any(session.errors for session in sessions):
+        failures.append("the app raised exceptions")
+    if crashed:
+        failures.append(f"{len(crashed)} session(s) ended early")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Email channel benchmark against a local SMTP sink
+
+Renders ``--messages`` reminder emails from the precompiled template, then
+sends them to ``focuscoach.fake_smtp_server`` (replying after ``--latency``
+seconds to simulate the relay round trip) three ways: one connection per
+message like ``smtplib.SMTP(...).send_message`` in a loop, one lockstep
+connection (both on a ``--sample``), and pooled pipelined connections.
+Reports messages/min against the 10k/min target, connections opened and the
+sink's message count.
+
+Usage: python benchmarks/smtp_channel.py [--messages 5000] [--latency 0.005] [--pool-sizes 1,4,8] [--sample 500]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from focuscoach.email_channel import REMINDER_EMAIL, SMTPPool, reminder_email_fields  # noqa: E402
+from focuscoach.fake_smtp_server import FakeSMTPServer  # noqa: E402
+
+TARGET_PER_MINUTE = 10_000
+SENDER = "reminders@focuscoach.local"
+
+
+def render(count):
+    start = datetime.now().replace(second=0, microsecond=0)
+    envelopes = []
+    for index in range(count):
+        event = {"title": f"Focus block {index}", "start_time": start + timedelta(minutes=index % 600),
+                 "priority": ("low", "medium", "high")[index % 3]}
+        recipient = f"user{index}@example.com"
+        data = REMINDER_EMAIL.render(recipient, reminder_email_fields(event, "Starting in 15 minutes"),
+                                     f"<bench-{index}@focuscoach>")
+        envelopes.append((SENDER, [recipient], data))
+    return envelopes
+
+
+async def send_each(server, envelopes):
+    # A fresh connection per message, the way a naive smtplib loop sends
+    opened = 0
+    for envelope in envelopes:
+        pool = SMTPPool(*server.address, size=1, pipelining=False)
+        await pool.send_many([envelope])
+        await pool.aclose()
+        opened += pool.opened
+    return opened, 0
+
+
+async def run_case(label, envelopes, latency, send):
+    server = await FakeSMTPServer(latency=latency).start()
+    started = time.perf_counter()
+    opened, errors = await send(server, envelopes)
+    elapsed = time.perf_counter() - started
+    await server.stop()
+    per_minute = len(envelopes) / elapsed * 60
+    verdict = "OK" if per_minute >= TARGET_PER_MINUTE else "below target"
+    print(f"  {label:<24} {per_minute:>10,.0f}/min  {elapsed:6.2f}s  connections={opened:<5} "
+          f"accepted={server.messages:<6} errors={errors}  {verdict}")
+    return per_minute
+
+
+async def main(args):
+    started = time.perf_counter()
+    envelopes = render(args.messages)
+    elapsed = time.perf_counter() - started
+    size = sum(len(data) for _, _, data in envelopes) / len(envelopes)
+    print(f"Rendered {len(envelopes):,} messages in {elapsed:.2f}s "
+          f"({len(envelopes) / elapsed:,.0f}/s, {size:,.0f} bytes each)")
+    print(f"Sending with {args.latency * 1000:.1f} ms simulated round trip (target {TARGET_PER_MINUTE:,}/min):")
+
+    # The unpipelined baselines are far slower; a sample is enough to estimate their rate
+    sample = envelopes[:min(len(envelopes), args.sample)]
+    await run_case(f"per-message connect ({len(sample)})", sample, args.latency, send_each)
+
+    def pooled(size, pipelining):
+        async def send(server, batch):
+            pool = SMTPPool(*server.address, size=size, pipelining=pipelining)
+            errors = 0
+            for start in range(0, len(batch), args.batch):
+                results = await pool.send_many(batch[start:start + args.batch])
+                errors += sum(error is not None for error in results)
+            await pool.aclose()
+            return pool.opened, errors
+        return send
+
+    await run_case(f"lockstep, 1 conn ({len(sample)})", sample, args.latency, pooled(1, False))
+    for size in args.pool_sizes:
+        await run_case(f"pipelined, {size} connection{'s' if size > 1 else ''}", envelopes, args.latency,
+                       pooled(size, True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.005, help="sink reply delay in seconds")
+    parser.add_argument("--pool-sizes", type=lambda text: [int(size) for size in text.split(",")], default=[1, 4, 8])
+    parser.add_argument("--batch", type=int, default=500, help="messages per send_many call (outbox batch)")
+    parser.add_argument("--sample", type=int, default=500, help="messages sent by the unpipelined baselines")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+Cold-start import budget for FocusCoach workers
+
+Runs each worker's entry import in a fresh interpreter with ``-X importtime``,
+attributes the cost to the modules the entry point pulls in directly and checks
+it against the worker's budget (see benchmarks/README.md). Exits non-zero if
+any worker is over budget.
+
+For the Streamlit app, the Streamlit package itself and the app module's own
+body are excluded: the first is a fixed cost of the runtime, the second is
+dominated by Streamlit's bare-mode warning when imported outside
+``streamlit run``.
+
+Usage: python benchmarks/startup_importtime.py [--runs 5] [--top 8] [--worker NAME]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# worker -> (entry module, excluded modules, budget in ms). Workers with excluded
+# modules are measured per direct import, leaving out the entry module's own body.
+WORKERS = {
+    "streamlit-ui": ("streamlit_app", {"streamlit"}, 30.0),
+    "headless-core": ("focuscoach", set(), 15.0),
+    "llm-provider": ("focuscoach.providers", set(), 100.0),
+    "api-server": ("focuscoach.api_server", set(), 120.0),
+    "bulk-cli": ("focuscoach.bulk", set(), 60.0),
+}
+
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, List[str]]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, children)"""
+    nodes = []
+    # importtime prints children before their parent, so collect them per depth
+    pending: Dict[int, List[str]] = {}
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        children = pending.pop(depth + 1, [])
+        nodes.append((name, int(self_us), int(cumulative_us), children))
+        pending.setdefault(depth, []).append(name)
+    return nodes
+
+
+def attribute(entry: str, excluded: set, stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per direct import of ``entry`` (or entry itself)"""
+    nodes = {name: (self_us, cumulative_us, children)
+             for name, self_us, cumulative_us, children in parse_importtime(stderr)}
+    if entry not in nodes:
+        raise RuntimeError(f"{entry} was not imported")
+    _, cumulative_us, children = nodes[entry]
+    if excluded:
+        return {child: nodes[child][1] for child in children if child not in excluded}
+    return {entry: cumulative_us}
+
+
+def measure(worker: str, runs: int) -> Dict[str, float]:
+    """Median milliseconds per attributed module over ``runs`` fresh interpreters"""
+    entry, excluded, _ = WORKERS[worker]
+    samples: Dict[str, List[float]] = {}
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+            cwd=ROOT, capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        for name, micros in attribute(entry, excluded, result.stderr).items():
+            samples.setdefault(name, []).append(micros / 1000)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list per worker")
+    parser.add_argument("--worker", choices=sorted(WORKERS), action="append")
+    args = parser.parse_args()
+
+    over_budget = []
+    for worker in args.worker or WORKERS:
+        budget = WORKERS[worker][2]
+        costs = measure(worker, args.runs)
+        total = sum(costs.values())
+        status = "ok" if total <= budget else "OVER BUDGET"
+        print(f"{worker:<14} {total:7.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for name, ms in sorted(costs.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {ms:7.1f} ms  {name}")
+        if total > budget:
+            over_budget.append(worker)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+FocusCoach Core
+UI-free task breakdown, deadline and reminder logic shared by the Streamlit app,
+batch jobs and reminder workers.
+
+Importing this package pulls in only the standard library. Network-facing
+pieces (``focuscoach.providers``) are imported explicitly by the callers that
+need them, and integration helpers (Slack) are loaded on first attribute access.
+"""
+
+import importlib
+
+from focuscoach.breakdown import (BREAKDOWN_TEMPLATES, demo_task_breakdown, match_template,
+                                  personalize_task_breakdown)
+from focuscoach.calendar import create_encouraging_reminder, get_calendar_events
+from focuscoach.deadlines import analyze_deadlines_for_task, get_gmail_deadlines
+from focuscoach.reminders import (ReminderBook, get_upcoming_calendar_events_with_reminders,
+                                  schedule_mandatory_reminder, validate_reminder_schedule)
+
+# Integration exports resolved lazily so importing the core stays cheap
+_LAZY_EXPORTS = {
+    "send_calendar_reminder_to_slack": "focuscoach.slack",
+    "send_to_slack": "focuscoach.slack",
+}
+
+__all__ = [
+    "BREAKDOWN_TEMPLATES",
+    "ReminderBook",
+    "analyze_deadlines_for_task",
+    "create_encouraging_reminder",
+    "demo_task_breakdown",
+    "get_calendar_events",
+    "get_gmail_deadlines",
+    "get_upcoming_calendar_events_with_reminders",
+    "match_template",
+    "personalize_task_breakdown",
+    "schedule_mandatory_reminder",
+    "send_calendar_reminder_to_slack",
+    "send_to_slack",
+    "validate_reminder_schedule",
+]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
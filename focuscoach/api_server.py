@@ -0,0 +1,392 @@
+"""
+FocusCoach API Server
+Headless asyncio JSON API for task breakdowns, focus plans and Pomodoro timers,
+so the mobile client and Slack bot share the same core as the Streamlit app.
+
+    POST   /v1/breakdown          {"task", "user_context", "gmail_address"} or {"tasks": [...]}
+    POST   /v1/plan               {"task", "profile"} or {"tasks": [...]}
+    POST   /v1/timers             {"work_duration", "break_duration", "long_break_duration"}
+    GET    /v1/timers/<id>
+    POST   /v1/timers/<id>/work   (also /break and /complete)
+    DELETE /v1/timers/<id>
+    GET    /metrics               per-endpoint latency histograms and counters
+    GET    /healthz
+
+Connections are kept alive (HTTP/1.1), responses are gzipped for clients that
+accept it, and breakdown responses are cached as ready-to-send bytes when
+the server runs on the template engine alone.
+
+Usage: python -m focuscoach.api_server [--host 127.0.0.1] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from focus_techniques import FocusTechniqueManager, PomodoroTimer
+from focuscoach.metrics import LatencyRegistry
+from focuscoach.providers import BreakdownProvider, TemplateBreakdownProvider, create_default_provider
+
+# Bodies smaller than this are not worth the gzip CPU and header bytes
+GZIP_MIN_BYTES = 512
+
+# Profile fields the plan builder reads, and what each must be
+PROFILE_FIELDS = {"task_type": (str, "a string"), "mood": (str, "a string"),
+                  "preferences": (dict, "an object"), "challenges": (list, "a list of strings"),
+                  "sensory_needs": (list, "a list of strings")}
+
+
+class HTTPError(Exception):
+    """Raised by handlers to send a JSON error response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResponseCache:
+    """Size-bounded LRU of encoded response bodies keyed by (path, request body)"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], Dict[bool, bytes]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[Dict[bool, bytes]]:
+        encodings = self._entries.get(key)
+        if encodings is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return encodings
+
+    def put(self, key: Tuple[str, bytes], encodings: Dict[bool, bytes]):
+        self._entries[key] = encodings
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _batch_items(payload: Dict[str, Any], max_batch: int) -> Tuple[List[Any], bool]:
+    """Return (items, is_batch) for a request that holds one task or a ``tasks`` list"""
+    if "tasks" not in payload:
+        return [payload], False
+    items = payload["tasks"]
+    if not isinstance(items, list) or not items:
+        raise HTTPError(400, "'tasks' must be a non-empty list")
+    if len(items) > max_batch:
+        raise HTTPError(413, f"batches are limited to {max_batch} tasks")
+    return items, True
+
+
+def _task_text(item: Any) -> str:
+    task = item if isinstance(item, str) else item.get("task") if isinstance(item, dict) else None
+    if not isinstance(task, str) or not task.strip():
+        raise HTTPError(400, "each request needs a non-empty 'task'")
+    return task.strip()
+
+
+def _profile(item: Any) -> Dict[str, Any]:
+    profile = item.get("profile", {}) if isinstance(item, dict) else {}
+    if not isinstance(profile, dict):
+        raise HTTPError(400, "'profile' must be an object")
+    for field, (kind, description) in PROFILE_FIELDS.items():
+        if field not in profile:
+            continue
+        value = profile[field]
+        if not isinstance(value, kind) or (kind is list and not all(isinstance(entry, str) for entry in value)):
+            raise HTTPError(400, f"'profile.{field}' must be {description}")
+    return profile
+
+
+class FocusCoachAPI:
+    """Routes JSON requests to the breakdown provider, plan builder and timer store"""
+
+    def __init__(self, provider: Optional[BreakdownProvider] = None, max_batch: int = 100,
+                 max_timers: int = 10000, cache_entries: int = 4096):
+        self.provider = provider or create_default_provider()
+        self.manager = FocusTechniqueManager()
+        self.max_batch = max_batch
+        self.max_timers = max_timers
+        self.timers: "OrderedDict[str, PomodoroTimer]" = OrderedDict()
+        self.response_cache = ResponseCache(cache_entries)
+        self.latency = LatencyRegistry()
+        self.requests = 0
+        self.errors = 0
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any, str, bool]:
+        """Dispatch one request; returns (status, payload, endpoint name, cacheable)"""
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+
+        if parts == ["healthz"] and method == "GET":
+            return 200, {"status": "ok"}, "healthz", False
+        if parts == ["metrics"] and method == "GET":
+            return 200, self.metrics(), "metrics", False
+        if parts[:1] != ["v1"] or len(parts) < 2:
+            raise HTTPError(404, f"no route for {path}")
+
+        resource = parts[1]
+        if resource in ("breakdown", "plan") and len(parts) == 2:
+            if method != "POST":
+                raise HTTPError(405, f"use POST for /v1/{resource}")
+            payload = self._json(body)
+            if resource == "breakdown":
+                status, result, cacheable = await self.breakdown(payload)
+                return status, result, "breakdown", cacheable
+            return 200, self.plan(payload), "plan", False
+        if resource == "timers":
+            return self.timer(method, parts[2:], body) + ("timers", False)
+        raise HTTPError(404, f"no route for {path}")
+
+    @staticmethod
+    def _json(body: bytes) -> Dict[str, Any]:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "request body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "request body must be a JSON object")
+        return payload
+
+    async def breakdown(self, payload: Dict[str, Any]) -> Tuple[int, Any, bool]:
+        items, is_batch = _batch_items(payload, self.max_batch)
+        requests = []
+        for item in items:
+            options = item if isinstance(item, dict) else {}
+            requests.append((_task_text(item), options.get("user_context", ""), options.get("gmail_address")))
+
+        # Batched tasks run concurrently so LLM-backed providers overlap their calls
+        results = await asyncio.gather(*(self.provider.abreakdown(*request) for request in requests))
+        # Only a template-only provider is deterministic; behind an LLM, "template" means a one-off fallback
+        cacheable = isinstance(self.provider, TemplateBreakdownProvider)
+        return 200, {"results": results} if is_batch else results[0], cacheable
+
+    def plan(self, payload: Dict[str, Any]) -> Any:
+        items, is_batch = _batch_items(payload, self.max_batch)
+        # Every item is checked before any plan is built, so a bad one fails the request with a 400
+        requests = [(_task_text(item), _profile(item)) for item in items]
+        results = [self.manager.create_personalized_plan(task, profile) for task, profile in requests]
+        return {"results": results} if is_batch else results[0]
+
+    def timer(self, method: str, parts: List[str], body: bytes) -> Tuple[int, Any]:
+        if not parts:
+            if method != "POST":
+                raise HTTPError(405, "use POST /v1/timers to create a timer")
+            settings = self._json(body)
+            try:
+                timer = PomodoroTimer(**{name: int(settings[name]) for name in
+                                         ("work_duration", "break_duration", "long_break_duration")
+                                         if name in settings})
+            except (TypeError, ValueError):
+                raise HTTPError(400, "timer durations must be whole minutes")
+            timer_id = uuid.uuid4().hex
+            self.timers[timer_id] = timer
+            while len(self.timers) > self.max_timers:
+                self.timers.popitem(last=False)
+            return 201, self._timer_state(timer_id, timer)
+
+        timer_id = parts[0]
+        timer = self.timers.get(timer_id)
+        if timer is None:
+            raise HTTPError(404, f"unknown timer {timer_id}")
+
+        if len(parts) == 1 and method == "GET":
+            return 200, self._timer_state(timer_id, timer)
+        if len(parts) == 1 and method == "DELETE":
+            del self.timers[timer_id]
+            return 200, {"id": timer_id, "deleted": True}
+
+        actions = {
+            "work": timer.start_work_session,
+            "break": timer.start_break_session,
+            "complete": timer.complete_session,
+        }
+        if len(parts) == 2 and parts[1] in actions:
+            if method != "POST":
+                raise HTTPError(405, f"use POST for /v1/timers/<id>/{parts[1]}")
+            actions[parts[1]]()
+            self.timers.move_to_end(timer_id)
+            return 200, self._timer_state(timer_id, timer)
+        raise HTTPError(404, "unknown timer action")
+
+    @staticmethod
+    def _timer_state(timer_id: str, timer: PomodoroTimer) -> Dict[str, Any]:
+        state = timer.get_session_status()
+        state.update(id=timer_id, session_count=timer.session_count)
+        return state
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "active_timers": len(self.timers),
+            "response_cache": {
+                "entries": len(self.response_cache),
+                "hits": self.response_cache.hits,
+                "misses": self.response_cache.misses,
+            },
+            "latency": self.latency.snapshot(),
+        }
+
+    async def respond(self, method: str, path: str, body: bytes, accepts_gzip: bool) -> Tuple[int, bytes, bool]:
+        """Handle a request end to end; returns (status, response body, gzipped)"""
+        started = time.perf_counter()
+        self.requests += 1
+        cache_key = (path, body) if method == "POST" and path == "/v1/breakdown" else None
+
+        encodings = self.response_cache.get(cache_key) if cache_key else None
+        if encodings is not None:
+            status = 200
+            endpoint = "breakdown"
+        else:
+            try:
+                status, payload, endpoint, cacheable = await self.handle(method, path, body)
+            except HTTPError as error:
+                status, payload, endpoint, cacheable = error.status, {"error": error.message}, "error", False
+            except Exception:
+                # The details go to the server log, not to the client
+                traceback.print_exc()
+                status, payload, endpoint, cacheable = 500, {"error": "internal error"}, "error", False
+            raw = _encode(payload)
+            encodings = {False: raw}
+            # Cached bodies keep both encodings; one-off responses only compress on demand
+            if len(raw) >= GZIP_MIN_BYTES and (accepts_gzip or (cacheable and cache_key)):
+                encodings[True] = gzip.compress(raw, compresslevel=5)
+            if cacheable and cache_key:
+                self.response_cache.put(cache_key, encodings)
+
+        if status >= 400:
+            self.errors += 1
+        gzipped = accepts_gzip and True in encodings
+        self.latency.observe(endpoint, (time.perf_counter() - started) * 1000)
+        return status, encodings[gzipped], gzipped
+
+
+class APIServer:
+    """Keep-alive HTTP/1.1 front end for ``FocusCoachAPI`` on asyncio streams"""
+
+    def __init__(self, api: Optional[FocusCoachAPI] = None, host: str = "127.0.0.1", port: int = 8080,
+                 max_body: int = 1 << 20, idle_timeout: float = 30.0):
+        self.api = api or FocusCoachAPI()
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        await self.api.provider.aclose()
+
+    async def serve_forever(self):
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = lines[0].split(" ")
+                except ValueError:
+                    self._write(writer, 400, _encode({"error": "malformed request line"}), False, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length", "0") or "0"
+                if not length.isdecimal():
+                    self._write(writer, 400, _encode({"error": "invalid Content-Length"}), False, False)
+                    break
+                length = int(length)
+                if length > self.max_body:
+                    self._write(writer, 413, _encode({"error": "request body too large"}), False, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+                status, payload, gzipped = await self.api.respond(
+                    method, path, body, "gzip" in headers.get("accept-encoding", "")
+                )
+                self._write(writer, status, payload, gzipped, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.CancelledError):
+            # Clients going away, oversized headers and shutdown all just end the connection
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, body: bytes, gzipped: bool, keep_alive: bool):
+        encoding = "Content-Encoding: gzip\r\n" if gzipped else ""
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Vary: Accept-Encoding\r\n{encoding}"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusCoach headless JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    async def run():
+        server = await APIServer(FocusCoachAPI(max_batch=args.max_batch), args.host, args.port).start()
+        print(f"FocusCoach API listening on {server.url}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
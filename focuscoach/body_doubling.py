@@ -0,0 +1,415 @@
+"""
+Body-Doubling Rooms
+Websocket rooms for working alongside other people: everyone in a room
+shares one ``FocusSession`` timer and sees who is there and whether they are
+focusing, on a break or away.
+
+    ws://host:port/rooms/<room>?user=<id>&name=<display name>
+
+    client -> server  {"op": "status", "status": "focusing", "task": "Inbox zero"}
+                      {"op": "heartbeat"}           (a websocket ping works too)
+                      {"op": "timer", "action": "start", "duration": 25, "break_duration": 5}
+                      {"op": "timer", "action": "stop"}
+    server -> client  {"op": "hello", "user", "now"}
+                      {"op": "snapshot", "room", "seq", "members": {id: presence}, "timer"}
+                      {"op": "delta", "seq", "now", "left": [ids], "joined": {id: presence},
+                       "changed": {id: {field: value}}, "timer"}   (keys only when present)
+
+    GET /rooms, /rooms/<room> and /metrics answer with JSON over plain HTTP.
+
+Presence changes are collected per room and flushed every ``tick`` as one
+delta holding only what changed (apply ``left``, then ``joined``, then
+``changed``); the frame is encoded once and the same bytes are written to
+every member. Heartbeats only refresh ``last_seen`` unless they bring someone
+back from idle. A member whose socket stops draining is skipped, then
+resynced with a snapshot once it catches up, so a slow client never holds a
+room back. The timer goes out as start/end timestamps and clients count down
+locally, so it costs nothing per second.
+
+Usage: python -m focuscoach.body_doubling [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from focus_techniques import FocusSession, FocusTechnique
+from focuscoach.metrics import LatencyRegistry
+from focuscoach.websocket import (OP_TEXT, WebSocketError, close_frame, encode_frame, handshake_response,
+                                  read_message)
+
+STATUSES = ("focusing", "break", "away", "done")
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class Member:
+    __slots__ = ("user_id", "name", "status", "task", "idle", "last_seen", "transport", "stale")
+
+    def __init__(self, user_id: str, name: str, transport: asyncio.Transport, now: float):
+        self.user_id = user_id
+        self.name = name
+        self.status = "focusing"
+        self.task = ""
+        self.idle = False
+        self.last_seen = now
+        self.transport = transport
+        self.stale = False
+
+    def presence(self) -> Dict[str, Any]:
+        return {"name": self.name, "status": self.status, "task": self.task, "idle": self.idle}
+
+
+class Room:
+    """Members, the shared timer and the changes not yet broadcast"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.members: Dict[str, Member] = {}
+        self.session: Optional[FocusSession] = None
+        self.seq = 0
+        self._joined: Set[str] = set()
+        self._left: Set[str] = set()
+        self._changed: Dict[str, Dict[str, Any]] = {}
+        self._timer_changed = False
+        self._snapshot: Optional[bytes] = None
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._joined or self._left or self._changed or self._timer_changed)
+
+    def join(self, member: Member):
+        self.members[member.user_id] = member
+        self._left.discard(member.user_id)
+        self._changed.pop(member.user_id, None)
+        self._joined.add(member.user_id)
+
+    def leave(self, user_id: str):
+        del self.members[user_id]
+        self._joined.discard(user_id)
+        self._changed.pop(user_id, None)
+        # Sent even if the join was never flushed: a snapshot taken since may already list them
+        self._left.add(user_id)
+
+    def change(self, member: Member, **fields):
+        changed = {name: value for name, value in fields.items() if getattr(member, name) != value}
+        if not changed:
+            return
+        for name, value in changed.items():
+            setattr(member, name, value)
+        if member.user_id not in self._joined:
+            self._changed.setdefault(member.user_id, {}).update(changed)
+
+    def start_timer(self, duration: int, break_duration: int):
+        self.session = FocusSession(FocusTechnique.BODY_DOUBLING, duration, break_duration)
+        self.session.start()
+        self._timer_changed = True
+
+    def stop_timer(self):
+        self.session = None
+        self._timer_changed = True
+
+    def timer(self) -> Optional[Dict[str, Any]]:
+        if self.session is None:
+            return None
+        ends_at = self.session.end_time.timestamp()
+        return {"technique": self.session.technique.value, "duration": self.session.duration,
+                "break_duration": self.session.break_duration, "started_at": self.session.start_time.timestamp(),
+                "ends_at": ends_at, "break_ends_at": ends_at + self.session.break_duration * 60}
+
+    def snapshot(self) -> bytes:
+        """Snapshot frame, encoded at most once per flush.
+
+        It can already include changes the next delta repeats; applying a
+        delta is idempotent, so a member joining mid-tick still converges.
+        """
+        if self._snapshot is None:
+            self._snapshot = encode_frame(_encode({
+                "op": "snapshot", "room": self.name, "seq": self.seq, "timer": self.timer(),
+                "members": {user_id: member.presence() for user_id, member in self.members.items()}}))
+        return self._snapshot
+
+    def flush(self, now: float) -> bytes:
+        """The pending changes as one delta frame"""
+        self.seq += 1
+        delta: Dict[str, Any] = {"op": "delta", "seq": self.seq, "now": now}
+        if self._left:
+            delta["left"] = sorted(self._left)
+        if self._joined:
+            delta["joined"] = {user_id: self.members[user_id].presence() for user_id in self._joined}
+        if self._changed:
+            delta["changed"] = self._changed
+        if self._timer_changed:
+            delta["timer"] = self.timer()
+        self._joined, self._left, self._changed, self._timer_changed = set(), set(), {}, False
+        self._snapshot = None
+        return encode_frame(_encode(delta))
+
+    def summary(self) -> Dict[str, Any]:
+        return {"room": self.name, "participants": len(self.members), "timer": self.timer(),
+                "focusing": sum(member.status == "focusing" for member in self.members.values())}
+
+
+class RoomServer:
+    """Websocket body-doubling rooms with per-room batched presence broadcasts"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, tick: float = 0.25, idle_after: float = 60.0,
+                 evict_after: float = 180.0, max_message: int = 4096, max_room_size: int = 2000,
+                 write_buffer_limit: int = 256 * 1024):
+        self.host = host
+        self.port = port
+        self.tick = tick
+        self.idle_after = idle_after
+        self.evict_after = evict_after
+        self.max_message = max_message
+        self.max_room_size = max_room_size
+        self.write_buffer_limit = write_buffer_limit
+        self.rooms: Dict[str, Room] = {}
+        self.latency = LatencyRegistry()
+        self.connections = 0
+        self.peak_connections = 0
+        self.messages_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.deltas = 0
+        self.resyncs = 0
+        self.skipped = 0
+        self._dirty: Set[str] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> "RoomServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self._tasks = [asyncio.create_task(self._broadcast_loop()), asyncio.create_task(self._sweep_loop())]
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._server.close()
+        for room in self.rooms.values():
+            for member in room.members.values():
+                member.transport.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # Fan-out
+
+    def _send(self, member: Member, frame: bytes, room: Room):
+        transport = member.transport
+        if transport.is_closing():
+            return
+        buffered = transport.get_write_buffer_size()
+        if member.stale:
+            if buffered > self.write_buffer_limit // 4:
+                self.skipped += 1
+                return
+            # Caught up: the snapshot covers every delta it skipped
+            member.stale = False
+            self.resyncs += 1
+            frame = room.snapshot()
+        elif buffered > self.write_buffer_limit:
+            member.stale = True
+            self.skipped += 1
+            return
+        transport.write(frame)
+        self.frames_out += 1
+        self.bytes_out += len(frame)
+
+    def flush(self):
+        """Broadcast every room's pending changes (the broadcast loop calls this each tick)"""
+        started = time.perf_counter()
+        now = time.time()
+        dirty, self._dirty = self._dirty, set()
+        for name in dirty:
+            room = self.rooms.get(name)
+            if room is None or not room.dirty:
+                continue
+            frame = room.flush(now)
+            self.deltas += 1
+            for member in room.members.values():
+                self._send(member, frame, room)
+            if not room.members:
+                del self.rooms[name]
+        if dirty:
+            self.latency.observe("flush", (time.perf_counter() - started) * 1000)
+
+    async def _broadcast_loop(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.flush()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(min(self.idle_after, self.evict_after) / 4)
+            now = time.monotonic()
+            for room in list(self.rooms.values()):
+                for member in list(room.members.values()):
+                    if now - member.last_seen > self.evict_after:
+                        member.transport.close()
+                    elif not member.idle and now - member.last_seen > self.idle_after:
+                        room.change(member, idle=True)
+                        self._dirty.add(room.name)
+
+    # Connections
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            parts = [unquote(part) for part in url.path.split("/") if part]
+            if method != "GET":
+                return self._http(writer, 405, {"error": "use GET"})
+            if headers.get("upgrade", "").lower() != "websocket":
+                return self._http(writer, *self._resource(parts))
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            if len(parts) != 2 or parts[0] != "rooms" or not query.get("user"):
+                return self._http(writer, 404, {"error": "connect to /rooms/<room>?user=<id>"})
+            room = self.rooms.get(parts[1])
+            if room is not None and len(room.members) >= self.max_room_size and query["user"] not in room.members:
+                return self._http(writer, 503, {"error": "room is full"})
+            writer.write(handshake_response(headers))
+            await self._session(reader, writer, parts[1], query["user"][:64],
+                                query.get("name", query["user"])[:60])
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError,
+                ValueError, asyncio.CancelledError):
+            pass
+        except WebSocketError as error:
+            if not writer.is_closing():
+                writer.write(close_frame(error.code))
+        finally:
+            writer.close()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, room_name: str,
+                       user_id: str, name: str):
+        started = time.perf_counter()
+        room = self.rooms.get(room_name)
+        if room is None:
+            room = self.rooms[room_name] = Room(room_name)
+        previous = room.members.get(user_id)
+        if previous is not None:
+            # A reconnect replaces the old socket
+            previous.transport.close()
+            room.leave(user_id)
+        member = Member(user_id, name, writer.transport, time.monotonic())
+        room.join(member)
+        self._dirty.add(room_name)
+        self.connections += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        writer.write(encode_frame(_encode({"op": "hello", "user": user_id, "now": time.time()})) + room.snapshot())
+        self.latency.observe("join", (time.perf_counter() - started) * 1000)
+        try:
+            while True:
+                message = await read_message(reader, writer, self.max_message)
+                if message is None:
+                    break
+                member.last_seen = time.monotonic()
+                if member.idle:
+                    room.change(member, idle=False)
+                    self._dirty.add(room_name)
+                if message[0] == OP_TEXT:
+                    self.messages_in += 1
+                    self._apply(room, member, message[1])
+        finally:
+            self.connections -= 1
+            if room.members.get(user_id) is member:
+                room.leave(user_id)
+                self._dirty.add(room_name)
+
+    def _apply(self, room: Room, member: Member, payload: bytes):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        op = message.get("op") if isinstance(message, dict) else None
+        if op == "status":
+            status = message.get("status", member.status)
+            task = message.get("task", member.task)
+            if status in STATUSES and isinstance(task, str):
+                room.change(member, status=status, task=task[:200])
+        elif op == "timer":
+            if message.get("action") == "start":
+                try:
+                    duration = min(max(int(message.get("duration", 25)), 1), 240)
+                    break_duration = min(max(int(message.get("break_duration", 5)), 0), 60)
+                except (TypeError, ValueError, OverflowError):  # 1e999 parses as inf
+                    return
+                room.start_timer(duration, break_duration)
+            elif message.get("action") == "stop":
+                room.stop_timer()
+        # "heartbeat" only refreshes last_seen
+        if room.dirty:
+            self._dirty.add(room.name)
+
+    # Plain HTTP
+
+    def _resource(self, parts: List[str]):
+        if parts == ["metrics"]:
+            return 200, self.metrics()
+        if parts == ["rooms"]:
+            return 200, {"rooms": sorted((room.summary() for room in self.rooms.values()),
+                                         key=lambda summary: -summary["participants"])}
+        if len(parts) == 2 and parts[0] == "rooms":
+            room = self.rooms.get(parts[1])
+            if room is None:
+                return 404, {"error": f"no one is in {parts[1]}"}
+            return 200, dict(room.summary(), members={user_id: member.presence()
+                                                      for user_id, member in room.members.items()})
+        return 404, {"error": "not found"}
+
+    @staticmethod
+    def _http(writer: asyncio.StreamWriter, status: int, payload: Any):
+        body = _encode(payload)
+        writer.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"connections": self.connections, "peak_connections": self.peak_connections,
+                "rooms": len(self.rooms), "messages_in": self.messages_in, "deltas": self.deltas,
+                "frames_out": self.frames_out, "bytes_out": self.bytes_out, "resyncs": self.resyncs,
+                "skipped": self.skipped, "latency": self.latency.snapshot()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusCoach body-doubling rooms")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tick", type=float, default=0.25, help="seconds between presence broadcasts")
+    args = parser.parse_args()
+
+    async def run():
+        server = await RoomServer(args.host, args.port, tick=args.tick).start()
+        host, port = server.address
+        print(f"Body-doubling rooms on ws://{host}:{port}/rooms/<room>?user=<id>", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Task Breakdown Core
+Template-based task breakdowns and deadline personalisation, free of any UI code
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from focuscoach.deadlines import analyze_deadlines_for_task, get_gmail_deadlines
+
+# Pre-defined breakdowns for common tasks
+BREAKDOWN_TEMPLATES = {
+    "prepare quarterly report": {
+        "steps": [
+            {"description": "Create the Cover Page with company details", "estimated_time": "10", "tips": "Add company name, ticker symbol, CIK, quarter/year, filing date, and SEC file number"},
+            {"description": "Set up Part I - Financial Information section", "estimated_time": "5", "tips": "Create headers for Item 1 (Financial Statements) and Item 2 (MD&A)"},
+            {"description": "Add Condensed Consolidated Balance Sheets", "estimated_time": "30", "tips": "Include assets, liabilities, and shareholders' equity for current quarter and prior year-end"},
+            {"description": "Create Income Statement (Operations)", "estimated_time": "25", "tips": "Show revenue, expenses, net income/loss for current quarter and YTD vs. prior year"},
+            {"description": "Add Comprehensive Income Statement", "estimated_time": "20", "tips": "Include net income plus other comprehensive income (foreign currency, unrealized gains/losses)"},
+            {"description": "Create Cash Flow Statement", "estimated_time": "25", "tips": "Show cash from operating, investing, and financing activities (current quarter and YTD vs. prior year)"},
+            {"description": "Add Shareholders' Equity Statement", "estimated_time": "20", "tips": "Document changes in stock, retained earnings, treasury stock, etc."},
+            {"description": "Write Notes to Financial Statements", "estimated_time": "45", "tips": "Include critical accounting policies, segment info, debt, legal proceedings, risks, subsequent events"},
+            {"description": "Write Management's Discussion & Analysis (MD&A)", "estimated_time": "60", "tips": "Explain results of operations, liquidity, trends, risks, uncertainties, and critical accounting estimates"},
+            {"description": "Add Market Risk Disclosures (Item 3)", "estimated_time": "20", "tips": "Document exposure to interest rate, foreign currency, commodity price, or equity price risks"},
+            {"description": "Complete Controls and Procedures (Item 4)", "estimated_time": "15", "tips": "Evaluate disclosure controls and internal controls, get CEO and CFO signatures"},
+            {"description": "Add Part II - Other Information", "estimated_time": "30", "tips": "Include legal proceedings, risk factors, unregistered sales, defaults, other material events"},
+            {"description": "Create Exhibits section", "estimated_time": "20", "tips": "List certifications, press releases, material contracts, XBRL data files"},
+            {"description": "Add required signatures", "estimated_time": "5", "tips": "Get signatures from principal executive and financial officers"},
+            {"description": "Final review and compliance check", "estimated_time": "30", "tips": "Ensure GAAP compliance, check filing deadlines (40-45 days after quarter-end), review for completeness"}
+        ],
+        "focus_techniques": ["Time blocking for each financial statement", "Pomodoro technique (25 min work, 5 min break)", "Body doubling with accounting team", "Use focus app like Forest", "Break into morning/afternoon sessions"],
+        "accommodations": ["Use noise-cancelling headphones", "Set up a comfortable workspace with dual monitors", "Take sensory breaks when needed", "Ask for help from accounting team", "Use templates and checklists", "Have backup data sources ready"],
+        "sensory_tips": ["Use natural lighting if possible", "Try instrumental music for focus", "Have fidget tools nearby", "Take movement breaks every hour", "Use comfortable ergonomic setup", "Keep water and healthy snacks nearby"],
+        "encouragement": "Quarterly reports are complex but you've got this! Take it one financial statement at a time. Remember, progress not perfection - every section completed is a win!"
+    },
+    "clean my room": {
+        "steps": [
+            {"description": "Start by making your bed", "estimated_time": "3", "tips": "This gives you an instant sense of accomplishment!"},
+            {"description": "Pick up and put away 5 items", "estimated_time": "10", "tips": "Start small - even 5 items is progress"},
+            {"description": "Sort clothes into clean/dirty piles", "estimated_time": "15", "tips": "Use a timer and take breaks"},
+            {"description": "Put dirty clothes in hamper, hang clean ones", "estimated_time": "10", "tips": "Don't worry about folding perfectly - just get them off the floor"},
+            {"description": "Organize one surface (desk, dresser, etc.)", "estimated_time": "20", "tips": "Focus on one area at a time"},
+            {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Hydrate and stretch"},
+            {"description": "Tackle one more area", "estimated_time": "15", "tips": "Celebrate what you've accomplished so far"},
+            {"description": "Do a final sweep - put away any remaining items", "estimated_time": "10", "tips": "You're almost done! Just a few more items to go"}
+        ],
+        "focus_techniques": ["Chunking technique", "Body doubling with a friend", "Use a timer for each step"],
+        "accommodations": ["Play music you enjoy", "Use a comfortable outfit", "Take breaks when needed", "Ask for help if you get overwhelmed"],
+        "sensory_tips": ["Open windows for fresh air", "Use gloves if textures bother you", "Take movement breaks", "Use a comfortable pace"],
+        "encouragement": "Every small step makes a difference! You're doing great!"
+    },
+    "study for exam": {
+        "steps": [
+            {"description": "Gather all your study materials (books, notes, laptop)", "estimated_time": "5", "tips": "Set up your study space first - it helps your brain get ready"},
+            {"description": "Review the study guide or syllabus", "estimated_time": "15", "tips": "Don't try to memorize everything at once"},
+            {"description": "Create a study schedule for the week", "estimated_time": "10", "tips": "Break it into manageable chunks"},
+            {"description": "Start with the easiest topic first", "estimated_time": "20", "tips": "Build confidence by starting with what you know"},
+            {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Move around and hydrate"},
+            {"description": "Study one challenging topic for 25 minutes", "estimated_time": "25", "tips": "Use the Pomodoro technique"},
+            {"description": "Take another 5-minute break", "estimated_time": "5", "tips": "Stretch and have a snack"},
+            {"description": "Review what you just studied", "estimated_time": "10", "tips": "Summarize in your own words"},
+            {"description": "Create flashcards or summary notes", "estimated_time": "15", "tips": "Writing helps you remember better"},
+            {"description": "Test yourself on what you studied", "estimated_time": "10", "tips": "Quiz yourself - it's the best way to see what you know"}
+        ],
+        "focus_techniques": ["Pomodoro technique", "Active recall methods", "Study with a friend"],
+        "accommodations": ["Use noise-cancelling headphones", "Find a quiet study space", "Take regular breaks", "Use study apps if helpful"],
+        "sensory_tips": ["Good lighting is important", "Comfortable seating", "Have water and snacks nearby", "Take movement breaks"],
+        "encouragement": "You're building knowledge step by step. You've got this!"
+    },
+    "write a blog post": {
+        "steps": [
+            {"description": "Open your document and add a working title", "estimated_time": "3", "tips": "Don't worry about the perfect title - you can change it later"},
+            {"description": "Brainstorm 5-7 key points you want to cover", "estimated_time": "10", "tips": "Use bullet points - don't overthink it"},
+            {"description": "Write the introduction paragraph", "estimated_time": "15", "tips": "Start with a hook - why should people read this?"},
+            {"description": "Write the first main point", "estimated_time": "20", "tips": "Just start writing - you can edit later"},
+            {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Step away and stretch"},
+            {"description": "Write the second main point", "estimated_time": "20", "tips": "Keep the momentum going"},
+            {"description": "Add the third main point", "estimated_time": "20", "tips": "You're getting into the flow now"},
+            {"description": "Write a conclusion paragraph", "estimated_time": "10", "tips": "Summarize your main points and add a call to action"},
+            {"description": "Read through and edit for clarity", "estimated_time": "15", "tips": "Read it out loud to catch any awkward phrases"},
+            {"description": "Add a final title and publish", "estimated_time": "5", "tips": "You did it! Time to share your thoughts with the world"}
+        ],
+        "focus_techniques": ["Pomodoro technique", "Free writing", "Body doubling with a writing partner"],
+        "accommodations": ["Use a distraction-free writing app", "Set up a comfortable writing space", "Have water and snacks nearby", "Take breaks when you get stuck"],
+        "sensory_tips": ["Good lighting is important", "Comfortable seating", "Background music if helpful", "Take movement breaks"],
+        "encouragement": "Your voice matters! Every word you write is progress."
+    },
+    "plan a presentation": {
+        "steps": [
+            {"description": "Open a new document and write your topic at the top", "estimated_time": "2", "tips": "Keep it simple - just the main topic"},
+            {"description": "Write down your main message in one sentence", "estimated_time": "5", "tips": "What do you want people to remember?"},
+            {"description": "Create an outline with 3-5 main points", "estimated_time": "15", "tips": "Use bullet points - keep it simple"},
+            {"description": "Write a brief introduction", "estimated_time": "10", "tips": "Tell them what you're going to tell them"},
+            {"description": "Develop your first main point", "estimated_time": "20", "tips": "Add examples or stories to make it interesting"},
+            {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Step away and think about your audience"},
+            {"description": "Develop your second main point", "estimated_time": "20", "tips": "Keep it relevant to your main message"},
+            {"description": "Add your third main point", "estimated_time": "20", "tips": "You're building a strong case"},
+            {"description": "Write a conclusion that summarizes your points", "estimated_time": "10", "tips": "End with a clear takeaway"},
+            {"description": "Practice your presentation out loud", "estimated_time": "15", "tips": "Practice makes perfect - you've got this!"}
+        ],
+        "focus_techniques": ["Time blocking", "Practice with a friend", "Record yourself practicing"],
+        "accommodations": ["Use presentation software you're comfortable with", "Practice in a quiet space", "Have notes as backup", "Ask for feedback from trusted people"],
+        "sensory_tips": ["Practice in the actual space if possible", "Wear comfortable clothes", "Have water nearby", "Take deep breaths before starting"],
+        "encouragement": "You have valuable insights to share. Your audience is lucky to hear from you!"
+    },
+    "prepare for job interview": {
+        "steps": [
+            {"description": "Research the company and role thoroughly", "estimated_time": "30", "tips": "Check their website, LinkedIn, recent news, and job description"},
+            {"description": "Prepare your elevator pitch (30 seconds)", "estimated_time": "15", "tips": "Practice introducing yourself and your key strengths"},
+            {"description": "Prepare answers to common questions", "estimated_time": "45", "tips": "Use STAR method: Situation, Task, Action, Result"},
+            {"description": "Prepare 3-5 thoughtful questions to ask them", "estimated_time": "15", "tips": "Show genuine interest in the role and company"},
+            {"description": "Plan your outfit and test it", "estimated_time": "10", "tips": "Choose something comfortable and professional"},
+            {"description": "Prepare your portfolio/resume materials", "estimated_time": "20", "tips": "Print copies, organize digital files, prepare examples"},
+            {"description": "Practice with a friend or in front of a mirror", "estimated_time": "30", "tips": "Practice your answers out loud - it helps with confidence"},
+            {"description": "Plan your route and timing", "estimated_time": "10", "tips": "Check traffic, parking, and arrive 10 minutes early"},
+            {"description": "Prepare for virtual interview (if applicable)", "estimated_time": "15", "tips": "Test your camera, microphone, and internet connection"},
+            {"description": "Get a good night's sleep", "estimated_time": "0", "tips": "Rest is crucial for clear thinking and confidence"}
+        ],
+        "focus_techniques": ["Time blocking for each preparation area", "Practice with a friend", "Record yourself answering questions"],
+        "accommodations": ["Prepare in a quiet space", "Use notes as backup", "Practice relaxation techniques", "Have water nearby"],
+        "sensory_tips": ["Wear comfortable clothes", "Test your setup beforehand", "Have backup plans", "Take deep breaths before starting"],
+        "encouragement": "You've got this! Your unique perspective and skills are valuable. Be yourself and show your passion!"
+    },
+    "conduct performance review": {
+        "steps": [
+            {"description": "Review employee's job description and goals", "estimated_time": "15", "tips": "Understand their role and what was expected"},
+            {"description": "Gather performance data and examples", "estimated_time": "20", "tips": "Collect specific examples of achievements and areas for improvement"},
+            {"description": "Prepare the review document", "estimated_time": "30", "tips": "Use a structured format with clear sections"},
+            {"description": "Schedule the meeting with advance notice", "estimated_time": "5", "tips": "Give them time to prepare their own thoughts"},
+            {"description": "Prepare your talking points", "estimated_time": "20", "tips": "Focus on specific examples and constructive feedback"},
+            {"description": "Set up a comfortable meeting space", "estimated_time": "5", "tips": "Choose a private, comfortable location"},
+            {"description": "Start with positive feedback", "estimated_time": "10", "tips": "Begin with what they're doing well"},
+            {"description": "Discuss areas for improvement constructively", "estimated_time": "15", "tips": "Be specific and offer support"},
+            {"description": "Set goals for the next period", "estimated_time": "15", "tips": "Make goals SMART: Specific, Measurable, Achievable, Relevant, Time-bound"},
+            {"description": "Document the discussion", "estimated_time": "10", "tips": "Write down key points and agreed-upon actions"}
+        ],
+        "focus_techniques": ["Time blocking for preparation", "Practice with a colleague", "Use a structured approach"],
+        "accommodations": ["Prepare in advance", "Use templates and checklists", "Have backup materials", "Take breaks if needed"],
+        "sensory_tips": ["Choose a comfortable meeting space", "Have water available", "Use natural lighting", "Take notes to stay focused"],
+        "encouragement": "Performance reviews are about growth and development. You're helping your team member succeed!"
+    },
+    "manage project deadline": {
+        "steps": [
+            {"description": "Break down the project into smaller tasks", "estimated_time": "20", "tips": "List every task, no matter how small"},
+            {"description": "Estimate time for each task", "estimated_time": "15", "tips": "Be realistic - add buffer time for unexpected issues"},
+            {"description": "Prioritize tasks by importance and urgency", "estimated_time": "10", "tips": "Use the Eisenhower Matrix: urgent/important, not urgent/important, etc."},
+            {"description": "Create a project timeline", "estimated_time": "15", "tips": "Use a calendar or project management tool"},
+            {"description": "Identify potential roadblocks", "estimated_time": "10", "tips": "Think about what could go wrong and plan alternatives"},
+            {"description": "Set up regular check-ins", "estimated_time": "5", "tips": "Schedule daily or weekly progress reviews"},
+            {"description": "Start with the most critical tasks", "estimated_time": "30", "tips": "Tackle the hardest or most important work first"},
+            {"description": "Track progress daily", "estimated_time": "10", "tips": "Update your task list and adjust timeline as needed"},
+            {"description": "Communicate with stakeholders", "estimated_time": "15", "tips": "Keep everyone informed of progress and any issues"},
+            {"description": "Prepare for the final push", "estimated_time": "20", "tips": "Review everything, do final quality checks, and prepare for delivery"}
+        ],
+        "focus_techniques": ["Time blocking for each task", "Pomodoro technique for focused work", "Regular breaks to maintain energy"],
+        "accommodations": ["Use project management tools", "Set up reminders and alerts", "Ask for help when needed", "Break work into smaller chunks"],
+        "sensory_tips": ["Create a comfortable workspace", "Use noise-cancelling headphones if needed", "Take movement breaks", "Stay hydrated"],
+        "encouragement": "You can meet this deadline! Break it down into manageable pieces and tackle one task at a time."
+    },
+    "handle difficult conversation": {
+        "steps": [
+            {"description": "Clarify the issue and your goals", "estimated_time": "10", "tips": "What exactly needs to be discussed? What outcome do you want?"},
+            {"description": "Prepare your key points", "estimated_time": "15", "tips": "Write down the main points you want to make"},
+            {"description": "Practice what you want to say", "estimated_time": "20", "tips": "Practice out loud - it helps you feel more confident"},
+            {"description": "Choose the right time and place", "estimated_time": "5", "tips": "Pick a private, comfortable setting when both parties are calm"},
+            {"description": "Start with a positive or neutral opening", "estimated_time": "5", "tips": "Begin with something like 'I'd like to discuss...' or 'I've noticed...'"},
+            {"description": "Use 'I' statements", "estimated_time": "10", "tips": "Say 'I feel...' instead of 'You always...' to avoid blame"},
+            {"description": "Listen actively to their response", "estimated_time": "15", "tips": "Really listen to understand their perspective"},
+            {"description": "Stay calm and focused", "estimated_time": "10", "tips": "Take deep breaths if you feel emotional"},
+            {"description": "Work toward a solution together", "estimated_time": "15", "tips": "Focus on finding a resolution that works for both parties"},
+            {"description": "Follow up on any agreements", "estimated_time": "5", "tips": "Check in later to ensure the solution is working"}
+        ],
+        "focus_techniques": ["Practice with a trusted friend", "Use breathing exercises", "Prepare talking points in advance"],
+        "accommodations": ["Prepare in advance", "Have notes as backup", "Take breaks if needed", "Ask for support from a colleague"],
+        "sensory_tips": ["Choose a comfortable setting", "Have water available", "Use calming techniques", "Take deep breaths"],
+        "encouragement": "Difficult conversations are part of professional growth. You're being brave by addressing issues directly and constructively."
+    },
+    "prepare for team meeting": {
+        "steps": [
+            {"description": "Define the meeting purpose and agenda", "estimated_time": "10", "tips": "What needs to be accomplished? What topics will be covered?"},
+            {"description": "Prepare necessary materials", "estimated_time": "15", "tips": "Gather reports, data, presentations, or other documents needed"},
+            {"description": "Send agenda to participants in advance", "estimated_time": "5", "tips": "Give everyone time to prepare and contribute"},
+            {"description": "Set up the meeting space or technology", "estimated_time": "10", "tips": "Test equipment, reserve room, or set up virtual meeting"},
+            {"description": "Prepare your talking points", "estimated_time": "15", "tips": "Outline what you want to say and key questions to ask"},
+            {"description": "Anticipate questions and prepare answers", "estimated_time": "10", "tips": "Think about what others might ask and how you'll respond"},
+            {"description": "Prepare for different scenarios", "estimated_time": "10", "tips": "What if someone disagrees? What if the discussion goes off-topic?"},
+            {"description": "Set time limits for each agenda item", "estimated_time": "5", "tips": "Keep the meeting focused and on schedule"},
+            {"description": "Prepare follow-up actions", "estimated_time": "10", "tips": "Think about what needs to happen after the meeting"},
+            {"description": "Arrive early to set up", "estimated_time": "5", "tips": "Give yourself time to get comfortable and organized"}
+        ],
+        "focus_techniques": ["Time blocking for preparation", "Practice your opening", "Use a structured approach"],
+        "accommodations": ["Prepare in advance", "Use templates and checklists", "Have backup materials", "Take breaks if needed"],
+        "sensory_tips": ["Choose a comfortable meeting space", "Have water available", "Use natural lighting", "Take notes to stay focused"],
+        "encouragement": "You're facilitating important discussions that help your team succeed. Your preparation shows your commitment to the team!"
+    },
+    "create project proposal": {
+        "steps": [
+            {"description": "Define the problem or opportunity", "estimated_time": "15", "tips": "Clearly articulate what you're trying to solve or achieve"},
+            {"description": "Research the background and context", "estimated_time": "30", "tips": "Gather relevant data, market research, and stakeholder information"},
+            {"description": "Define your proposed solution", "estimated_time": "25", "tips": "Be specific about what you're proposing and how it addresses the problem"},
+            {"description": "Create a project timeline", "estimated_time": "15", "tips": "Break down the work into phases with realistic timeframes"},
+            {"description": "Estimate costs and resources needed", "estimated_time": "20", "tips": "Be thorough but realistic about budget and resource requirements"},
+            {"description": "Identify risks and mitigation strategies", "estimated_time": "15", "tips": "Think about what could go wrong and how you'll address it"},
+            {"description": "Define success metrics", "estimated_time": "10", "tips": "How will you measure if the project is successful?"},
+            {"description": "Write the executive summary", "estimated_time": "20", "tips": "Summarize the key points in 1-2 pages"},
+            {"description": "Create supporting materials", "estimated_time": "25", "tips": "Charts, graphs, detailed timelines, and other visual aids"},
+            {"description": "Review and refine the proposal", "estimated_time": "20", "tips": "Check for clarity, completeness, and persuasiveness"}
+        ],
+        "focus_techniques": ["Time blocking for each section", "Research in focused sessions", "Use templates and examples"],
+        "accommodations": ["Break work into smaller chunks", "Use project management tools", "Ask for feedback from colleagues", "Take breaks between sections"],
+        "sensory_tips": ["Create a comfortable workspace", "Use natural lighting", "Have water and snacks nearby", "Take movement breaks"],
+        "encouragement": "Your proposal could lead to exciting new opportunities! Take it one section at a time and don't worry about perfection on the first draft."
+    },
+    "handle customer complaint": {
+        "steps": [
+            {"description": "Listen actively to the customer", "estimated_time": "10", "tips": "Let them fully explain their issue without interrupting"},
+            {"description": "Acknowledge their concern", "estimated_time": "5", "tips": "Show empathy and understanding for their situation"},
+            {"description": "Ask clarifying questions", "estimated_time": "10", "tips": "Get specific details about what went wrong and when"},
+            {"description": "Take detailed notes", "estimated_time": "5", "tips": "Document everything for follow-up and resolution"},
+            {"description": "Apologize sincerely", "estimated_time": "5", "tips": "Take responsibility for any mistakes on your part"},
+            {"description": "Explain what happened (if you know)", "estimated_time": "10", "tips": "Be honest about what went wrong without making excuses"},
+            {"description": "Propose a solution", "estimated_time": "15", "tips": "Offer specific steps to resolve the issue"},
+            {"description": "Get their agreement on the solution", "estimated_time": "10", "tips": "Make sure they're satisfied with your proposed resolution"},
+            {"description": "Follow up on the resolution", "estimated_time": "10", "tips": "Check back to ensure the issue is fully resolved"},
+            {"description": "Document the incident", "estimated_time": "10", "tips": "Record what happened and how it was resolved for future reference"}
+        ],
+        "focus_techniques": ["Stay calm and focused", "Use active listening", "Take notes to stay organized"],
+        "accommodations": ["Prepare standard responses", "Use templates for documentation", "Ask for help from a supervisor if needed"],
+        "sensory_tips": ["Choose a quiet space for the conversation", "Have water available", "Take deep breaths if needed"],
+        "encouragement": "Handling complaints well can turn unhappy customers into loyal ones. You're doing important work for the business!"
+    }
+}
+
+# Keyword fallbacks, checked in order when no template name appears in the task.
+# Each rule is (trigger keywords, required keywords or None, template key); a
+# rule whose triggers match but whose required keywords do not ends the search.
+KEYWORD_RULES: List[Tuple[Tuple[str, ...], Optional[Tuple[str, ...]], str]] = [
+    (("quarterly", "report", "10-q", "sec"), ("quarterly", "report"), "prepare quarterly report"),
+    (("clean", "room", "organize"), None, "clean my room"),
+    (("study", "exam", "test", "learn"), None, "study for exam"),
+    (("write", "blog", "article", "post"), None, "write a blog post"),
+    (("presentation", "present", "speech", "talk"), None, "plan a presentation"),
+    (("interview", "job", "career", "hiring"), None, "prepare for job interview"),
+    (("performance", "review", "evaluation", "feedback"), None, "conduct performance review"),
+    (("project", "deadline", "timeline", "deliverable"), None, "manage project deadline"),
+    (("difficult", "conversation", "conflict", "confrontation"), None, "handle difficult conversation"),
+    (("meeting", "team", "agenda", "facilitate"), None, "prepare for team meeting"),
+    (("proposal", "project", "business", "pitch"), None, "create project proposal"),
+    (("complaint", "customer", "service", "issue"), None, "handle customer complaint"),
+]
+
+DEADLINE_TIPS = [
+    "Set up calendar reminders for each step",
+    "Break work into smaller chunks to meet deadlines",
+    "Ask for help if you're falling behind",
+    "Prioritize the most critical sections first"
+]
+
+
+def match_template(task: str) -> Optional[str]:
+    """Return the template key for a task description, or None for the generic plan"""
+    task_lower = task.lower()
+
+    # Check for exact matches first
+    for key in BREAKDOWN_TEMPLATES:
+        if key in task_lower:
+            return key
+
+    # If no exact match, try keyword matching
+    for triggers, required, key in KEYWORD_RULES:
+        if any(keyword in task_lower for keyword in triggers):
+            if required is None or any(keyword in task_lower for keyword in required):
+                return key
+            return None
+    return None
+
+
+def _copy_breakdown(breakdown: Dict[str, Any]) -> Dict[str, Any]:
+    # Templates are shared module data; step dicts get edited by personalisation
+    copied = dict(breakdown)
+    copied["steps"] = [dict(step) for step in breakdown["steps"]]
+    return copied
+
+
+def default_breakdown(task: str) -> Dict[str, Any]:
+    """Default breakdown for any task"""
+    return {
+        "steps": [
+            {"description": f"Start with: {task}", "estimated_time": "15", "tips": "Break it into smaller pieces"},
+            {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Rest and recharge"},
+            {"description": "Continue with the next part", "estimated_time": "15", "tips": "Keep going at your own pace"},
+            {"description": "Review what you've accomplished", "estimated_time": "10", "tips": "Celebrate your progress"}
+        ],
+        "focus_techniques": ["Pomodoro technique", "Body doubling", "Time blocking"],
+        "accommodations": ["Use timers", "Take frequent breaks", "Ask for help when needed"],
+        "sensory_tips": ["Comfortable lighting", "Noise-cancelling headphones", "Fidget tools"],
+        "encouragement": "Remember: progress, not perfection. You're doing great!"
+    }
+
+
+def personalize_task_breakdown(task: str, breakdown: Dict[str, Any], deadlines: List[Dict[str, Any]],
+                               urgency: str) -> Dict[str, Any]:
+    """Personalize task breakdown based on deadlines and urgency"""
+    personalized_breakdown = _copy_breakdown(breakdown)
+
+    # Add deadline context
+    if deadlines:
+        deadline_context = "📅 **Upcoming Deadlines:**\n"
+        for deadline in deadlines[:3]:  # Show top 3 relevant deadlines
+            deadline_context += f"• {deadline['title']} - {deadline['date']} ({deadline['priority']} priority)\n"
+
+        personalized_breakdown["deadline_context"] = deadline_context
+
+    # Adjust time estimates based on urgency
+    if urgency == "high":
+        # Reduce time estimates for urgent tasks
+        for step in personalized_breakdown["steps"]:
+            current_time = int(step["estimated_time"])
+            step["estimated_time"] = str(max(5, current_time - 5))  # Reduce by 5 minutes, minimum 5
+        personalized_breakdown["urgency_note"] = "⚡ **High Priority Task** - Time estimates have been adjusted for urgency"
+    elif urgency == "low":
+        # Increase time estimates for less urgent tasks
+        for step in personalized_breakdown["steps"]:
+            current_time = int(step["estimated_time"])
+            step["estimated_time"] = str(current_time + 5)  # Add 5 minutes
+        personalized_breakdown["urgency_note"] = "🐌 **Low Priority Task** - You have more time to work on this"
+
+    # Add deadline-specific tips
+    if deadlines:
+        personalized_breakdown["deadline_tips"] = list(DEADLINE_TIPS)
+
+    return personalized_breakdown
+
+
+def demo_task_breakdown(task: str, user_context: str = "", gmail_address: str = None,
+                        deadlines: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Template task breakdown (no API key required).
+
+    ``deadlines`` lets callers pass deadlines they already hold (for example a
+    connected Gmail account's); otherwise they are looked up from
+    ``gmail_address`` when one is given.
+    """
+    template_key = match_template(task)
+    if template_key:
+        breakdown = _copy_breakdown(BREAKDOWN_TEMPLATES[template_key])
+        # Lets renderers reuse pre-rendered HTML for this template
+        breakdown["template"] = template_key
+    else:
+        breakdown = default_breakdown(task)
+
+    # Personalize based on deadlines and urgency
+    if gmail_address:
+        if deadlines is None:
+            deadlines = get_gmail_deadlines(gmail_address)
+        if deadlines:
+            relevant_deadlines, urgency = analyze_deadlines_for_task(task, deadlines)
+            breakdown = personalize_task_breakdown(task, breakdown, relevant_deadlines, urgency)
+
+    return breakdown
@@ -0,0 +1,229 @@
+"""
+Bulk Breakdown CLI
+Pre-generates personalised breakdowns for a backlog of tasks (JSONL or CSV)
+in a process pool and streams the results to JSONL in input order.
+
+Each input record needs a ``task`` (or ``title``) field; ``user_context``
+(or ``body``), ``gmail_address`` and ``id`` (or ``request_id``) are optional.
+Every output line is ``{"index", "id", "task", "breakdown"}``, or ``"error"``
+in place of ``breakdown`` when a record can't be processed.
+
+Re-running with the same output file resumes after the last complete line.
+
+Usage: python -m focuscoach.bulk tasks.jsonl -o breakdowns.jsonl [--workers 4] [--chunk-size 256]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from focuscoach.breakdown import demo_task_breakdown
+from focuscoach.deadlines import get_gmail_deadlines
+
+Record = Tuple[int, Dict[str, Any]]
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream records from a JSONL or CSV file (format taken from the extension by default)"""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+            return
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Keep the slot so output indices still line up with the input
+                record = {"_error": f"line {line_number} is not valid JSON"}
+            yield record if isinstance(record, dict) else {"task": record}
+
+
+@lru_cache(maxsize=1024)
+def _deadlines_for(gmail_address: str) -> Tuple[Dict[str, Any], ...]:
+    # Tasks in an export often share an owner, so look each inbox up once per worker
+    return tuple(get_gmail_deadlines(gmail_address))
+
+
+def process_record(index: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the breakdown and personalisation pipeline for one input record"""
+    record_id = record.get("id", record.get("request_id", index))
+    task = record.get("task") or record.get("title") or ""
+    result = {"index": index, "id": record_id, "task": task}
+    if "_error" in record:
+        result["error"] = record["_error"]
+        return result
+    if not isinstance(task, str) or not task.strip():
+        result["error"] = "record has no task or title"
+        return result
+
+    gmail_address = record.get("gmail_address") or None
+    if gmail_address is not None and not isinstance(gmail_address, str):
+        result["error"] = "gmail_address must be a string"
+        return result
+    try:
+        deadlines = list(_deadlines_for(gmail_address)) if gmail_address else None
+        result["breakdown"] = demo_task_breakdown(
+            task.strip(), record.get("user_context") or record.get("body") or "", gmail_address, deadlines
+        )
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def process_chunk(chunk: List[Record]) -> Tuple[str, int]:
+    """Worker entry point: returns (output lines already serialised, error count)"""
+    results = [process_record(index, record) for index, record in chunk]
+    errors = sum(1 for result in results if "error" in result)
+    return "".join(json.dumps(result) + "\n" for result in results), errors
+
+
+def _ignore_interrupts():
+    # Ctrl-C reaches the whole process group; let the parent decide how to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _chunks(records: Iterator[Record], size: int) -> Iterator[List[Record]]:
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_results(records: Iterator[Record], workers: int,
+                    chunk_size: int) -> Iterator[Tuple[int, Tuple[str, int]]]:
+    """Yield (record count, (output lines, errors)) per chunk, in input order.
+
+    At most ``2 * workers`` chunks are in flight, so memory stays flat no matter
+    how large the input is. ``workers=0`` processes everything in this process.
+    """
+    chunks = _chunks(records, chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            yield len(chunk), process_chunk(chunk)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_interrupts)
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), pool.submit(process_chunk, chunk)))
+            if len(pending) >= 2 * workers:
+                count, future = pending.popleft()
+                yield count, future.result()
+        while pending:
+            count, future = pending.popleft()
+            yield count, future.result()
+    finally:
+        # Chunks not yet written are redone on resume, so don't wait for queued ones
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def completed_records(output_path: str) -> int:
+    """Count complete lines already written, dropping a partial last line from a crash"""
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "rb+") as handle:
+        complete = 0
+        good_until = 0
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            complete += 1
+            good_until += len(line)
+        handle.truncate(good_until)
+    return complete
+
+
+class ProgressReporter:
+    """Prints processed counts and throughput to stderr at most every ``interval`` seconds"""
+
+    def __init__(self, interval: float = 2.0, skipped: int = 0, stream: Optional[TextIO] = None):
+        self.interval = interval
+        self.skipped = skipped
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def update(self, count: int, errors: int = 0):
+        self.done += count
+        self.errors += errors
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed else 0.0
+
+    def report(self, final: bool = False):
+        label = "Done" if final else "Progress"
+        elapsed = time.perf_counter() - self.started
+        print(f"{label}: {self.done:,} tasks in {elapsed:.1f}s ({self.rate:,.0f} tasks/s), "
+              f"{self.errors:,} errors, {self.skipped:,} resumed", file=self.stream, flush=True)
+
+
+def run(input_path: str, output_path: str, workers: int, chunk_size: int = 256,
+        fmt: Optional[str] = None, restart: bool = False, progress_interval: float = 2.0) -> ProgressReporter:
+    """Process ``input_path`` into ``output_path``, resuming unless ``restart`` is set"""
+    if restart and os.path.exists(output_path):
+        os.remove(output_path)
+    skipped = completed_records(output_path)
+    progress = ProgressReporter(progress_interval, skipped)
+
+    records = itertools.islice(enumerate(read_records(input_path, fmt)), skipped, None)
+    results = ordered_results(records, workers, chunk_size)
+    with open(output_path, "a", encoding="utf-8") as output, closing(results):
+        for count, (lines, errors) in results:
+            output.write(lines)
+            # Flush per chunk so an interruption loses at most the chunks in flight
+            output.flush()
+            progress.update(count, errors)
+    progress.report(final=True)
+    return progress
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate task breakdowns for a JSONL/CSV backlog")
+    parser.add_argument("input", help="tasks as .jsonl or .csv")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write (resumed if it exists)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="override the input format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (0 runs in this process)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="tasks per unit of work")
+    parser.add_argument("--restart", action="store_true", help="ignore existing output and start over")
+    parser.add_argument("--progress-interval", type=float, default=2.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, args.workers, args.chunk_size, args.format,
+            args.restart, args.progress_interval)
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
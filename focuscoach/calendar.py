@@ -0,0 +1,109 @@
+"""
+Calendar Core
+Calendar events and encouraging, non-overwhelming reminder messages
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+ENCOURAGING_MESSAGES = {
+    "upcoming": [
+        "🌟 You've got this! Your {event_type} is coming up in {time_until}",
+        "💪 Ready to shine? Your {event_type} starts in {time_until}",
+        "🎯 You're prepared and capable! {time_until} until your {event_type}",
+        "✨ Take a deep breath - you're going to do great! {time_until} until {event_type}",
+        "🚀 Your future self will thank you for being ready! {time_until} until {event_type}"
+    ],
+    "deadline": [
+        "📅 Gentle reminder: Your {event_type} is due in {time_until}",
+        "⏰ You're making great progress! {time_until} left for your {event_type}",
+        "🎯 One step at a time - you have {time_until} for your {event_type}",
+        "💡 Remember: progress over perfection! {time_until} until {event_type}",
+        "🌟 You're doing amazing work! {time_until} left for your {event_type}"
+    ],
+    "focus": [
+        "🧠 Time for some focused magic! Your {event_type} starts in {time_until}",
+        "🎧 Ready to dive deep? {time_until} until your {event_type}",
+        "⚡ Your brain is ready for this! {time_until} until {event_type}",
+        "🔋 Energy check: You've got this! {time_until} until {event_type}",
+        "🎯 Focus mode activated! {time_until} until your {event_type}"
+    ],
+    "meeting": [
+        "👥 Ready to connect? Your {event_type} starts in {time_until}",
+        "🤝 You bring valuable insights! {time_until} until your {event_type}",
+        "💬 Your voice matters! {time_until} until your {event_type}",
+        "🌟 You're going to contribute great ideas! {time_until} until {event_type}",
+        "🎯 Ready to collaborate? {time_until} until your {event_type}"
+    ]
+}
+
+# Event type wording used inside reminder messages
+EVENT_TYPE_LABELS = {
+    "meeting": "meeting",
+    "deadline": "deadline",
+    "focus": "focus session",
+    "presentation": "presentation"
+}
+
+
+def get_calendar_events(now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Simulate getting calendar events (demo version)"""
+    # In a real implementation, this would use Google Calendar API
+    # For demo purposes, we'll return sample calendar events
+    now = now or datetime.now()
+    sample_events = [
+        {
+            "title": "Team Standup",
+            "start_time": now + timedelta(hours=2),
+            "end_time": now + timedelta(hours=2, minutes=30),
+            "type": "meeting",
+            "priority": "medium"
+        },
+        {
+            "title": "Quarterly Report Deadline",
+            "start_time": now + timedelta(days=3),
+            "end_time": now + timedelta(days=3),
+            "type": "deadline",
+            "priority": "high"
+        },
+        {
+            "title": "Focus Time - Deep Work",
+            "start_time": now + timedelta(hours=4),
+            "end_time": now + timedelta(hours=5),
+            "type": "focus",
+            "priority": "low"
+        },
+        {
+            "title": "Client Presentation",
+            "start_time": now + timedelta(days=1, hours=10),
+            "end_time": now + timedelta(days=1, hours=11),
+            "type": "presentation",
+            "priority": "high"
+        }
+    ]
+    return sample_events
+
+
+def format_time_until(seconds: float) -> str:
+    """Coarse, low-pressure wording for the time left before an event"""
+    if seconds < 3600:  # Less than 1 hour
+        return f"{int(seconds / 60)} minutes"
+    elif seconds < 86400:  # Less than 1 day
+        return f"{int(seconds / 3600)} hours"
+    else:  # More than 1 day
+        return f"{int(seconds / 86400)} days"
+
+
+def create_encouraging_reminder(event: Dict[str, Any], reminder_type: str = "upcoming",
+                                now: Optional[datetime] = None, rng: random.Random = None) -> str:
+    """Create encouraging, non-overwhelming reminders"""
+    now = now or datetime.now()
+    time_until = format_time_until((event["start_time"] - now).total_seconds())
+    event_type = EVENT_TYPE_LABELS.get(event["type"], "event")
+
+    # Select appropriate message
+    messages = ENCOURAGING_MESSAGES.get(reminder_type, ENCOURAGING_MESSAGES["upcoming"])
+    message_template = (rng or random).choice(messages)
+
+    return message_template.format(event_type=event_type, time_until=time_until)
@@ -0,0 +1,299 @@
+"""
+Calendar Sync
+Incremental calendar sync: keeps a sync token per user, applies only the
+deltas (added, moved or cancelled events) and reschedules just the reminders
+attached to events that changed.
+
+Change notifications (webhooks, polling ticks) are debounced, so a burst of
+edits to one calendar turns into a single sync and recomputation for that
+user. ``FakeCalendarProvider`` is an in-memory provider with the same sync
+token semantics as Google Calendar, for the demo app and local testing.
+"""
+
+import bisect
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from focuscoach.calendar import get_calendar_events
+from focuscoach.reminders import ReminderBook
+
+# Fields whose change counts as the event moving
+TIMING_FIELDS = ("start_time", "end_time", "title", "type")
+
+
+class SyncTokenExpired(Exception):
+    """The provider no longer recognises the sync token; a full sync is needed"""
+
+
+class CalendarProvider:
+    """Source of calendar events that supports incremental listing"""
+
+    def list_changes(self, user_id: str, sync_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """Return (changed events, next sync token).
+
+        Without a token every live event is returned. With one, only events
+        changed since it are returned; cancelled ones carry
+        ``status: "cancelled"``. Raises ``SyncTokenExpired`` for stale tokens.
+        """
+        raise NotImplementedError
+
+
+class FakeCalendarProvider(CalendarProvider):
+    """In-memory calendars with a change log, for the demo and local testing"""
+
+    def __init__(self):
+        self.calls = 0
+        self.full_syncs = 0
+        self._seq = 0
+        self._events: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._log: Dict[str, Tuple[List[int], List[str]]] = {}
+        self._oldest_token: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, user_id: str, event: Dict[str, Any]):
+        self._seq += 1
+        self._events.setdefault(user_id, {})[event["uid"]] = event
+        sequences, uids = self._log.setdefault(user_id, ([], []))
+        sequences.append(self._seq)
+        uids.append(event["uid"])
+
+    def add_event(self, user_id: str, event: Dict[str, Any]) -> str:
+        with self._lock:
+            stored = dict(event, uid=event.get("uid") or uuid.uuid4().hex, status="confirmed")
+            self._record(user_id, stored)
+            return stored["uid"]
+
+    def update_event(self, user_id: str, uid: str, **changes):
+        """Change any fields of an event; moving it keeps its duration unless end_time is given"""
+        with self._lock:
+            event = dict(self._events[user_id][uid])
+            if "start_time" in changes and "end_time" not in changes:
+                changes["end_time"] = changes["start_time"] + (event["end_time"] - event["start_time"])
+            event.update(changes)
+            self._record(user_id, event)
+
+    def cancel_event(self, user_id: str, uid: str):
+        with self._lock:
+            self._record(user_id, dict(self._events[user_id][uid], status="cancelled"))
+
+    def remove_user(self, user_id: str):
+        """Forget a user's calendar and change log"""
+        with self._lock:
+            self._events.pop(user_id, None)
+            self._log.pop(user_id, None)
+            self._oldest_token.pop(user_id, None)
+
+    def expire_sync_tokens(self, user_id: str):
+        """Simulate the provider dropping its change history (HTTP 410 in Google Calendar)"""
+        with self._lock:
+            self._oldest_token[user_id] = self._seq
+
+    def seed_demo(self, user_id: str, now: Optional[datetime] = None) -> List[str]:
+        """Load the demo calendar for a user, with UIDs derived from the titles"""
+        return [
+            self.add_event(user_id, dict(event, uid=re.sub(r"[^a-z0-9]+", "-", event["title"].lower()).strip("-")))
+            for event in get_calendar_events(now)
+        ]
+
+    def list_changes(self, user_id: str, sync_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
+        with self._lock:
+            self.calls += 1
+            events = self._events.get(user_id, {})
+            if sync_token is None:
+                self.full_syncs += 1
+                return [dict(event) for event in events.values() if event["status"] != "cancelled"], str(self._seq)
+
+            since = int(sync_token)
+            if since < self._oldest_token.get(user_id, 0):
+                raise SyncTokenExpired(f"sync token {sync_token} expired for {user_id}")
+            sequences, uids = self._log.get(user_id, ([], []))
+            changed = dict.fromkeys(uids[bisect.bisect_right(sequences, since):])
+            return [dict(events[uid]) for uid in changed], str(self._seq)
+
+
+class UserCalendar:
+    """One user's synced events, sync token and reminder book"""
+
+    def __init__(self, user_id: str, book: Optional[ReminderBook] = None):
+        self.user_id = user_id
+        self.book = book or ReminderBook()
+        self.sync_token: Optional[str] = None
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.last_synced: Optional[float] = None
+        self._sorted: Optional[List[Dict[str, Any]]] = None
+
+    def mark_changed(self):
+        self._sorted = None
+
+    def sorted_events(self) -> List[Dict[str, Any]]:
+        # Rebuilt only after a sync changed something
+        if self._sorted is None:
+            self._sorted = sorted(self.events.values(), key=lambda event: event["start_time"])
+        return self._sorted
+
+
+class CalendarSync:
+    """Applies calendar deltas per user and keeps their reminders attached to the right events.
+
+    ``notify`` marks a user as changed; ``process_due`` syncs each notified
+    user once their notifications have been quiet for ``debounce`` seconds
+    (or ``max_delay`` after the first one, so constant edits still land).
+    """
+
+    def __init__(self, provider: CalendarProvider, debounce: float = 2.0, max_delay: float = 30.0,
+                 poll_interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.provider = provider
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.users: Dict[str, UserCalendar] = {}
+        self.syncs = 0
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.RLock()
+
+    def calendar(self, user_id: str, book: Optional[ReminderBook] = None) -> UserCalendar:
+        """The user's synced calendar; ``book`` replaces the reminder book it updates"""
+        with self._lock:
+            calendar = self.users.get(user_id)
+            if calendar is None:
+                calendar = self.users[user_id] = UserCalendar(user_id, book)
+            elif book is not None:
+                calendar.book = book
+            return calendar
+
+    def remove_user(self, user_id: str):
+        """Drop a user's synced calendar, e.g. once their session has ended"""
+        with self._lock:
+            self.users.pop(user_id, None)
+            self._pending.pop(user_id, None)
+
+    def notify(self, user_id: str, now: Optional[float] = None):
+        """Record that a user's calendar changed; the sync runs once things go quiet"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            first, _ = self._pending.get(user_id, (now, now))
+            self._pending[user_id] = (first, now)
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        now = self.clock() if now is None else now
+        with self._lock:
+            return [user_id for user_id, (first, last) in self._pending.items()
+                    if now - last >= self.debounce or now - first >= self.max_delay]
+
+    def process_due(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Sync every user whose debounce window has passed; returns their results"""
+        return {user_id: self.sync(user_id) for user_id in self.due(now)}
+
+    def refresh(self, user_id: str, book: Optional[ReminderBook] = None) -> UserCalendar:
+        """Sync on read when notified or when the last sync is older than ``poll_interval``"""
+        calendar = self.calendar(user_id, book)
+        stale = calendar.last_synced is None or self.clock() - calendar.last_synced >= self.poll_interval
+        if stale or user_id in self._pending:
+            self.sync(user_id)
+        return calendar
+
+    def sync(self, user_id: str) -> Dict[str, Any]:
+        """Fetch and apply one delta for the user, falling back to a full sync if the token expired"""
+        with self._lock:
+            self._pending.pop(user_id, None)
+            calendar = self.calendar(user_id)
+            full = calendar.sync_token is None
+            try:
+                changes, token = self.provider.list_changes(user_id, calendar.sync_token)
+            except SyncTokenExpired:
+                full = True
+                changes, token = self.provider.list_changes(user_id, None)
+
+            if full:
+                # Anything we hold that the full listing no longer has was cancelled
+                live = {event["uid"] for event in changes}
+                changes = changes + [dict(event, status="cancelled")
+                                     for uid, event in calendar.events.items() if uid not in live]
+
+            result = self._apply(calendar, changes)
+            result["full_sync"] = full
+            calendar.sync_token = token
+            calendar.last_synced = self.clock()
+            self.syncs += 1
+            return result
+
+    def _apply(self, calendar: UserCalendar, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        added, moved, cancelled = [], {}, {}
+        for event in changes:
+            uid = event["uid"]
+            previous = calendar.events.get(uid)
+            if event.get("status") == "cancelled":
+                if previous is not None:
+                    del calendar.events[uid]
+                    cancelled[uid] = previous
+            elif previous is None:
+                calendar.events[uid] = event
+                added.append(uid)
+            elif any(previous.get(field) != event.get(field) for field in TIMING_FIELDS):
+                calendar.events[uid] = event
+                moved[uid] = event
+            else:
+                calendar.events[uid] = event
+
+        if added or moved or cancelled:
+            calendar.mark_changed()
+        rescheduled = self._reschedule(calendar.book, moved, cancelled) if moved or cancelled else []
+        return {"added": len(added), "moved": len(moved), "cancelled": len(cancelled), "rescheduled": rescheduled}
+
+    @staticmethod
+    def _reschedule(book: ReminderBook, moved: Dict[str, Dict[str, Any]],
+                    cancelled: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Update only the reminders whose calendar event moved or was cancelled"""
+        touched = []
+        for reminders in (book.task_reminders, book.meeting_reminders):
+            for name, reminder in list(reminders.items()):
+                uid = (reminder.get("calendar_event") or {}).get("uid")
+                if uid in moved:
+                    event = moved[uid]
+                    reminder.update(calendar_event=event, status="rescheduled", scheduled_at=datetime.now())
+                    if event["title"] != name and event["title"] not in reminders:
+                        # Reminders are keyed by event title, so follow a rename (unless another
+                        # reminder already has that title: it keeps its own, this one its old name)
+                        reminders[event["title"]] = reminders.pop(name)
+                        name = event["title"]
+                    touched.append(name)
+                elif uid in cancelled:
+                    reminder["status"] = "cancelled"
+                    touched.append(name)
+        return touched
+
+
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    from focuscoach.reminders import get_upcoming_calendar_events_with_reminders, schedule_mandatory_reminder
+
+    provider = FakeCalendarProvider()
+    provider.seed_demo("sam")
+    sync = CalendarSync(provider, debounce=2.0)
+    calendar = sync.refresh("sam")
+    print(f"Initial sync: {len(calendar.events)} events, {provider.calls} provider call")
+
+    standup = calendar.events["team-standup"]
+    schedule_mandatory_reminder(calendar.book, standup["title"], standup["type"], ["15 minutes before"], standup)
+
+    # A burst of edits and webhook pings within the debounce window
+    for minutes in (15, 30, 45):
+        provider.update_event("sam", "team-standup", start_time=standup["start_time"] + timedelta(minutes=minutes))
+        sync.notify("sam", now=100.0 + minutes / 60)
+    provider.cancel_event("sam", "focus-time-deep-work")
+    sync.notify("sam", now=101.0)
+
+    print(f"Due after 1s: {sync.due(now=102.0)}; after 2s: {sync.due(now=103.5)}")
+    result = sync.process_due(now=103.5)["sam"]
+    print(f"One sync for the burst: {result}")
+    print(f"Standup reminder now {calendar.book.meeting_reminders['Team Standup']['status']}, "
+          f"starts {calendar.book.meeting_reminders['Team Standup']['calendar_event']['start_time']:%H:%M}")
+    pending = get_upcoming_calendar_events_with_reminders(calendar.book, calendar.sorted_events())
+    print(f"Events still needing reminders: {[event['title'] for event in pending]}")
+    print(f"Provider calls: {provider.calls}, full syncs: {provider.full_syncs}")
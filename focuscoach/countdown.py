@@ -0,0 +1,58 @@
+"""
+Focus Countdown
+Client-side visual timer for focus sessions.
+
+The server sends the session's end timestamp once. The browser animates the
+countdown itself, moving through the colour stages of a visual timer, so a
+running session causes no reruns at all. The component reports back only
+when the user pauses/resumes or the session finishes. Every report carries a
+fresh ``event_id``: the component value persists across reruns, so callers
+handle each event once (see ``new_event``).
+
+The frontend is a single ``frontend/countdown/index.html`` speaking
+Streamlit's component postMessage protocol directly, so no npm build is
+needed.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, MutableMapping, Optional, Sequence, Tuple
+
+import streamlit.components.v1 as components
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "countdown")
+
+_component = components.declare_component("focus_countdown", path=_FRONTEND)
+
+# (fraction of the session still remaining, colour): calm while there is
+# plenty of time, warmer as the end approaches
+COLOR_STAGES: Tuple[Tuple[float, str], ...] = (
+    (0.5, "#4caf50"),
+    (0.2, "#ffb300"),
+    (0.0, "#e53935"),
+)
+
+
+def focus_countdown(session_id: str, end_time: datetime, duration_minutes: float,
+                    paused_remaining: Optional[float] = None, label: str = "",
+                    color_stages: Sequence[Tuple[float, str]] = COLOR_STAGES,
+                    height: int = 170, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Render the countdown; returns the last event the browser reported, if any.
+
+    Events are ``{"event": "pause" | "resume" | "complete", "remaining": seconds,
+    "session": session_id, "event_id": str}``; ``session`` tells events from an
+    earlier session apart. ``paused_remaining`` (seconds) shows a paused timer.
+    """
+    return _component(session=session_id, end=end_time.timestamp() * 1000,
+                      duration=duration_minutes * 60, paused_remaining=paused_remaining, label=label,
+                      stages=[list(stage) for stage in color_stages], height=height,
+                      key=key, default=None)
+
+
+def new_event(event: Optional[Dict[str, Any]], state: MutableMapping[str, Any],
+              slot: str = "countdown_event_id") -> Optional[Dict[str, Any]]:
+    """``event`` if it has not been handled yet (tracked under ``state[slot]``), else None"""
+    if not event or event.get("event_id") == state.get(slot):
+        return None
+    state[slot] = event.get("event_id")
+    return event
@@ -0,0 +1,66 @@
+"""
+Deadline Core
+Deadline lookup and urgency analysis used to personalise task breakdowns
+"""
+
+from typing import Any, Dict, List, Tuple
+
+# Keywords that make a task and a deadline count as related
+DEADLINE_KEYWORDS = ["report", "quarterly", "audit", "tax", "meeting"]
+
+
+def get_gmail_deadlines(gmail_address: str) -> List[Dict[str, Any]]:
+    """Simulate getting deadlines from Gmail (demo version)"""
+    # In a real implementation, this would use Gmail API
+    # For demo purposes, we'll return sample deadlines
+    sample_deadlines = [
+        {
+            "title": "Quarterly Report Due",
+            "date": "2024-01-15",
+            "priority": "high",
+            "source": "email from SEC"
+        },
+        {
+            "title": "Board Meeting Preparation",
+            "date": "2024-01-20",
+            "priority": "medium",
+            "source": "calendar invite"
+        },
+        {
+            "title": "Audit Review Meeting",
+            "date": "2024-01-25",
+            "priority": "high",
+            "source": "email from auditor"
+        },
+        {
+            "title": "Tax Filing Deadline",
+            "date": "2024-01-31",
+            "priority": "high",
+            "source": "IRS reminder email"
+        }
+    ]
+
+    return sample_deadlines
+
+
+def analyze_deadlines_for_task(task: str, deadlines: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+    """Analyze deadlines to provide personalized task breakdown"""
+    relevant_deadlines = []
+    urgency_level = "medium"
+
+    # Check for relevant deadlines; the task check does not depend on the deadline
+    task_lower = task.lower()
+    if any(keyword in task_lower for keyword in DEADLINE_KEYWORDS):
+        for deadline in deadlines:
+            if any(keyword in deadline["title"].lower() for keyword in DEADLINE_KEYWORDS):
+                relevant_deadlines.append(deadline)
+
+    # Determine urgency
+    if relevant_deadlines:
+        high_priority_count = sum(1 for d in relevant_deadlines if d["priority"] == "high")
+        if high_priority_count > 0:
+            urgency_level = "high"
+        elif len(relevant_deadlines) > 2:
+            urgency_level = "high"
+
+    return relevant_deadlines, urgency_level
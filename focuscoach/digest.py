@@ -0,0 +1,127 @@
+"""
+Reminder Digests
+Coalesces reminders that come due close together into one message per user.
+
+A task and three meetings inside an hour would otherwise mean one message per
+event per reminder offset. ``DigestCoalescer`` groups every notification for
+the same user whose fire time falls within ``window`` of the first one into a
+digest sent at that first fire time (never later than any reminder in it),
+lists each event once, and counts the outbound calls that saved.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Union
+
+from focuscoach.recurring import book_recurring, iter_due
+from focuscoach.reminder_render import ReminderRenderer, clock_label, time_until_buckets
+from focuscoach.reminders import ReminderBook, ReminderOffset, parse_reminder_offsets, reminder_offsets
+
+DEFAULT_DIGEST_WINDOW = timedelta(hours=1)
+
+DIGEST_TEMPLATE = """
+🧠 FocusCoach: {count} things coming up
+
+{lines}
+
+💡 **Gentle Tip**: One thing at a time - start with the first one.
+🎯 **Next**: {first}
+    """
+
+
+def event_notifications(user_id: Hashable, events: Iterable[Dict[str, Any]],
+                        reminder_times: Sequence[Union[str, ReminderOffset]]) -> Iterator[Dict[str, Any]]:
+    """One notification per event per offset, e.g. the Slack page's single reminder frequency"""
+    offsets = [(offset, offset.delta) for offset in parse_reminder_offsets(reminder_times)]
+    for event in events:
+        for offset, delta in offsets:
+            yield {"user_id": user_id, "event": event, "fire_at": event["start_time"] - delta, "offset": offset}
+
+
+def book_notifications(user_id: Hashable, book: ReminderBook, start: datetime,
+                       end: datetime) -> Iterator[Dict[str, Any]]:
+    """Notifications for a user's scheduled reminders that fire in ``[start, end)``.
+
+    Recurring reminders contribute every occurrence in the window.
+    """
+    for reminders in (book.task_reminders, book.meeting_reminders):
+        for reminder in reminders.values():
+            event = reminder.get("calendar_event")
+            if not event or reminder.get("status") == "cancelled" or reminder.get("recurrence"):
+                continue
+            for notification in event_notifications(user_id, [event], reminder_offsets(reminder)):
+                if start <= notification["fire_at"] < end:
+                    yield notification
+    yield from iter_due(book_recurring(user_id, book), start, end)
+
+
+class DigestCoalescer:
+    """Groups notifications per user within ``window`` and keeps a running count of calls saved"""
+
+    def __init__(self, window: timedelta = DEFAULT_DIGEST_WINDOW):
+        self.window = window
+        self.notifications = 0
+        self.messages = 0
+
+    @property
+    def calls_saved(self) -> int:
+        return self.notifications - self.messages
+
+    def coalesce(self, notifications: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return digests (``user_id``, ``fire_at``, ``events``, ``notifications``) in fire order"""
+        ordered = sorted(notifications, key=lambda item: (str(item["user_id"]), item["fire_at"]))
+        digests: List[Dict[str, Any]] = []
+        current: Optional[Dict[str, Any]] = None
+        for notification in ordered:
+            if (current is None or notification["user_id"] != current["user_id"]
+                    or notification["fire_at"] - current["fire_at"] > self.window):
+                current = {"user_id": notification["user_id"], "fire_at": notification["fire_at"],
+                           "events": {}, "notifications": 0}
+                digests.append(current)
+            event = notification["event"]
+            # Several offsets for one event inside the window collapse into a single line
+            current["events"].setdefault(event.get("uid") or (event["title"], event["start_time"]), event)
+            current["notifications"] += 1
+
+        for digest in digests:
+            digest["events"] = sorted(digest["events"].values(), key=lambda event: event["start_time"])
+        digests.sort(key=lambda digest: digest["fire_at"])
+        self.notifications += len(ordered)
+        self.messages += len(digests)
+        return digests
+
+
+def render_digest(digest: Dict[str, Any], renderer: Optional[ReminderRenderer] = None) -> str:
+    """Slack text for a digest: the usual reminder for one event, a compact list for several"""
+    renderer = renderer or ReminderRenderer()
+    events = digest["events"]
+    now = digest["fire_at"]
+    if len(events) == 1:
+        reminder = renderer.render(events[0], "upcoming", digest["user_id"], now)
+        out: List[str] = []
+        renderer.slack_into(out, events, [reminder])
+        return out[0]
+
+    wording = time_until_buckets([(event["start_time"] - now).total_seconds() for event in events])
+    lines = "\n".join(
+        f"• ⏰ {clock_label(event['start_time'])} **{event['title']}** "
+        f"({renderer.labels.get(event['type'], 'event')}) - in {until}"
+        for event, until in zip(events, wording)
+    )
+    return DIGEST_TEMPLATE.format(count=len(events), lines=lines, first=events[0]["title"])
+
+
+if __name__ == "__main__":
+    from focuscoach.calendar import get_calendar_events
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    events = get_calendar_events(now) + [
+        {"title": "Design review", "start_time": now + timedelta(hours=2, minutes=20),
+         "end_time": now + timedelta(hours=3), "type": "meeting", "priority": "medium"},
+        {"title": "Submit expenses", "start_time": now + timedelta(hours=2, minutes=45),
+         "end_time": now + timedelta(hours=2, minutes=45), "type": "task", "priority": "low"},
+    ]
+    coalescer = DigestCoalescer(timedelta(hours=1))
+    digests = coalescer.coalesce(event_notifications("sam", events, ["30 minutes before", "15 minutes before"]))
+    print(render_digest(digests[0]))
+    print(f"{coalescer.notifications} reminders -> {coalescer.messages} messages "
+          f"({coalescer.calls_saved} outbound calls saved)")
@@ -0,0 +1,397 @@
+"""
+Email Channel
+Email delivery for reminders and breakdown summaries over a pool of
+persistent, pipelined SMTP connections.
+
+``EmailTemplate`` builds the whole multipart/alternative message once with
+slots where per-message values go, so rendering a message is one join, one
+encode and the dot-stuffing pass. ``SMTPPool`` keeps connections open
+between batches and, when the server advertises PIPELINING (RFC 2920),
+sends each message's body together with the next message's MAIL/RCPT/DATA,
+so a message costs one round trip instead of four. ``EmailChannel`` plugs
+the pool into ``focuscoach.outbox`` as a channel sender.
+"""
+
+import asyncio
+import base64
+import email.utils
+import time
+import uuid
+from html import escape
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_SENDER = "FocusCoach <reminders@focuscoach.local>"
+
+_SLOT = "\x00"
+
+# (sender, recipients, message bytes)
+Envelope = Tuple[str, Sequence[str], bytes]
+
+
+class SMTPError(Exception):
+    """The server rejected a connection-level command (greeting, EHLO)"""
+
+
+def encode_header(text: str) -> str:
+    """RFC 2047 encoded words for non-ASCII header text, folded so each line stays short"""
+    if text.isascii():
+        return text
+    words, chunk = [], ""
+    for char in text:
+        # 45 bytes of UTF-8 keep each base64 encoded word under the 75-character limit
+        if len((chunk + char).encode("utf-8")) > 45:
+            words.append(chunk)
+            chunk = ""
+        chunk += char
+    words.append(chunk)
+    return "\r\n ".join(f"=?utf-8?b?{base64.b64encode(word.encode('utf-8')).decode('ascii')}?=" for word in words)
+
+
+def encode_address(address: str) -> str:
+    """An address header value with only the display name encoded"""
+    return email.utils.formataddr(email.utils.parseaddr(address), charset="utf-8")
+
+
+class EmailTemplate:
+    """A message skeleton with ``{field}`` slots in the subject, text and HTML parts.
+
+    Field values are HTML-escaped in the HTML part; the subject is encoded
+    as a whole per message since RFC 2047 words cannot be spliced.
+    """
+
+    def __init__(self, subject: str, text: str, html: Optional[str] = None, sender: str = DEFAULT_SENDER):
+        self.subject = subject
+        self.sender = sender
+        self.sender_address = email.utils.parseaddr(sender)[1]
+        self.boundary = f"=_focuscoach_{uuid.uuid4().hex}"
+        head = (f"From: {encode_address(sender)}\r\nTo: {_SLOT}to{_SLOT}\r\n"
+                f"Subject: {_SLOT}subject{_SLOT}\r\nDate: {_SLOT}date{_SLOT}\r\n"
+                f"Message-ID: {_SLOT}message_id{_SLOT}\r\nMIME-Version: 1.0\r\n")
+        text_part = ("Content-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: 8bit\r\n\r\n"
+                     + _crlf(text).format_map(_Slots("text:")))
+        if html is None:
+            skeleton = head + text_part + "\r\n"
+        else:
+            html_part = ("Content-Type: text/html; charset=utf-8\r\nContent-Transfer-Encoding: 8bit\r\n\r\n"
+                         + _crlf(html).format_map(_Slots("html:")))
+            skeleton = (head + f'Content-Type: multipart/alternative; boundary="{self.boundary}"\r\n\r\n'
+                        f"--{self.boundary}\r\n{text_part}\r\n--{self.boundary}\r\n{html_part}\r\n"
+                        f"--{self.boundary}--\r\n")
+        # Even indexes are literal text, odd ones slot names
+        self._parts = skeleton.split(_SLOT)
+        self.fields = sorted({name.split(":", 1)[-1] for name in self._parts[1::2]} - {"to", "date", "message_id"})
+
+    def render(self, to: str, fields: Dict[str, Any], message_id: Optional[str] = None,
+               date: Optional[str] = None) -> bytes:
+        """The complete message, CRLF line endings and dot-stuffed, ready for DATA"""
+        values = {"to": encode_address(to), "subject": encode_header(self.subject.format_map(fields)),
+                  "date": date or _date_header(), "message_id": message_id or email.utils.make_msgid("focuscoach")}
+        parts = self._parts[:]
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            if name in values:
+                parts[index] = values[name]
+            elif name.startswith("html:"):
+                parts[index] = escape(str(fields[name[5:]]), quote=False).replace("\n", "<br>")
+            else:
+                parts[index] = _crlf(str(fields[name[5:]]))
+        return "".join(parts).encode("utf-8").replace(b"\r\n.", b"\r\n..")
+
+
+class _Slots(dict):
+    """format_map target that turns every ``{name}`` into a prefixed slot marker"""
+
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+    def __missing__(self, key: str) -> str:
+        return f"{_SLOT}{self.prefix}{key}{_SLOT}"
+
+
+def _crlf(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\n", "\r\n")
+
+
+_date_cache: List[Any] = [None, ""]
+
+
+def _date_header() -> str:
+    # Formatting the Date header is surprisingly slow; one per second is plenty
+    second = int(time.time())
+    if _date_cache[0] != second:
+        _date_cache[:] = [second, email.utils.formatdate(second, localtime=True)]
+    return _date_cache[1]
+
+
+REMINDER_EMAIL = EmailTemplate(
+    subject="⏰ {title} at {time}",
+    text="{reminder}\n\n📅 Event: {title}\n⏰ Time: {time}\n📊 Priority: {priority}\n\n"
+         "💡 Gentle Tip: Take a moment to prepare - you've got this!\n",
+    html="<p>{reminder}</p><ul><li>📅 <strong>Event</strong>: {title}</li><li>⏰ <strong>Time</strong>: {time}</li>"
+         "<li>📊 <strong>Priority</strong>: {priority}</li></ul>"
+         "<p>💡 Take a moment to prepare - you've got this!</p>\n",
+)
+
+BREAKDOWN_EMAIL = EmailTemplate(
+    subject="📝 Your plan for {task}",
+    text="Here's your step-by-step plan for: {task}\n\n{steps}\n\n{encouragement}\n",
+    html="<h3>Your plan for {task}</h3><p>{steps}</p><p><em>{encouragement}</em></p>\n",
+)
+
+NOTICE_EMAIL = EmailTemplate(subject="🧠 {subject}", text="{text}\n", html="<p>{text}</p>\n")
+
+TEMPLATES = {"reminder": REMINDER_EMAIL, "breakdown": BREAKDOWN_EMAIL, "notice": NOTICE_EMAIL}
+
+
+def reminder_email_fields(event: Dict[str, Any], reminder: str) -> Dict[str, str]:
+    from focuscoach.reminder_render import clock_label
+
+    return {"title": event["title"], "time": clock_label(event["start_time"]),
+            "priority": str(event.get("priority", "medium")).title(), "reminder": reminder}
+
+
+def breakdown_email_fields(task: str, breakdown: Dict[str, Any]) -> Dict[str, str]:
+    steps = "\n".join(f"{index}. {step.get('description', '')} ({step.get('estimated_time', '15')} min)"
+                      for index, step in enumerate(breakdown.get("steps", []), 1))
+    return {"task": task, "steps": steps, "encouragement": breakdown.get("encouragement", "")}
+
+
+class _SMTPConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.extensions: Dict[str, str] = {}
+        self.sent = 0
+
+    async def reply(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = (await asyncio.wait_for(self.reader.readline(), self.timeout)).decode("utf-8", "replace")
+            line = line.rstrip("\r\n")
+            if not line:
+                raise ConnectionError("connection closed by server")
+            lines.append(line[4:])
+            if line[3:4] != "-":
+                return int(line[:3]), "\n".join(lines)
+
+    @property
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+def _commands(sender: str, recipients: Sequence[str]) -> bytes:
+    return "".join([f"MAIL FROM:<{sender}> BODY=8BITMIME\r\n"] + [f"RCPT TO:<{rcpt}>\r\n" for rcpt in recipients]
+                   + ["DATA\r\n"]).encode("utf-8")
+
+
+class SMTPPool:
+    """Persistent SMTP connections to one relay; batches are split across them and pipelined.
+
+    ``send_many`` returns one error string (``None`` on success) per
+    envelope. ``timeout`` applies to each server reply, not to a whole
+    batch. Connections are recycled after ``max_messages`` messages.
+    """
+
+    def __init__(self, host: str, port: int = 25, size: int = 4, helo: str = "focuscoach.local",
+                 connect_timeout: float = 10.0, timeout: float = 30.0, max_messages: int = 10000,
+                 pipelining: bool = True):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.helo = helo
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.pipelining = pipelining
+        self.opened = 0
+        self._idle: List[_SMTPConnection] = []
+
+    async def _connect(self) -> _SMTPConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable:
+                return connection
+            connection.close()
+
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        connection = _SMTPConnection(reader, writer, self.timeout)
+        self.opened += 1
+        code, text = await connection.reply()
+        if code != 220:
+            connection.close()
+            raise SMTPError(f"greeting {code} {text}")
+        writer.write(f"EHLO {self.helo}\r\n".encode("ascii"))
+        code, text = await connection.reply()
+        if code != 250:
+            connection.close()
+            raise SMTPError(f"EHLO {code} {text}")
+        for line in text.split("\n")[1:]:
+            name, _, value = line.partition(" ")
+            connection.extensions[name.upper()] = value
+        return connection
+
+    def _release(self, connection: _SMTPConnection):
+        if connection.usable and connection.sent < self.max_messages and len(self._idle) < self.size:
+            self._idle.append(connection)
+        else:
+            if connection.usable:
+                connection.writer.write(b"QUIT\r\n")
+            connection.close()
+
+    async def _envelope_replies(self, connection: _SMTPConnection, recipients: Sequence[str]) -> Optional[str]:
+        """Read the MAIL, RCPT and DATA replies; returns an error, or None when DATA was accepted"""
+        code, text = await connection.reply()
+        error = None if code == 250 else f"MAIL {code} {text}"
+        rejected = []
+        for rcpt in recipients:
+            code, text = await connection.reply()
+            if code >= 400:
+                rejected.append(f"{rcpt}: {code} {text}")
+        code, text = await connection.reply()
+        if code != 354:
+            return error or "; ".join(rejected) or f"DATA {code} {text}"
+        return None
+
+    async def _send_on(self, connection: _SMTPConnection, envelopes: Sequence[Envelope],
+                       errors: List[Optional[str]]):
+        """Send ``envelopes``, appending each one's result to ``errors`` as its final reply arrives"""
+        pipelined = self.pipelining and "PIPELINING" in connection.extensions
+        writer = connection.writer
+        if pipelined:
+            # Body of message i goes out with the commands for message i + 1
+            writer.write(_commands(envelopes[0][0], envelopes[0][1]))
+            for index, (_, recipients, data) in enumerate(envelopes):
+                error = await self._envelope_replies(connection, recipients)
+                following = envelopes[index + 1] if index + 1 < len(envelopes) else None
+                # A rejected envelope leaves a half-open transaction behind; RSET clears it
+                chunk = data + b".\r\n" if error is None else b"RSET\r\n"
+                if following is not None:
+                    chunk += _commands(following[0], following[1])
+                writer.write(chunk)
+                code, text = await connection.reply()
+                if error is None and code != 250:
+                    error = f"{code} {text}"
+                errors.append(error)
+                connection.sent += 1
+        else:
+            for sender, recipients, data in envelopes:
+                writer.write(f"MAIL FROM:<{sender}> BODY=8BITMIME\r\n".encode("utf-8"))
+                code, text = await connection.reply()
+                if code != 250:
+                    errors.append(f"MAIL {code} {text}")
+                    writer.write(b"RSET\r\n")
+                    await connection.reply()
+                    continue
+                accepted = 0
+                for rcpt in recipients:
+                    writer.write(f"RCPT TO:<{rcpt}>\r\n".encode("utf-8"))
+                    code, text = await connection.reply()
+                    accepted += code < 400
+                if not accepted:
+                    errors.append(f"RCPT {code} {text}")
+                    writer.write(b"RSET\r\n")
+                    await connection.reply()
+                    continue
+                writer.write(b"DATA\r\n")
+                code, text = await connection.reply()
+                if code != 354:
+                    errors.append(f"DATA {code} {text}")
+                    writer.write(b"RSET\r\n")
+                    await connection.reply()
+                    continue
+                writer.write(data + b".\r\n")
+                code, text = await connection.reply()
+                errors.append(None if code == 250 else f"{code} {text}")
+                connection.sent += 1
+
+    async def _send_slice(self, envelopes: Sequence[Envelope]) -> List[Optional[str]]:
+        try:
+            connection = await self._connect()
+        except (OSError, asyncio.TimeoutError, SMTPError) as error:
+            return [f"connect: {error}"] * len(envelopes)
+        errors: List[Optional[str]] = []
+        try:
+            await self._send_on(connection, envelopes, errors)
+        except (OSError, asyncio.TimeoutError, ConnectionError, ValueError) as error:
+            connection.close()
+            # Messages with a final reply keep their result; only the rest are retried by the outbox
+            return errors + [f"transport: {error!r}"] * (len(envelopes) - len(errors))
+        self._release(connection)
+        return errors
+
+    async def send_many(self, envelopes: Sequence[Envelope]) -> List[Optional[str]]:
+        if not envelopes:
+            return []
+        lanes = min(self.size, len(envelopes))
+        step = -(-len(envelopes) // lanes)
+        slices = [envelopes[start:start + step] for start in range(0, len(envelopes), step)]
+        results = await asyncio.gather(*(self._send_slice(part) for part in slices))
+        return [error for part in results for error in part]
+
+    async def aclose(self):
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable:
+                connection.writer.write(b"QUIT\r\n")
+            connection.close()
+
+
+class EmailChannel:
+    """Outbox channel sender: payloads name a template, a recipient and the template fields.
+
+    The outbox idempotency key becomes the Message-ID, so a retried message
+    is recognisable as a duplicate downstream.
+    """
+
+    def __init__(self, pool: SMTPPool, templates: Dict[str, EmailTemplate] = None):
+        self.pool = pool
+        self.templates = TEMPLATES if templates is None else templates
+
+    def envelopes(self, messages: List[Dict[str, Any]]) -> List[Envelope]:
+        envelopes = []
+        for message in messages:
+            payload = message["payload"]
+            template = self.templates[payload["template"]]
+            data = template.render(payload["to"], payload["fields"], f"<{message['key']}@focuscoach>")
+            envelopes.append((template.sender_address, [email.utils.parseaddr(payload["to"])[1]], data))
+        return envelopes
+
+    async def send(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        return await self.pool.send_many(self.envelopes(messages))
+
+    def __call__(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        from focuscoach.providers import run_sync
+
+        return run_sync(self.send(messages))
+
+
+if __name__ == "__main__":
+    from focuscoach.breakdown import demo_task_breakdown
+    from focuscoach.calendar import create_encouraging_reminder, get_calendar_events
+    from focuscoach.fake_smtp_server import FakeSMTPServer
+
+    async def demo():
+        server = await FakeSMTPServer(keep_messages=True, reject={"nobody@example.com"}).start()
+        pool = SMTPPool(*server.address, size=2)
+        event = get_calendar_events()[0]
+        task = "Prepare quarterly report"
+        envelopes = [
+            ("reminders@focuscoach.local", ["sam@example.com"],
+             REMINDER_EMAIL.render("sam@example.com", reminder_email_fields(event, create_encouraging_reminder(event)))),
+            ("reminders@focuscoach.local", ["nobody@example.com"],
+             REMINDER_EMAIL.render("nobody@example.com", reminder_email_fields(event, "Coming up"))),
+            ("reminders@focuscoach.local", ["sam@example.com"],
+             BREAKDOWN_EMAIL.render("sam@example.com", breakdown_email_fields(task, demo_task_breakdown(task)))),
+        ]
+        print(f"Results: {await pool.send_many(envelopes)}")
+        print(f"Connections: {pool.opened}, messages accepted: {server.messages}")
+        print(server.received[0].decode("utf-8")[:700])
+        await pool.aclose()
+        await server.stop()
+
+    asyncio.run(demo())
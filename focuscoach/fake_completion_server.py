@@ -0,0 +1,147 @@
+"""
+Fake Completion Server for FocusCoach
+Local OpenAI-compatible streaming endpoint for exercising the LLM breakdown provider
+"""
+
+import asyncio
+import json
+from typing import List, Optional
+
+DEFAULT_ANSWER = """1. Open a blank document and write the task name at the top | 5 | Starting is the hardest part
+2. List everything the task involves | 10 | Messy bullet points are fine
+3. Pick the smallest item and do it | 15 | Use a timer so you know when to stop
+4. Take a short movement break | 5 | Stretch or grab some water
+5. Review what you finished | 5 | Celebrate every item you crossed off
+TECHNIQUE: Pomodoro technique
+ACCOMMODATION: Noise-cancelling headphones
+SENSORY: Soft, natural lighting
+ENCOURAGEMENT: You're making real progress, one small step at a time."""
+
+
+class FakeCompletionServer:
+    """Minimal HTTP/1.1 keep-alive server that streams chat completions as SSE.
+
+    ``first_token_delay`` and ``token_delay`` simulate a slow model so latency
+    budgets and fallbacks can be exercised; ``status`` forces error responses.
+    """
+
+    def __init__(self, answer: str = DEFAULT_ANSWER, first_token_delay: float = 0.0,
+                 token_delay: float = 0.0, status: int = 200):
+        self.answer = answer
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.status = status
+        self.requests = 0
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _tokens(self) -> List[str]:
+        # Split on spaces but keep them, like a tokenizer emitting word pieces
+        words = self.answer.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+                await self._respond(writer, json.loads(body or b"{}"))
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Clients going away and server shutdown are both routine here
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, payload: dict):
+        if self.status != 200:
+            body = json.dumps({"error": {"message": "fake failure"}}).encode()
+            writer.write(
+                f"HTTP/1.1 {self.status} Error\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n"
+        )
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+
+        for token in self._tokens():
+            event = {"choices": [{"index": 0, "delta": {"content": token}}], "model": payload.get("model")}
+            self._write_chunk(writer, b"data: " + json.dumps(event).encode() + b"\n\n")
+            await writer.drain()
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+if __name__ == "__main__":
+    # Exercise the provider chain against the fake server
+    from focuscoach.providers import (CachedBreakdownProvider, LLMBreakdownProvider,
+                                      SemanticResponseCache, TemplateBreakdownProvider)
+
+    def template(task, user_context="", gmail_address=None):
+        return {"steps": [{"description": f"Start with: {task}", "estimated_time": "15", "tips": "Go gently"}]}
+
+    async def demo():
+        server = await FakeCompletionServer(token_delay=0.001).start()
+        llm = LLMBreakdownProvider(server.url, api_key="test")
+
+        print("Streaming steps:")
+        async for step in llm.astream_steps("Write a report"):
+            print(f"  {step['description']} ({step['estimated_time']} min)")
+
+        provider = CachedBreakdownProvider(llm, TemplateBreakdownProvider(template), SemanticResponseCache())
+        first = await provider.abreakdown("Write my quarterly report")
+        second = await provider.abreakdown("quarterly reports write")
+        print(f"First source: {first['source']}, second source: {second['source']}")
+        print(f"Requests: {server.requests}, connections opened: {llm.connections_opened}")
+
+        slow = await FakeCompletionServer(first_token_delay=1.0).start()
+        budgeted = CachedBreakdownProvider(LLMBreakdownProvider(slow.url), TemplateBreakdownProvider(template),
+                                           latency_budget=0.2)
+        fallback = await budgeted.abreakdown("Write a report")
+        print(f"Over budget -> source: {fallback['source']}")
+
+        await llm.aclose()
+        await budgeted.aclose()
+        await server.stop()
+        await slow.stop()
+
+    asyncio.run(demo())
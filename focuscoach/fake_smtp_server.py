@@ -0,0 +1,148 @@
+"""
+Fake SMTP Server for FocusCoach
+Local SMTP sink (ESMTP with PIPELINING) for exercising the email reminder channel
+"""
+
+import asyncio
+from typing import List, Optional, Set
+
+
+class _SinkProtocol(asyncio.Protocol):
+    """Parses pipelined commands and message data from each chunk, replies after ``latency``.
+
+    Replies for everything that arrived in one chunk go out together after
+    the delay, so each client round trip costs one ``latency`` regardless of
+    how many commands it pipelined.
+    """
+
+    def __init__(self, server: "FakeSMTPServer"):
+        self.server = server
+        self.buffer = b""
+        self.in_data = False
+        self.accepted_rcpt = 0
+        self.transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+        transport.write(b"220 focuscoach.sink ESMTP ready\r\n")
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        replies = []
+        while True:
+            if self.in_data:
+                end = self.buffer.find(b"\r\n.\r\n")
+                if end < 0:
+                    break
+                message = self.buffer[:end + 2]
+                self.buffer = self.buffer[end + 5:]
+                self.in_data = False
+                self.server.messages += 1
+                self.server.bytes_received += len(message)
+                if self.server.keep_messages:
+                    self.server.received.append(message.replace(b"\r\n..", b"\r\n."))
+                replies.append(b"250 2.0.0 queued")
+                continue
+
+            end = self.buffer.find(b"\r\n")
+            if end < 0:
+                break
+            line = self.buffer[:end].decode("utf-8", "replace")
+            self.buffer = self.buffer[end + 2:]
+            replies.append(self.command(line))
+            if self.transport.is_closing():
+                return
+
+        if replies:
+            payload = b"".join(reply + b"\r\n" for reply in replies)
+            if self.server.latency:
+                asyncio.get_running_loop().call_later(self.server.latency, self._write, payload)
+            else:
+                self.transport.write(payload)
+
+    def _write(self, payload: bytes):
+        if not self.transport.is_closing():
+            self.transport.write(payload)
+
+    def command(self, line: str) -> bytes:
+        verb = line[:4].upper()
+        self.server.commands += 1
+        if verb == "EHLO":
+            extensions = ["250-focuscoach.sink", "250-8BITMIME", "250-SIZE 10485760"]
+            if self.server.pipelining:
+                extensions.append("250-PIPELINING")
+            return ("\r\n".join(extensions) + "\r\n250 SMTPUTF8").encode("ascii")
+        if verb == "HELO":
+            return b"250 focuscoach.sink"
+        if verb == "MAIL":
+            self.accepted_rcpt = 0
+            return b"250 2.1.0 ok"
+        if verb == "RCPT":
+            address = line[line.find("<") + 1:line.rfind(">")]
+            if address in self.server.reject:
+                return b"550 5.1.1 no such user"
+            self.accepted_rcpt += 1
+            return b"250 2.1.5 ok"
+        if verb == "DATA":
+            if not self.accepted_rcpt:
+                return b"554 5.5.1 no valid recipients"
+            self.in_data = True
+            return b"354 end data with <CR><LF>.<CR><LF>"
+        if verb == "RSET":
+            self.accepted_rcpt = 0
+            return b"250 2.0.0 ok"
+        if verb == "NOOP":
+            return b"250 2.0.0 ok"
+        if verb == "QUIT":
+            self.transport.write(b"221 2.0.0 bye\r\n")
+            self.transport.close()
+            return b""
+        return b"502 5.5.2 command not implemented"
+
+
+class FakeSMTPServer:
+    """Accepts and counts mail; ``latency`` simulates the network round trip per client flush.
+
+    ``reject`` lists recipient addresses answered with 550, and
+    ``pipelining=False`` stops advertising PIPELINING.
+    """
+
+    def __init__(self, latency: float = 0.0, reject: Set[str] = None, pipelining: bool = True,
+                 keep_messages: bool = False):
+        self.latency = latency
+        self.reject = reject or set()
+        self.pipelining = pipelining
+        self.keep_messages = keep_messages
+        self.connections = 0
+        self.commands = 0
+        self.messages = 0
+        self.bytes_received = 0
+        self.received: List[bytes] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeSMTPServer":
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _SinkProtocol(self), host, port)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+if __name__ == "__main__":
+    async def main():
+        server = await FakeSMTPServer().start()
+        host, port = server.address
+        print(f"SMTP sink listening on {host}:{port} (Ctrl-C to stop)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
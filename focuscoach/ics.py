@@ -0,0 +1,452 @@
+"""
+ICS Import
+Streaming iCalendar (.ics) reader that turns VEVENTs into FocusCoach calendar
+events for a time window.
+
+The file is read line by line: single events outside the window are dropped
+as soon as they are parsed, and recurring series keep only their own
+properties until the end of the file, when their RRULE is expanded lazily
+inside the window. Memory therefore grows with the number of recurring
+series, not with the size of the export.
+
+Supported RRULE parts: FREQ (DAILY/WEEKLY/MONTHLY/YEARLY), INTERVAL, COUNT,
+UNTIL, BYDAY (with ordinals for monthly rules), BYMONTHDAY, BYMONTH and WKST.
+Other parts (BYSETPOS, BYWEEKNO, BYYEARDAY, ...) are ignored.
+"""
+
+import io
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9: TZID-qualified times are read as local time
+    ZoneInfo = None
+
+# Only these properties are kept per VEVENT; everything else is skipped unparsed
+KEPT_PROPERTIES = {
+    "UID", "SUMMARY", "DTSTART", "DTEND", "DURATION", "RRULE", "EXDATE",
+    "RECURRENCE-ID", "STATUS", "CATEGORIES", "PRIORITY", "LOCATION",
+}
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+# Keywords that map an event's summary or categories onto FocusCoach event types
+EVENT_TYPE_KEYWORDS = [
+    ("deadline", ("deadline", "due", "submit", "filing")),
+    ("focus", ("focus", "deep work", "heads down", "study")),
+    ("presentation", ("presentation", "present", "demo", "pitch", "talk")),
+]
+
+# Series whose rule can never match (e.g. BYMONTHDAY=30 with BYMONTH=2) stop after this many empty periods
+MAX_EMPTY_PERIODS = 1000
+
+Props = Dict[str, Any]
+
+
+@contextmanager
+def open_ics(source) -> Iterator[io.TextIOBase]:
+    """Open a path, or wrap a text/binary file object (e.g. a Streamlit upload), as text lines"""
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, encoding="utf-8", errors="replace", newline="") as handle:
+            yield handle
+        return
+    if isinstance(source.read(0), bytes):
+        wrapper = io.TextIOWrapper(source, encoding="utf-8", errors="replace", newline="")
+        try:
+            yield wrapper
+        finally:
+            # Leave the caller's buffer open
+            wrapper.detach()
+        return
+    yield source
+
+
+def unfold_lines(stream) -> Iterator[str]:
+    """Yield logical content lines, joining RFC 5545 folded continuation lines"""
+    pending = None
+    for raw in stream:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def iter_vevents(lines: Iterator[str]) -> Iterator[Props]:
+    """Yield each VEVENT as {property: (params, value)}; EXDATE holds a list of those pairs"""
+    event = None
+    nested = 0  # components inside the VEVENT, such as VALARM
+    for line in lines:
+        if event is None:
+            if line.upper() == "BEGIN:VEVENT":
+                event = {}
+            continue
+        head, _, value = line.partition(":")
+        name, _, params = head.partition(";")
+        name = name.upper()
+        if name == "BEGIN":
+            nested += 1
+        elif name == "END":
+            if nested:
+                nested -= 1
+            else:
+                yield event
+                event = None
+        elif not nested and name in KEPT_PROPERTIES:
+            if name == "EXDATE":
+                event.setdefault(name, []).append((params, value))
+            else:
+                event[name] = (params, value)
+
+
+def _param(params: str, key: str) -> Optional[str]:
+    for part in params.split(";"):
+        name, _, value = part.partition("=")
+        if name.upper() == key:
+            return value.strip('"')
+    return None
+
+
+def _unescape(text: str) -> str:
+    return text.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+_zones: Dict[str, Optional[tzinfo]] = {}
+
+
+def _zone(tzid: str) -> Optional[tzinfo]:
+    if tzid not in _zones:
+        try:
+            _zones[tzid] = ZoneInfo(tzid) if ZoneInfo else None
+        except (ZoneInfoNotFoundError, ValueError):
+            _zones[tzid] = None
+    return _zones[tzid]
+
+
+def parse_ics_datetime(value: str, params: str = "") -> Tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME value into (datetime in its own zone, is_all_day).
+
+    UTC and TZID times come back timezone-aware so recurrences keep their wall
+    clock across DST changes; floating times and dates come back naive.
+    """
+    value = value.strip()
+    if len(value) == 8:
+        return datetime(int(value[:4]), int(value[4:6]), int(value[6:8])), True
+    parsed = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                      int(value[9:11]), int(value[11:13]), int(value[13:15] or 0))
+    if value.endswith("Z"):
+        return parsed.replace(tzinfo=timezone.utc), False
+    tzid = _param(params, "TZID") if params else None
+    zone = _zone(tzid) if tzid else None
+    return (parsed.replace(tzinfo=zone) if zone else parsed), False
+
+
+def _datetime_property(pair: Tuple[str, str]) -> Tuple[datetime, bool]:
+    params, value = pair
+    return parse_ics_datetime(value, params)
+
+
+def to_local(moment: datetime) -> datetime:
+    """Naive local time, matching the ``datetime.now()`` the rest of the app compares against"""
+    return moment.astimezone().replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def _in_frame(moment: datetime, reference: datetime) -> datetime:
+    """Express a naive local ``moment`` in ``reference``'s timezone frame"""
+    return moment.astimezone(reference.tzinfo) if reference.tzinfo else moment
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parse an RFC 5545 DURATION such as ``PT1H30M``, ``P1D`` or ``-P2W``"""
+    sign = -1 if value.startswith("-") else 1
+    amounts = {"W": 0, "D": 0, "H": 0, "M": 0, "S": 0}
+    number = ""
+    for char in value.lstrip("+-"):
+        if char.isdigit():
+            number += char
+        elif char in amounts:
+            amounts[char] = int(number or 0)
+            number = ""
+    return sign * timedelta(weeks=amounts["W"], days=amounts["D"], hours=amounts["H"],
+                            minutes=amounts["M"], seconds=amounts["S"])
+
+
+class UnsupportedRule(ValueError):
+    """A well-formed RRULE with a FREQ this module does not expand (sub-daily)"""
+
+
+class RecurrenceRule:
+    """The parts of an RRULE this module understands; raises ValueError for malformed parts"""
+
+    def __init__(self, text: str):
+        parts = dict(part.split("=", 1) for part in text.upper().split(";") if "=" in part)
+        self.freq = parts.get("FREQ", "DAILY")
+        if self.freq not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY"):
+            raise UnsupportedRule(f"unsupported FREQ {self.freq}")
+        self.interval = max(1, int(parts.get("INTERVAL", "1")))
+        self.count = int(parts["COUNT"]) if "COUNT" in parts else None
+        # The last instant UNTIL allows, in its own zone (an all-day UNTIL covers that whole day)
+        self.until: Optional[datetime] = None
+        if "UNTIL" in parts:
+            until, all_day = parse_ics_datetime(parts["UNTIL"])
+            self.until = until + timedelta(days=1, microseconds=-1) if all_day else until
+        self.wkst = WEEKDAYS.get(parts.get("WKST", "MO"), 0)
+        self.bymonth = [int(month) for month in parts["BYMONTH"].split(",")] if "BYMONTH" in parts else []
+        self.bymonthday = [int(day) for day in parts["BYMONTHDAY"].split(",")] if "BYMONTHDAY" in parts else []
+        self.byday: List[Tuple[Optional[int], int]] = []
+        for item in parts.get("BYDAY", "").split(","):
+            if item[-2:] in WEEKDAYS:
+                ordinal = item[:-2]
+                self.byday.append((int(ordinal) if ordinal not in ("", "+", "-") else None, WEEKDAYS[item[-2:]]))
+
+
+def _days_in_month(year: int, month: int) -> int:
+    return (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).day
+
+
+def _month_days(year: int, month: int, rule: RecurrenceRule, default_day: int) -> List[int]:
+    last = _days_in_month(year, month)
+    monthdays = {day if day > 0 else last + day + 1 for day in rule.bymonthday}
+    monthdays = {day for day in monthdays if 1 <= day <= last}
+
+    weekdays = set()
+    first_weekday = date(year, month, 1).weekday()
+    for ordinal, weekday in rule.byday:
+        matches = list(range((weekday - first_weekday) % 7 + 1, last + 1, 7))
+        if ordinal is None:
+            weekdays.update(matches)
+        elif 0 < abs(ordinal) <= len(matches):
+            weekdays.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+
+    if rule.bymonthday and rule.byday:
+        return sorted(monthdays & weekdays)
+    if rule.bymonthday or rule.byday:
+        return sorted(monthdays | weekdays)
+    return [default_day] if default_day <= last else []
+
+
+def _period_starts(rule: RecurrenceRule, dtstart: datetime, period: int) -> List[datetime]:
+    """Candidate occurrence starts in the ``period``-th FREQ period of the series, in order"""
+    step = period * rule.interval
+    if rule.freq == "DAILY":
+        day = dtstart + timedelta(days=step)
+        if rule.bymonth and day.month not in rule.bymonth:
+            return []
+        if rule.byday and day.weekday() not in {weekday for _, weekday in rule.byday}:
+            return []
+        return [day]
+
+    if rule.freq == "WEEKLY":
+        week_start = dtstart - timedelta(days=(dtstart.weekday() - rule.wkst) % 7) + timedelta(weeks=step)
+        offsets = sorted({(weekday - rule.wkst) % 7 for _, weekday in rule.byday}) or \
+            [(dtstart.weekday() - rule.wkst) % 7]
+        return [week_start + timedelta(days=offset) for offset in offsets]
+
+    if rule.freq == "MONTHLY":
+        year, month = divmod(dtstart.year * 12 + dtstart.month - 1 + step, 12)
+        months = [month + 1] if not rule.bymonth or month + 1 in rule.bymonth else []
+    else:  # YEARLY
+        year = dtstart.year + step
+        # BYMONTHDAY or BYDAY without BYMONTH apply to every month of the year
+        months = rule.bymonth or (list(range(1, 13)) if rule.byday or rule.bymonthday else [dtstart.month])
+    return [dtstart.replace(year=year, month=month, day=day)
+            for month in months for day in _month_days(year, month, rule, dtstart.day)]
+
+
+def _periods_before(rule: RecurrenceRule, dtstart: datetime, moment: datetime) -> int:
+    """Whole periods that can be skipped before ``moment`` (one period of slack)"""
+    if rule.freq == "DAILY":
+        units = (moment.date() - dtstart.date()).days
+    elif rule.freq == "WEEKLY":
+        units = (moment.date() - dtstart.date()).days // 7
+    elif rule.freq == "MONTHLY":
+        units = (moment.year - dtstart.year) * 12 + moment.month - dtstart.month
+    else:
+        units = moment.year - dtstart.year
+    return max(0, units // rule.interval - 1)
+
+
+def expand_rrule(dtstart: datetime, rule: RecurrenceRule, window_start: datetime, window_end: datetime,
+                 duration: timedelta = timedelta(0)) -> Iterator[datetime]:
+    """Lazily yield occurrence starts (in ``dtstart``'s zone) overlapping the local window.
+
+    Without COUNT the expansion jumps straight to the window, so a daily series
+    with ten years of history costs the same as one that started last week.
+    """
+    start_frame = _in_frame(window_start - duration, dtstart)
+    end_frame = _in_frame(window_end, dtstart)
+    until = rule.until
+    if until is not None:
+        if until.tzinfo and not dtstart.tzinfo:
+            until = to_local(until)
+        elif dtstart.tzinfo and not until.tzinfo:
+            until = until.replace(tzinfo=dtstart.tzinfo)
+
+    # COUNT has to be counted from the first occurrence, so only jump ahead without it
+    period = _periods_before(rule, dtstart, start_frame) if rule.count is None else 0
+    generated = 0
+    empty_periods = 0
+    while empty_periods < MAX_EMPTY_PERIODS:
+        candidates = _period_starts(rule, dtstart, period)
+        period += 1
+        empty_periods = 0 if candidates else empty_periods + 1
+        for start in candidates:
+            if start < dtstart:
+                continue
+            if (until is not None and start > until) or start >= end_frame:
+                return
+            generated += 1
+            if rule.count is not None and generated > rule.count:
+                return
+            if start > start_frame:
+                yield start
+
+
+def classify_event(summary: str, categories: str = "") -> str:
+    """Map a calendar entry onto the FocusCoach event types used for reminders"""
+    text = f"{summary} {categories}".lower()
+    for event_type, keywords in EVENT_TYPE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return event_type
+    return "meeting"
+
+
+def _priority(props: Props) -> str:
+    # RFC 5545: 1-4 high, 5 medium, 6-9 low, 0 or missing undefined
+    value = props.get("PRIORITY", ("", "0"))[1].strip()
+    level = int(value) if value.isdigit() else 0
+    if 1 <= level <= 4:
+        return "high"
+    if level >= 6:
+        return "low"
+    return "medium"
+
+
+def _event(props: Props, start: datetime, duration: timedelta) -> Dict[str, Any]:
+    summary = _unescape(props.get("SUMMARY", ("", ""))[1]) or "(untitled)"
+    categories = _unescape(props.get("CATEGORIES", ("", ""))[1])
+    return {
+        "title": summary,
+        "start_time": start,
+        "end_time": start + duration,
+        "type": classify_event(summary, categories),
+        "priority": _priority(props),
+        "uid": props.get("UID", ("", ""))[1],
+        "location": _unescape(props.get("LOCATION", ("", ""))[1]),
+        "source": "ics",
+    }
+
+
+def _timing(props: Props) -> Tuple[datetime, timedelta]:
+    start, all_day = _datetime_property(props["DTSTART"])
+    if "DTEND" in props:
+        end, _ = _datetime_property(props["DTEND"])
+        if end.tzinfo and not start.tzinfo:
+            end = to_local(end)
+        elif start.tzinfo and not end.tzinfo:
+            end = end.replace(tzinfo=start.tzinfo)
+        return start, max(end - start, timedelta(0))
+    if "DURATION" in props:
+        return start, parse_duration(props["DURATION"][1])
+    return start, timedelta(days=1) if all_day else timedelta(0)
+
+
+def iter_calendar_events(source, window_start: Optional[datetime] = None,
+                         window_end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Stream events from an .ics path or file object that overlap the window.
+
+    The window defaults to the next 30 days. Single events are yielded while
+    the file is read; recurring series follow once the file is done, so their
+    moved or cancelled instances (RECURRENCE-ID) are known. Order is not sorted.
+    """
+    window_start = window_start or datetime.now()
+    window_end = window_end or window_start + timedelta(days=30)
+    series: List[Tuple[Props, datetime, timedelta, Optional[RecurrenceRule]]] = []
+    replaced: Dict[str, Set[datetime]] = {}
+
+    with open_ics(source) as stream:
+        for props in iter_vevents(unfold_lines(stream)):
+            if "DTSTART" not in props:
+                continue
+            try:
+                start, duration = _timing(props)
+                if "RECURRENCE-ID" in props:
+                    # An edited or cancelled instance of a series; the series skips this slot
+                    instance, _ = _datetime_property(props["RECURRENCE-ID"])
+                    replaced.setdefault(props.get("UID", ("", ""))[1], set()).add(to_local(instance))
+                elif "RRULE" in props:
+                    try:
+                        rule = RecurrenceRule(props["RRULE"][1])
+                    except UnsupportedRule:
+                        rule = None  # Sub-daily: keep the first instance rather than drop the event
+                    series.append((props, start, duration, rule))
+                    continue
+            except ValueError:
+                # Malformed dates in one entry shouldn't sink the whole import
+                continue
+            if props.get("STATUS", ("", ""))[1].upper() == "CANCELLED":
+                continue
+            local_start = to_local(start)
+            if local_start < window_end and local_start + duration > window_start:
+                yield _event(props, local_start, duration)
+
+    for props, start, duration, rule in series:
+        if props.get("STATUS", ("", ""))[1].upper() == "CANCELLED":
+            continue
+        skipped = set(replaced.get(props.get("UID", ("", ""))[1], ()))
+        for params, value in props.get("EXDATE", []):
+            for item in value.split(","):
+                try:
+                    skipped.add(to_local(parse_ics_datetime(item, params)[0]))
+                except ValueError:
+                    continue
+        if rule is None:
+            occurrences = [start] if window_start - duration < to_local(start) < window_end else []
+        else:
+            occurrences = expand_rrule(start, rule, window_start, window_end, duration)
+        try:
+            for occurrence in occurrences:
+                local_start = to_local(occurrence)
+                if local_start not in skipped:
+                    yield _event(props, local_start, duration)
+        except (ValueError, OverflowError):
+            # A series running past year 9999; what it produced so far stands
+            continue
+
+
+def load_calendar_events(source, window_start: Optional[datetime] = None,
+                         window_end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Events overlapping the window, sorted by start time (same shape as ``get_calendar_events``)"""
+    return sorted(iter_calendar_events(source, window_start, window_end), key=lambda event: event["start_time"])
+
+
+if __name__ == "__main__":
+    sample = io.StringIO(
+        "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nUID:standup\r\nSUMMARY:Team Standup\r\n"
+        f"DTSTART:{(datetime.now() - timedelta(days=400)):%Y%m%dT0930%S}\r\nDURATION:PT15M\r\n"
+        "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR\r\nEND:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nUID:report\r\nSUMMARY:Quarterly Report Deadline\r\nPRIORITY:1\r\n"
+        f"DTSTART;VALUE=DATE:{(datetime.now() + timedelta(days=3)):%Y%m%d}\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+    for event in load_calendar_events(sample, window_end=datetime.now() + timedelta(days=7)):
+        print(f"{event['start_time']:%a %d %b %H:%M}  {event['title']} ({event['type']}, {event['priority']})")
+
+    # Yearly rules without BYMONTH repeat their BYMONTHDAY / BYDAY in every month
+    jan = datetime(2025, 1, 15, 9, 0)
+    cases = {
+        "FREQ=YEARLY": [datetime(2025, 1, 15, 9, 0)],
+        "FREQ=YEARLY;BYMONTHDAY=15": [jan.replace(month=month) for month in range(1, 13)],
+        "FREQ=YEARLY;BYMONTH=3;BYMONTHDAY=1,-1": [datetime(2025, 3, 1, 9, 0), datetime(2025, 3, 31, 9, 0)],
+        "FREQ=YEARLY;BYDAY=1MO": [datetime(2025, 2, 3, 9), datetime(2025, 3, 3, 9), datetime(2025, 4, 7, 9)],
+    }
+    for text, expected in cases.items():
+        got = list(expand_rrule(jan, RecurrenceRule(text), datetime(2025, 1, 1), datetime(2025, 12, 31, 23, 59), timedelta(0)))
+        assert got[:len(expected)] == expected, (text, got)
+        print(f"{text:<40} {len(got)} instances in 2025")
@@ -0,0 +1,238 @@
+"""
+ICS Export
+Streams task breakdowns and scheduled reminders as iCalendar VEVENT/VALARM
+entries so plans can be added to any calendar app.
+
+UIDs are derived from the task and step content rather than the export time,
+so re-importing an updated plan moves the existing calendar entries instead
+of duplicating them. DTSTAMP is pinned to the plan start for the same reason:
+unchanged plans export byte-for-byte identical files.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from focuscoach.reminders import ReminderBook, reminder_offsets
+
+PRODID = "-//FocusCoach//Task Breakdown//EN"
+
+# Steps without a usable estimate get this many minutes on the calendar
+DEFAULT_STEP_MINUTES = 15
+
+def plan_start(now: Optional[datetime] = None) -> datetime:
+    """Next quarter hour, so exported plans start on a clean calendar slot"""
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    return now + timedelta(minutes=-now.minute % 15 or 15)
+
+
+def stable_uid(*parts: str) -> str:
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest() + "@focuscoach"
+
+
+def _escape(text: str) -> str:
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets without splitting UTF-8 characters"""
+    if len(line) <= 75 and line.isascii():
+        return line + "\r\n"
+    pieces, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > 75:
+            pieces.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    pieces.append(current)
+    return "\r\n".join(pieces) + "\r\n"
+
+
+def _utc(moment: datetime) -> str:
+    # Naive datetimes are local time, like everywhere else in the app
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _trigger(offset: timedelta) -> str:
+    minutes = int(offset.total_seconds() // 60)
+    if minutes == 0:
+        return "PT0M"
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    time_part = (f"{hours}H" if hours else "") + (f"{minutes}M" if minutes else "")
+    return "-P" + (f"{days}D" if days else "") + (f"T{time_part}" if time_part else "")
+
+
+def _alarm(offset: timedelta, description: str) -> List[str]:
+    return ["BEGIN:VALARM", "ACTION:DISPLAY", f"DESCRIPTION:{_escape(description)}",
+            f"TRIGGER:{_trigger(offset)}", "END:VALARM"]
+
+
+def _offsets(reminder: Optional[Dict[str, Any]]) -> List[timedelta]:
+    return [offset.delta for offset in reminder_offsets(reminder)] if reminder else []
+
+
+def step_minutes(step: Dict[str, Any]) -> int:
+    try:
+        minutes = int(str(step.get("estimated_time", "")).strip())
+    except ValueError:
+        return DEFAULT_STEP_MINUTES
+    return minutes if minutes > 0 else DEFAULT_STEP_MINUTES
+
+
+def iter_plan_events(task: str, breakdown: Dict[str, Any], start: datetime,
+                     reminder: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Yield one VEVENT per breakdown step, back to back from ``start``.
+
+    Each step gets an alarm when it begins; the first step also carries the
+    task's scheduled reminder offsets.
+    """
+    offsets = _offsets(reminder)
+    stamp = _utc(start)
+    begin = start
+    steps = breakdown.get("steps", [])
+    for index, step in enumerate(steps, 1):
+        end = begin + timedelta(minutes=step_minutes(step))
+        description = step.get("description", f"Step {index}")
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{stable_uid('step', task, str(index), description)}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_utc(begin)}",
+            f"DTEND:{_utc(end)}",
+            f"SUMMARY:{_escape(f'{task} - Step {index}/{len(steps)}: {description}')}",
+            f"DESCRIPTION:{_escape(step.get('tips', ''))}",
+            "CATEGORIES:FocusCoach",
+        ]
+        lines += _alarm(timedelta(0), f"Time for step {index}: {description}")
+        if index == 1:
+            for offset in offsets:
+                lines += _alarm(offset, f"Coming up: {task}")
+        lines.append("END:VEVENT")
+        yield "".join(_fold(line) for line in lines)
+        begin = end
+
+
+def iter_reminder_events(book: ReminderBook) -> Iterator[str]:
+    """Yield a VEVENT with one VALARM per offset for each reminder tied to a calendar event"""
+    for reminders in (book.task_reminders, book.meeting_reminders):
+        for name, reminder in reminders.items():
+            event = reminder.get("calendar_event")
+            if not event:
+                continue
+            start = event["start_time"]
+            end = max(event.get("end_time") or start, start)
+            lines = [
+                "BEGIN:VEVENT",
+                f"UID:{stable_uid('reminder', event.get('uid') or name, start.isoformat())}",
+                f"DTSTAMP:{_utc(reminder['scheduled_at'])}",
+                f"DTSTART:{_utc(start)}",
+                f"DTEND:{_utc(end)}",
+                f"SUMMARY:{_escape(event.get('title', name))}",
+                "CATEGORIES:FocusCoach",
+            ]
+            for offset in _offsets(reminder):
+                lines += _alarm(offset, f"Coming up: {event.get('title', name)}")
+            lines.append("END:VEVENT")
+            yield "".join(_fold(line) for line in lines)
+
+
+def iter_ics(plans: Iterable[Dict[str, Any]] = (), book: Optional[ReminderBook] = None) -> Iterator[str]:
+    """Stream a whole calendar: header, each plan's steps, reminder events, footer.
+
+    ``plans`` holds dicts with ``task``, ``breakdown``, ``start`` and an
+    optional ``reminder`` (as stored by ``schedule_mandatory_reminder``). It
+    can be a generator, so team exports never hold every plan at once.
+    """
+    yield f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n"
+    for plan in plans:
+        yield from iter_plan_events(plan["task"], plan["breakdown"], plan["start"], plan.get("reminder"))
+    if book is not None:
+        yield from iter_reminder_events(book)
+    yield "END:VCALENDAR\r\n"
+
+
+def write_ics(stream: TextIO, plans: Iterable[Dict[str, Any]] = (), book: Optional[ReminderBook] = None) -> int:
+    """Write the calendar to an open text stream (opened with ``newline=""``); returns characters written"""
+    written = 0
+    for chunk in iter_ics(plans, book):
+        written += stream.write(chunk)
+    return written
+
+
+def plan_fingerprint(plans: Iterable[Dict[str, Any]], book: Optional[ReminderBook] = None) -> str:
+    """Hash of everything that ends up in the export, used as the cache key"""
+    digest = hashlib.sha1()
+    for plan in plans:
+        digest.update(json.dumps(
+            [plan["task"], plan["breakdown"].get("steps", []), plan["start"],
+             (plan.get("reminder") or {}).get("reminder_times")],
+            sort_keys=True, default=str
+        ).encode("utf-8"))
+    if book is not None:
+        for reminders in (book.task_reminders, book.meeting_reminders):
+            for name, reminder in sorted(reminders.items()):
+                event = reminder.get("calendar_event") or {}
+                digest.update(json.dumps(
+                    [name, reminder.get("reminder_times"), reminder.get("scheduled_at"),
+                     event.get("uid"), event.get("title"), event.get("start_time"), event.get("end_time")],
+                    default=str
+                ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """Size-bounded LRU of rendered .ics bytes keyed by plan fingerprint"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, plans: List[Dict[str, Any]], book: Optional[ReminderBook] = None) -> bytes:
+        """Return the .ics for these plans, rendering only when they changed since last time"""
+        key = plan_fingerprint(plans, book)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        rendered = "".join(iter_ics(plans, book)).encode("utf-8")
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every session in the process
+export_cache = ExportCache()
+
+
+if __name__ == "__main__":
+    from focuscoach.breakdown import demo_task_breakdown
+    from focuscoach.reminders import schedule_mandatory_reminder
+
+    task = "Prepare quarterly report"
+    book = ReminderBook()
+    reminder = schedule_mandatory_reminder(book, task, "task", ["1 hour before", "15 minutes before"])
+    plan = {"task": task, "breakdown": demo_task_breakdown(task), "start": plan_start(), "reminder": reminder}
+
+    first = export_cache.export([plan], book)
+    second = export_cache.export([plan], book)
+    print(first.decode("utf-8")[:600])
+    print(f"... {len(first):,} bytes, identical re-export: {first == second}, cache hits: {export_cache.hits}")
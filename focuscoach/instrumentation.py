@@ -0,0 +1,389 @@
+"""
+Instrumentation
+Opt-in timing spans, counters and slow-rerun profiles for the Streamlit app.
+
+Off unless ``FOCUSCOACH_INSTRUMENT=1``; while off, ``span`` hands back a shared
+no-op context manager and ``traced`` returns the function unchanged, so the
+hooks left in the app cost nothing.
+
+    FOCUSCOACH_INSTRUMENT=1              enable
+    FOCUSCOACH_METRICS_PATH=<file>       JSON snapshot, rewritten every few seconds
+                                         (default focuscoach_metrics.json)
+    FOCUSCOACH_METRICS_PORT=<port>       serve Prometheus text at http://127.0.0.1:<port>/metrics
+    FOCUSCOACH_SLOW_RERUN_MS=<ms>        runs at least this slow are reported (default 500)
+    FOCUSCOACH_PROFILE=cprofile,tracemalloc
+                                         capture a profile and/or top allocations for slow runs
+    FOCUSCOACH_PROFILE_DIR=<dir>         where slow-run ``.prof`` files go (default focuscoach_profiles)
+
+A *run* is the outermost traced call on a thread: the whole script on a full
+rerun, or a page function when a fragment reruns on its own. Spans opened
+inside it are attributed to it, and a run that reaches ``page.<name>`` is
+also timed as ``rerun.<name>`` so every page gets whole-rerun percentiles.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from focuscoach.metrics import LatencyRegistry
+
+PAGE_PREFIX = "page."
+RERUN_PREFIX = "rerun."
+
+# Counter key: (name, sorted label pairs)
+CounterKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Run:
+    """Spans and counters of one run in progress"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.page = name[len(PAGE_PREFIX):] if name.startswith(PAGE_PREFIX) else None
+        self.spans: Counter = Counter()
+        self.counters: Counter = Counter()
+
+
+class Instrumentation:
+    """Latency histograms per span, labelled counters, and reports of slow runs"""
+
+    def __init__(self, enabled: bool = False, slow_ms: float = 500.0, profile: Sequence[str] = (),
+                 export_path: Optional[str] = None, export_interval: float = 5.0,
+                 profile_dir: str = "focuscoach_profiles", port: Optional[int] = None,
+                 keep_slow: int = 20):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.profile = frozenset(profile)
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.profile_dir = profile_dir
+        self.port = port
+        self.latency = LatencyRegistry()
+        self.counters: Dict[CounterKey, float] = {}
+        self.slow_runs: Deque[Dict[str, Any]] = deque(maxlen=keep_slow)
+        self._collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Python 3.12+ allows one active profiler per process, so concurrent
+        # sessions take turns; a run that finds it busy is simply not profiled
+        self._profiler_lock = threading.Lock()
+        self._last_export = 0.0
+        self._server = None
+        if enabled and "tracemalloc" in self.profile:
+            import tracemalloc
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        env = os.environ
+        port = env.get("FOCUSCOACH_METRICS_PORT")
+        return cls(
+            enabled=env.get("FOCUSCOACH_INSTRUMENT", "0") not in ("", "0"),
+            slow_ms=float(env.get("FOCUSCOACH_SLOW_RERUN_MS", "500")),
+            profile=[part.strip() for part in env.get("FOCUSCOACH_PROFILE", "").split(",") if part.strip()],
+            export_path=env.get("FOCUSCOACH_METRICS_PATH", "focuscoach_metrics.json"),
+            profile_dir=env.get("FOCUSCOACH_PROFILE_DIR", "focuscoach_profiles"),
+            port=int(port) if port else None,
+        )
+
+    # Recording
+
+    def span(self, name: str):
+        """Context manager timing a block as ``name``; the outermost one on a thread is a run"""
+        if not self.enabled:
+            return _NULL_SPAN
+        if getattr(self._local, "run", None) is None:
+            return self._run(name)
+        return self._span(name)
+
+    def traced(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator form of ``span``"""
+        def decorate(func):
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name: str, n: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.counters[name] += n
+
+    def add_collector(self, name: str, collect: Callable[[], Dict[str, float]]):
+        """Values read at export time, e.g. a cache's hit and miss counts; re-adding replaces"""
+        self._collectors[name] = collect
+
+    @contextlib.contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.latency.observe(name, ms)
+            run = self._local.run
+            run.spans[name] += ms
+            if run.page is None and name.startswith(PAGE_PREFIX):
+                run.page = name[len(PAGE_PREFIX):]
+
+    @contextlib.contextmanager
+    def _run(self, name: str) -> Iterator[None]:
+        run = self._local.run = _Run(name)
+        profiler = self._start_profiler()
+        memory_before = self._traced_memory()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            if profiler is not None:
+                profiler.disable()
+            self._local.run = None
+            with self._lock:
+                self.latency.observe(name, ms)
+                if run.page is not None and name != PAGE_PREFIX + run.page:
+                    self.latency.observe(RERUN_PREFIX + run.page, ms)
+            try:
+                if ms >= self.slow_ms:
+                    self._report_slow(run, ms, profiler, memory_before)
+            finally:
+                if profiler is not None:
+                    self._profiler_lock.release()
+            self._after_run()
+
+    # Slow runs
+
+    def _start_profiler(self):
+        if "cprofile" not in self.profile or not self._profiler_lock.acquire(blocking=False):
+            return None
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, py-spy in-process) already owns the hook
+            self._profiler_lock.release()
+            return None
+        return profiler
+
+    def _traced_memory(self) -> Optional[int]:
+        if "tracemalloc" not in self.profile:
+            return None
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+    def _report_slow(self, run: _Run, ms: float, profiler, memory_before: Optional[int]):
+        at = datetime.now()
+        report: Dict[str, Any] = {
+            "at": at.isoformat(timespec="seconds"),
+            "run": run.name,
+            "page": run.page,
+            "ms": round(ms, 1),
+            "spans": {name: round(span_ms, 1) for name, span_ms in run.spans.most_common()},
+            "counters": dict(run.counters),
+        }
+        if profiler is not None:
+            import io
+            import pstats
+            os.makedirs(self.profile_dir, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", run.page or run.name)
+            path = os.path.join(self.profile_dir, f"{at:%Y%m%d-%H%M%S}-{slug}-{int(ms)}ms.prof")
+            profiler.dump_stats(path)
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(15)
+            report["profile_path"] = path
+            report["profile_top"] = text.getvalue()
+        if memory_before is not None:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            report["memory"] = {
+                "grew_kb": round((current - memory_before) / 1024, 1),
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                        f"{stat.size / 1024:.1f} KiB in {stat.count} blocks" for stat in top],
+            }
+        with self._lock:
+            self.slow_runs.append(report)
+        self.count("slow_runs", page=run.page or run.name)
+
+    # Export
+
+    def _after_run(self):
+        if self.port is not None and self._server is None:
+            self.serve(self.port)
+        if self.export_path and time.monotonic() - self._last_export >= self.export_interval:
+            self.export()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latency = self.latency.snapshot()
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            slow_runs = list(self.slow_runs)
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "latency": latency,
+            "counters": counters,
+            "collected": self.collect(),
+            "slow_runs": slow_runs,
+        }
+
+    def collect(self) -> Dict[str, Dict[str, float]]:
+        collected = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                collected[name] = dict(collect())
+            except Exception as error:  # a broken collector must not break the export
+                collected[name] = {"error": str(error)}
+        return collected
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Write the snapshot as JSON (atomically, via a temporary file); returns the path"""
+        path = path or self.export_path
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle, indent=2)
+        os.replace(temporary, path)
+        self._last_export = time.monotonic()
+        return path
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        lines = ["# HELP focuscoach_span_milliseconds Time spent in instrumented spans",
+                 "# TYPE focuscoach_span_milliseconds histogram"]
+        with self._lock:
+            for name, histogram in sorted(self.latency.histograms.items()):
+                label = f'span="{_escape(name)}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets_ms + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'focuscoach_span_milliseconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f"focuscoach_span_milliseconds_sum{{{label}}} {histogram.sum_ms:.3f}")
+                lines.append(f"focuscoach_span_milliseconds_count{{{label}}} {histogram.count}")
+
+        typed = set()
+        for counter in snapshot["counters"]:
+            metric = f"focuscoach_{_metric_name(counter['name'])}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            labels = ",".join(f'{_metric_name(key)}="{_escape(value)}"' for key, value in counter["labels"].items())
+            lines.append(f"{metric}{{{labels}}} {counter['value']:g}" if labels else f"{metric} {counter['value']:g}")
+
+        for source, values in snapshot["collected"].items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    metric = f"focuscoach_{_metric_name(source)}_{_metric_name(key)}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serve ``prometheus()`` at ``/metrics`` from a daemon thread (once per process)"""
+        with self._lock:
+            if self._server is not None:
+                return self._server
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+            instrumentation = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = instrumentation.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            try:
+                self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError:
+                # Another app process already serves this port; keep recording
+                self.port = None
+                return None
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="focuscoach-metrics", daemon=True).start()
+            return self._server
+
+    # Reading
+
+    def page_percentiles(self) -> List[Dict[str, Any]]:
+        """Per page: page-function and whole-rerun count and p50/p95/p99 (ms)"""
+        with self._lock:
+            histograms = dict(self.latency.histograms)
+        pages = sorted({name.split(".", 1)[1] for name in histograms
+                        if name.startswith(PAGE_PREFIX) or name.startswith(RERUN_PREFIX)})
+        rows = []
+        for page in pages:
+            row: Dict[str, Any] = {"page": page}
+            for kind, prefix in (("page", PAGE_PREFIX), ("rerun", RERUN_PREFIX)):
+                histogram = histograms.get(prefix + page)
+                row[f"{kind}_count"] = histogram.count if histogram else 0
+                for q in (50, 95, 99):
+                    row[f"{kind}_p{q}_ms"] = histogram.percentile(q / 100) if histogram else None
+            rows.append(row)
+        return rows
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# One per process: Streamlit re-executes the app script on every rerun, but
+# imported modules (and so these histograms) persist
+instrumentation = Instrumentation.from_env()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    demo = Instrumentation(enabled=True, slow_ms=5, profile=["cprofile", "tracemalloc"], export_path=None,
+                           profile_dir=tempfile.mkdtemp(prefix="focuscoach-profiles-"))
+
+    @demo.traced("page.demo")
+    def page():
+        with demo.span("render"):
+            demo.count("elements_emitted", 3, type="markdown")
+            sum(i * i for i in range(200_000))
+
+    for _ in range(5):
+        with demo.span("rerun"):
+            page()
+    print(demo.page_percentiles())
+    print(demo.prometheus())
+    slow = demo.slow_runs[-1]
+    print(f"slow run: {slow['ms']} ms, spans {slow['spans']}, profile {slow['profile_path']}")
+    print(f"memory: {slow['memory']['grew_kb']} KiB grown, top {slow['memory']['top'][0]}")
@@ -0,0 +1,79 @@
+"""
+Metrics Core
+Fixed-bucket latency histograms shared by the API server and background workers
+"""
+
+import bisect
+from typing import Dict, Optional, Sequence
+
+# Upper bounds in milliseconds; anything slower lands in the overflow bucket
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Counts observations per latency bucket; percentiles interpolate within the bucket holding them"""
+
+    def __init__(self, buckets_ms: Optional[Sequence[float]] = None):
+        self.buckets_ms = tuple(buckets_ms or DEFAULT_BUCKETS_MS)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.min_ms = float("inf")
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if ms < self.min_ms:
+            self.min_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """The ``q`` quantile (0 < q <= 1), assuming observations spread evenly through their bucket.
+
+        A bucket's range is narrowed to the fastest and slowest observations,
+        so quantiles that share a bucket still come out distinct.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = max(self.buckets_ms[index - 1] if index else 0.0, self.min_ms)
+                upper = min(self.buckets_ms[index] if index < len(self.buckets_ms) else self.max_ms, self.max_ms)
+                return round(lower + (upper - lower) * (rank - seen) / bucket_count, 3)
+            seen += bucket_count
+        return round(self.max_ms, 3)
+
+    def snapshot(self) -> Dict[str, object]:
+        buckets = {str(bound): count for bound, count in zip(self.buckets_ms, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class LatencyRegistry:
+    """Named latency histograms, created on first observation"""
+
+    def __init__(self, buckets_ms: Optional[Sequence[float]] = None):
+        self.buckets_ms = buckets_ms
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, name: str, ms: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram(self.buckets_ms)
+        histogram.observe(ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
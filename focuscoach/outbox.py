@@ -0,0 +1,317 @@
+"""
+Notification Outbox
+Transactional outbox and idempotent delivery log for outbound notifications.
+
+State changes (a scheduled reminder, a saved breakdown) and the messages they
+trigger are written in one SQLite transaction, so either both happen or
+neither does. ``OutboxSender`` drains pending messages in batches per
+channel. Every message carries an idempotency key; the delivery log records
+each key once it is delivered, so a duplicate enqueue is rejected.
+
+Delivery is at-least-once. A sender that dies after a channel accepted a
+message but before recording it leaves the message leased; once the lease
+expires another drain sends it again with the same key, which channels use
+for their own dedupe (Slack ``client_msg_id``, SMTP ``Message-ID``).
+
+Failed sends back off exponentially with full jitter so a burst of failures
+does not come back as a synchronized retry storm, and a channel that keeps
+failing is paused for a cooldown instead of burning attempts, leaving
+throughput for healthy channels. Delivered rows are compacted away.
+"""
+
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+# A channel sends a batch of messages and returns one error (None for success) per message
+ChannelSender = Callable[[List[Dict[str, Any]]], Sequence[Optional[str]]]
+
+
+def idempotency_key(*parts: Any) -> str:
+    """Stable key for a message from the parts that make it unique"""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class OutboxTransaction:
+    """Writes made inside ``Outbox.transaction``: caller state and messages commit together"""
+
+    def __init__(self, db: sqlite3.Connection, now: float):
+        self.db = db
+        self.now = now
+        self.enqueued = 0
+
+    def put(self, key: str, value: Any):
+        """Store a piece of application state (e.g. ``reminder:<user>:<name>``) as JSON"""
+        self.db.execute("INSERT OR REPLACE INTO state (key, value, updated_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, default=str), self.now))
+
+    def delete(self, key: str):
+        self.db.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def enqueue(self, channel: str, payload: Dict[str, Any], key: Optional[str] = None,
+                deliver_at: Optional[float] = None) -> bool:
+        """Queue a message; returns False if one with the same idempotency key is already queued or sent.
+
+        A message that went dead (out of attempts) is queued again with fresh attempts.
+        """
+        key = key or idempotency_key(channel, payload)
+        if self.db.execute("SELECT 1 FROM delivery_log WHERE key = ?", (key,)).fetchone():
+            return False
+        row = (channel, json.dumps(payload, default=str), deliver_at or self.now)
+        inserted = self.db.execute(
+            "INSERT OR IGNORE INTO outbox (channel, payload, next_attempt, key, status, attempts, created_at)"
+            " VALUES (?, ?, ?, ?, 'pending', 0, ?)", row + (key, self.now)
+        ).rowcount or self.db.execute(
+            "UPDATE outbox SET channel = ?, payload = ?, next_attempt = ?, status = 'pending', attempts = 0,"
+            " lease_until = NULL, last_error = NULL WHERE key = ? AND status = 'dead'", row + (key,)
+        ).rowcount
+        self.enqueued += inserted
+        return bool(inserted)
+
+
+class Outbox:
+    """SQLite outbox, delivery log and application state sharing one database"""
+
+    def __init__(self, path: str = ":memory:", clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._write() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                       " updated_at REAL NOT NULL)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, channel TEXT NOT NULL,"
+                " payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL,"
+                " next_attempt REAL NOT NULL, lease_until REAL, last_error TEXT, created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+            db.execute("CREATE TABLE IF NOT EXISTS delivery_log (key TEXT PRIMARY KEY, channel TEXT NOT NULL,"
+                       " delivered_at REAL NOT NULL)")
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    @contextmanager
+    def transaction(self) -> Iterator[OutboxTransaction]:
+        """Atomically change state and queue the messages that change triggers"""
+        with self._write() as db:
+            yield OutboxTransaction(db, self.clock())
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def claim(self, limit: int, lease: float, now: float, skip_channels: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` due messages so concurrent senders never pick the same ones"""
+        excluded = f" AND channel NOT IN ({','.join('?' * len(skip_channels))})" if skip_channels else ""
+        with self._write() as db:
+            rows = db.execute(
+                "SELECT id, key, channel, payload, attempts FROM outbox"
+                " WHERE status = 'pending' AND next_attempt <= ? AND (lease_until IS NULL OR lease_until <= ?)"
+                f"{excluded} ORDER BY next_attempt LIMIT ?",
+                (now, now, *skip_channels, limit)
+            ).fetchall()
+            db.executemany("UPDATE outbox SET lease_until = ? WHERE id = ?", [(now + lease, row[0]) for row in rows])
+        return [{"id": row[0], "key": row[1], "channel": row[2], "payload": json.loads(row[3]), "attempts": row[4]}
+                for row in rows]
+
+    def delivered(self, messages: List[Dict[str, Any]], now: float):
+        with self._write() as db:
+            db.executemany("INSERT OR IGNORE INTO delivery_log (key, channel, delivered_at) VALUES (?, ?, ?)",
+                           [(message["key"], message["channel"], now) for message in messages])
+            db.executemany("UPDATE outbox SET status = 'delivered', lease_until = NULL WHERE id = ?",
+                           [(message["id"],) for message in messages])
+
+    def failed(self, failures: List[Dict[str, Any]], now: float):
+        """Record failed attempts; each failure carries ``error``, ``retry_at`` and ``dead``"""
+        with self._write() as db:
+            db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, lease_until = NULL,"
+                " last_error = ?, status = ? WHERE id = ?",
+                [(failure["retry_at"], failure["error"], "dead" if failure["dead"] else "pending", failure["id"])
+                 for failure in failures]
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            counts["delivery_log"] = self._db.execute("SELECT COUNT(*) FROM delivery_log").fetchone()[0]
+        return counts
+
+    def compact(self, keep_delivered: float = 3600.0, keep_log: float = 7 * 86400.0,
+                now: Optional[float] = None) -> Dict[str, int]:
+        """Drop delivered outbox rows and old delivery-log entries.
+
+        The log outlives the outbox rows so late duplicates are still caught;
+        ``keep_log`` is the dedupe horizon.
+        """
+        now = self.clock() if now is None else now
+        with self._write() as db:
+            rows = db.execute(
+                "DELETE FROM outbox WHERE status = 'delivered' AND key IN"
+                " (SELECT key FROM delivery_log WHERE delivered_at < ?)", (now - keep_delivered,)
+            ).rowcount
+            log = db.execute("DELETE FROM delivery_log WHERE delivered_at < ?", (now - keep_log,)).rowcount
+        return {"outbox": rows, "delivery_log": log}
+
+    def close(self):
+        self._db.close()
+
+
+class OutboxSender:
+    """Drains the outbox in batches per channel with jittered exponential backoff.
+
+    A channel whose whole batch fails ``breaker_threshold`` times in a row is
+    paused for ``cooldown`` seconds; its messages wait without using up
+    attempts while other channels keep flowing.
+    """
+
+    def __init__(self, outbox: Outbox, channels: Dict[str, ChannelSender], batch_size: int = 200,
+                 max_attempts: int = 8, base_backoff: float = 1.0, max_backoff: float = 300.0,
+                 lease: float = 30.0, breaker_threshold: int = 3, cooldown: float = 30.0,
+                 rng: Optional[random.Random] = None):
+        self.outbox = outbox
+        self.channels = channels
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.breaker_threshold = breaker_threshold
+        self.cooldown = cooldown
+        self.rng = rng or random.Random()
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._failures: Dict[str, int] = {}
+        self._paused_until: Dict[str, float] = {}
+
+    def backoff(self, attempts: int) -> float:
+        """Full jitter: uniform in [0, min(max_backoff, base * 2 ** attempts)]"""
+        return self.rng.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempts))
+
+    def paused(self, now: float) -> List[str]:
+        return [channel for channel, until in self._paused_until.items() if until > now]
+
+    def drain_once(self, now: Optional[float] = None) -> int:
+        """Send one batch; returns how many messages were handled (sent or failed)"""
+        now = self.outbox.clock() if now is None else now
+        messages = self.outbox.claim(self.batch_size, self.lease, now, self.paused(now))
+        if not messages:
+            return 0
+
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for message in messages:
+            by_channel.setdefault(message["channel"], []).append(message)
+
+        done, failures = [], []
+        for channel, batch in by_channel.items():
+            sender = self.channels.get(channel)
+            try:
+                errors = sender(batch) if sender else [f"no sender for channel {channel}"] * len(batch)
+            except Exception as error:  # a transport failure fails the whole batch
+                errors = [f"{type(error).__name__}: {error}"] * len(batch)
+
+            ok = [message for message, error in zip(batch, errors) if error is None]
+            done.extend(ok)
+            self.sent += len(ok)
+            if ok:
+                self._failures.pop(channel, None)
+            else:
+                self._failures[channel] = self._failures.get(channel, 0) + 1
+                if self._failures[channel] >= self.breaker_threshold:
+                    self._paused_until[channel] = now + self.cooldown
+                    self._failures.pop(channel)
+
+            for message, error in zip(batch, errors):
+                if error is None:
+                    continue
+                attempts = message["attempts"] + 1
+                dead = attempts >= self.max_attempts
+                failures.append({"id": message["id"], "error": error, "dead": dead,
+                                 "retry_at": now + self.backoff(attempts)})
+                self.dead += dead
+                self.retried += not dead
+
+        if done:
+            self.outbox.delivered(done, now)
+        if failures:
+            self.outbox.failed(failures, now)
+        return len(messages)
+
+    def drain(self, now: Optional[float] = None, max_batches: int = 1000) -> int:
+        """Send batches until nothing is due (or ``max_batches``); returns messages handled"""
+        handled = 0
+        for _ in range(max_batches):
+            count = self.drain_once(now)
+            if not count:
+                break
+            handled += count
+        return handled
+
+
+class DemoSlackChannel:
+    """Slack channel for the demo: posts through ``focuscoach.slack`` and dedupes on the idempotency key"""
+
+    def __init__(self):
+        self.posted: Dict[str, Dict[str, Any]] = {}
+
+    def __call__(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        from focuscoach.slack import send_to_slack
+
+        errors = []
+        for message in messages:
+            payload = message["payload"]
+            if message["key"] not in self.posted:
+                self.posted[message["key"]] = send_to_slack(payload.get("text", ""), payload["workspace"],
+                                                            payload["channel"])
+            errors.append(None)
+        return errors
+
+
+if __name__ == "__main__":
+    from focuscoach.breakdown import demo_task_breakdown
+
+    outbox = Outbox()
+    slack = DemoSlackChannel()
+    sender = OutboxSender(outbox, {"slack": slack})
+
+    task = "Prepare quarterly report"
+    breakdown = demo_task_breakdown(task)
+    for _ in range(2):  # a double-click: the same change and message twice
+        with outbox.transaction() as tx:
+            tx.put(f"breakdown:sam:{task}", breakdown)
+            queued = tx.enqueue("slack", {"workspace": "acme", "channel": "focus", "text": task},
+                                idempotency_key("share", "sam", task))
+        print(f"Enqueued: {queued}")
+
+    try:
+        with outbox.transaction() as tx:
+            tx.put("breakdown:sam:Write blog post", demo_task_breakdown("Write blog post"))
+            tx.enqueue("slack", {"workspace": "acme", "channel": "focus", "text": "Write blog post"})
+            raise RuntimeError("crash before commit")
+    except RuntimeError:
+        pass
+
+    sender.drain()
+    print(f"Posted {len(slack.posted)} message(s); rolled-back state present: "
+          f"{outbox.get('breakdown:sam:Write blog post') is not None}; counts {outbox.counts()}")
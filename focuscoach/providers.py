@@ -0,0 +1,706 @@
+"""
+Breakdown Providers
+Pluggable task breakdown backends: the built-in templates and an async LLM service
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import ssl
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from focuscoach.breakdown import demo_task_breakdown
+
+
+class ProviderError(Exception):
+    """Raised when a breakdown backend cannot produce a usable response"""
+
+
+# ---------------------------------------------------------------------------
+# Sync bridge
+# ---------------------------------------------------------------------------
+
+_loop_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop that sync callers (Streamlit reruns) submit work to"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="breakdown-provider-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """Run a coroutine on the shared background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def iterate_sync(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """Drive an async generator from synchronous code, one item at a time"""
+    loop = _background_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+# ---------------------------------------------------------------------------
+# Provider interface
+# ---------------------------------------------------------------------------
+
+class BreakdownProvider:
+    """Base class for anything that can turn a task description into a breakdown dict.
+
+    Async callers (servers, workers) use ``abreakdown``/``astream_breakdown``; the
+    Streamlit app uses the blocking ``breakdown``/``stream_breakdown`` wrappers,
+    which run on a shared background loop so connection pools survive across reruns.
+
+    When the whole breakdown is known up front (templates, cache hits) the stream
+    opens with a ``("context", breakdown)`` event so renderers can take a fast
+    path. Every stream then yields ``("step", step)`` for each step as soon as it
+    is known and ends with a single ``("breakdown", full_breakdown)`` event.
+    """
+
+    name = "base"
+
+    async def abreakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def astream_breakdown(self, task: str, user_context: str = "",
+                                gmail_address: str = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield step events followed by the full breakdown (default: all at once)"""
+        breakdown = await self.abreakdown(task, user_context, gmail_address)
+        for event in breakdown_events(breakdown):
+            yield event
+
+    async def astream_steps(self, task: str, user_context: str = "") -> AsyncIterator[Dict[str, str]]:
+        async for kind, value in self.astream_breakdown(task, user_context):
+            if kind == "step":
+                yield value
+
+    def breakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        return run_sync(self.abreakdown(task, user_context, gmail_address))
+
+    def stream_breakdown(self, task: str, user_context: str = "",
+                         gmail_address: str = None) -> Iterator[Tuple[str, Any]]:
+        return iterate_sync(self.astream_breakdown(task, user_context, gmail_address))
+
+    async def aclose(self):
+        """Release any network resources held by the provider"""
+
+
+def breakdown_events(breakdown: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """Turn an already-built breakdown into the provider stream event format"""
+    yield "context", breakdown
+    for step in breakdown.get("steps", []):
+        yield "step", step
+    yield "breakdown", breakdown
+
+
+class TemplateBreakdownProvider(BreakdownProvider):
+    """Wraps the pre-defined template engine (``demo_task_breakdown``)"""
+
+    name = "template"
+
+    def __init__(self, breakdown_fn: Callable[..., Dict[str, Any]]):
+        self.breakdown_fn = breakdown_fn
+
+    async def abreakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        return self.breakdown(task, user_context, gmail_address)
+
+    def breakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        # Templates are pure CPU work, so run them in the caller's thread instead
+        # of hopping onto the background loop.
+        result = dict(self.breakdown_fn(task, user_context, gmail_address))
+        result.setdefault("source", self.name)
+        return result
+
+    def stream_breakdown(self, task: str, user_context: str = "",
+                         gmail_address: str = None) -> Iterator[Tuple[str, Any]]:
+        return breakdown_events(self.breakdown(task, user_context, gmail_address))
+
+
+# ---------------------------------------------------------------------------
+# LLM provider
+# ---------------------------------------------------------------------------
+
+SYSTEM_PROMPT = """You are FocusCoach, a gentle productivity assistant for neurodivergent people.
+Break the user's task into small, concrete steps. Reply with plain text only, one item per line:
+<number>. <step description> | <estimated minutes> | <supportive tip>
+TECHNIQUE: <focus technique>
+ACCOMMODATION: <accommodation or tool>
+SENSORY: <sensory-friendly tip>
+ENCOURAGEMENT: <one warm, non-judgmental sentence>"""
+
+_STEP_LINE = re.compile(r"^\s*(?:step\s*)?(\d+)\s*[.):-]\s*(.+)$", re.IGNORECASE)
+_SECTION_PREFIXES = {
+    "TECHNIQUE": "focus_techniques",
+    "ACCOMMODATION": "accommodations",
+    "SENSORY": "sensory_tips",
+    "ENCOURAGEMENT": "encouragement",
+}
+
+
+def parse_breakdown_line(line: str) -> Optional[Tuple[str, Any]]:
+    """Parse one line of model output into (section, value), or None if it is chatter"""
+    line = line.strip().lstrip("-*• ").strip()
+    if not line:
+        return None
+
+    prefix, sep, rest = line.partition(":")
+    section = _SECTION_PREFIXES.get(prefix.strip().upper()) if sep else None
+    if section:
+        return section, rest.strip()
+
+    match = _STEP_LINE.match(line)
+    if not match:
+        return None
+    parts = [part.strip() for part in match.group(2).split("|")]
+    minutes = re.search(r"\d+", parts[1]) if len(parts) > 1 else None
+    return "steps", {
+        "description": parts[0],
+        "estimated_time": minutes.group(0) if minutes else "15",
+        "tips": parts[2] if len(parts) > 2 and parts[2] else "Take your time and be patient with yourself",
+    }
+
+
+class _ConnectionPool:
+    """Small keep-alive pool of asyncio stream connections to a single host"""
+
+    def __init__(self, host: str, port: int, use_ssl: bool, max_size: int = 8, connect_timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.max_size = max_size
+        self.connect_timeout = connect_timeout
+        self.opened = 0
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_size)
+
+    async def acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """Return (reader, writer, reused) and hold one of the pool's slots"""
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                reader, writer = self._idle.pop()
+                if not writer.is_closing() and not reader.at_eof():
+                    return reader, writer, True
+                writer.close()
+
+            ssl_context = ssl.create_default_context() if self.use_ssl else None
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host, self.port, ssl=ssl_context,
+                    server_hostname=self.host if ssl_context else None
+                ),
+                self.connect_timeout
+            )
+            self.opened += 1
+            return reader, writer, False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reusable: bool):
+        if reusable and not writer.is_closing() and len(self._idle) < self.max_size:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        self._slots.release()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class LLMBreakdownProvider(BreakdownProvider):
+    """Streams breakdowns from an OpenAI-compatible chat completions endpoint.
+
+    Uses only asyncio streams: a keep-alive connection pool, per-read timeouts,
+    chunked transfer decoding and incremental SSE parsing, so steps are yielded
+    as soon as each line of the answer has arrived.
+    """
+
+    name = "llm"
+
+    def __init__(self, base_url: str, api_key: str = "", model: str = "gpt-4o-mini",
+                 pool_size: int = 8, connect_timeout: float = 5.0, read_timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.use_ssl = parts.scheme == "https"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.path = (parts.path.rstrip("/") or "/v1") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.read_timeout = read_timeout
+        self._host_header = parts.netloc
+        self._pool = _ConnectionPool(self.host, self.port, self.use_ssl, pool_size, connect_timeout)
+
+    @property
+    def connections_opened(self) -> int:
+        return self._pool.opened
+
+    def _request_payload(self, task: str, user_context: str) -> Dict[str, Any]:
+        user_message = f"Task: {task}"
+        if user_context:
+            user_message += f"\nAbout me: {user_context}"
+        return {
+            "model": self.model,
+            "stream": True,
+            "temperature": 0.4,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_message},
+            ],
+        }
+
+    async def _read(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.read_timeout)
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        status_line = await self._read(reader.readline())
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ProviderError(f"malformed status line: {status_line!r}")
+
+        headers = {}
+        while True:
+            line = await self._read(reader.readline())
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _iter_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await self._read(reader.readline())
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip optional trailers up to the terminating blank line
+                    while (await self._read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                chunk = await self._read(reader.readexactly(size + 2))
+                yield chunk[:-2]
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                chunk = await self._read(reader.read(min(remaining, 65536)))
+                if not chunk:
+                    raise ConnectionResetError("connection closed mid-body")
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while True:
+                chunk = await self._read(reader.read(65536))
+                if not chunk:
+                    return
+                yield chunk
+
+    async def _post_stream(self, payload: Dict[str, Any]) -> AsyncIterator[Tuple[Dict[str, str], bytes]]:
+        """POST the payload and yield (headers, body chunk) pairs"""
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"POST {self.path} HTTP/1.1\r\n"
+            f"Host: {self._host_header}\r\n"
+            f"Authorization: Bearer {self.api_key}\r\n"
+            "Content-Type: application/json\r\n"
+            "Accept: text/event-stream\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+
+        for attempt in range(2):
+            reader, writer, reused = await self._pool.acquire()
+            reusable = False
+            try:
+                try:
+                    writer.write(head + body)
+                    await self._read(writer.drain())
+                    status, headers = await self._read_head(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # An idle keep-alive connection may have been closed by the
+                    # server; retry once on a fresh one.
+                    if reused and attempt == 0:
+                        continue
+                    raise
+
+                if status != 200:
+                    detail = b"".join([chunk async for chunk in self._iter_body(reader, headers)])
+                    raise ProviderError(f"completion endpoint returned HTTP {status}: {detail[:200]!r}")
+
+                async for chunk in self._iter_body(reader, headers):
+                    yield headers, chunk
+                reusable = headers.get("connection", "").lower() != "close"
+                return
+            finally:
+                self._pool.release(reader, writer, reusable)
+
+    async def astream_tokens(self, task: str, user_context: str = "") -> AsyncIterator[str]:
+        """Yield content tokens from the streamed completion"""
+        buffer = b""
+        json_body = []
+        async for headers, chunk in self._post_stream(self._request_payload(task, user_context)):
+            if headers.get("content-type", "").startswith("application/json"):
+                json_body.append(chunk)
+                continue
+
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    # Keep draining so the connection can go back to the pool
+                    continue
+                try:
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                except (ValueError, KeyError, IndexError):
+                    raise ProviderError(f"malformed stream event: {data[:200]!r}")
+                if delta.get("content"):
+                    yield delta["content"]
+
+        if json_body:
+            try:
+                yield json.loads(b"".join(json_body))["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError):
+                raise ProviderError("malformed completion response")
+
+    async def _astream_items(self, task: str, user_context: str) -> AsyncIterator[Tuple[str, Any]]:
+        pending = ""
+        async for token in self.astream_tokens(task, user_context):
+            pending += token
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                item = parse_breakdown_line(line)
+                if item:
+                    yield item
+        item = parse_breakdown_line(pending)
+        if item:
+            yield item
+
+    async def astream_breakdown(self, task: str, user_context: str = "",
+                                gmail_address: str = None) -> AsyncIterator[Tuple[str, Any]]:
+        breakdown = {"steps": [], "focus_techniques": [], "accommodations": [], "sensory_tips": [], "encouragement": ""}
+        async for section, value in self._astream_items(task, user_context):
+            if section == "encouragement":
+                breakdown["encouragement"] = value
+            else:
+                breakdown[section].append(value)
+                if section == "steps":
+                    yield "step", value
+
+        if not breakdown["steps"]:
+            raise ProviderError("completion contained no steps")
+        breakdown["source"] = self.name
+        yield "breakdown", breakdown
+
+    async def abreakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        async for kind, value in self.astream_breakdown(task, user_context):
+            if kind == "breakdown":
+                return value
+        raise ProviderError("completion stream ended without a breakdown")
+
+    async def aclose(self):
+        self._pool.close()
+
+
+# ---------------------------------------------------------------------------
+# Semantic response cache
+# ---------------------------------------------------------------------------
+
+_STOPWORDS = {
+    "a", "an", "the", "my", "our", "your", "for", "to", "of", "and", "on", "in",
+    "with", "please", "i", "need", "want", "help", "me", "some", "this", "that",
+}
+
+
+def task_tokens(text: str) -> List[str]:
+    """Normalise a task description to a sorted list of content words"""
+    tokens = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return sorted(tokens)
+
+
+class SemanticResponseCache:
+    """Persistent SQLite cache of provider responses keyed by normalised task wording.
+
+    Lookups first try the exact normalised key ("Prepare my quarterly report"
+    and "prepare the quarterly reports" share one), then fall back to the
+    closest stored task sharing at least one content word (Jaccard
+    similarity), so "prepare quarterly reports for finance" (3 of 4 words)
+    hits it too. Every ``prune_every`` puts, rows older than ``max_age`` and
+    the oldest beyond ``max_entries`` are deleted.
+    """
+
+    def __init__(self, path: str = ":memory:", similarity: float = 0.75, max_age: float = 7 * 86400,
+                 max_entries: int = 50000, prune_every: int = 100):
+        self.similarity = similarity
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT NOT NULL, context TEXT NOT NULL, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, PRIMARY KEY (key, context))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+
+        # Inverted index of content word -> cached keys, rebuilt from disk on open
+        self._index: Dict[str, set] = {}
+        for (key,) in self._db.execute("SELECT DISTINCT key FROM responses"):
+            self._add_to_index(key)
+        self._prune()
+        self._db.commit()
+
+    def _add_to_index(self, key: str):
+        for token in key.split():
+            self._index.setdefault(token, set()).add(key)
+
+    def _remove_from_index(self, key: str):
+        for token in key.split():
+            keys = self._index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[token]
+
+    def _prune(self):
+        """Delete expired rows, then the oldest beyond ``max_entries``; caller holds the lock and commits"""
+        cutoff = time.time() - self.max_age
+        doomed = self._db.execute("SELECT key, context FROM responses WHERE created_at < ?", (cutoff,)).fetchall()
+        (rows,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = rows - len(doomed) - self.max_entries
+        if excess > 0:
+            doomed += self._db.execute(
+                "SELECT key, context FROM responses WHERE created_at >= ? ORDER BY created_at LIMIT ?",
+                (cutoff, excess)
+            ).fetchall()
+        if not doomed:
+            return
+        self._db.executemany("DELETE FROM responses WHERE key = ? AND context = ?", doomed)
+        for key in {key for key, _ in doomed}:
+            # Other user contexts may still hold the same task
+            if self._db.execute("SELECT 1 FROM responses WHERE key = ? LIMIT 1", (key,)).fetchone() is None:
+                self._remove_from_index(key)
+
+    def _closest_key(self, tokens: List[str]) -> Optional[str]:
+        wanted = set(tokens)
+        candidates = set()
+        for token in wanted:
+            candidates |= self._index.get(token, set())
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            stored = set(key.split())
+            score = len(wanted & stored) / len(wanted | stored)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key if best_score >= self.similarity else None
+
+    def get(self, task: str, user_context: str = "") -> Optional[Dict[str, Any]]:
+        tokens = task_tokens(task)
+        if not tokens:
+            return None
+        with self._lock:
+            key = " ".join(tokens)
+            row = self._fetch(key, user_context)
+            if row is None:
+                closest = self._closest_key(tokens)
+                row = self._fetch(closest, user_context) if closest else None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row)
+
+    def _fetch(self, key: str, user_context: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT response, created_at FROM responses WHERE key = ? AND context = ?",
+            (key, user_context)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return row[0]
+
+    def put(self, task: str, response: Dict[str, Any], user_context: str = ""):
+        tokens = task_tokens(task)
+        if not tokens:
+            return
+        key = " ".join(tokens)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, context, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, user_context, json.dumps(response), time.time())
+            )
+            self._add_to_index(key)
+            self._puts += 1
+            if self._puts % self.prune_every == 0:
+                self._prune()
+            self._db.commit()
+
+
+class CachedBreakdownProvider(BreakdownProvider):
+    """Puts a response cache and a latency budget in front of a slow provider.
+
+    Cache hits are served immediately. On a miss the primary provider gets
+    ``latency_budget`` seconds; if it is too slow or fails, the fallback
+    (normally the template engine) answers instead and nothing is cached.
+    """
+
+    def __init__(self, primary: BreakdownProvider, fallback: BreakdownProvider,
+                 cache: Optional[SemanticResponseCache] = None, latency_budget: float = 8.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.cache = cache
+        self.latency_budget = latency_budget
+        self.fallbacks = 0
+        self.name = primary.name
+
+    async def _try_primary(self, task: str, user_context: str) -> Optional[Dict[str, Any]]:
+        if self.cache:
+            cached = self.cache.get(task, user_context)
+            if cached is not None:
+                cached["source"] = "cache"
+                return cached
+        try:
+            result = await asyncio.wait_for(self.primary.abreakdown(task, user_context), self.latency_budget)
+        except (asyncio.TimeoutError, OSError, ProviderError):
+            self.fallbacks += 1
+            return None
+        if self.cache:
+            self.cache.put(task, result, user_context)
+        return result
+
+    async def abreakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        result = await self._try_primary(task, user_context)
+        if result is None:
+            result = await self.fallback.abreakdown(task, user_context, gmail_address)
+        return result
+
+    def breakdown(self, task: str, user_context: str = "", gmail_address: str = None) -> Dict[str, Any]:
+        result = run_sync(self._try_primary(task, user_context))
+        if result is None:
+            # Fall back in the caller's thread so template code keeps its context
+            result = self.fallback.breakdown(task, user_context, gmail_address)
+        return result
+
+    async def _astream_primary(self, task: str, user_context: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream from the cache or primary; yields nothing if the primary misses its budget"""
+        if self.cache:
+            cached = self.cache.get(task, user_context)
+            if cached is not None:
+                cached["source"] = "cache"
+                for event in breakdown_events(cached):
+                    yield event
+                return
+
+        # The budget covers time-to-first-step; once steps flow we let the stream finish.
+        stream = self.primary.astream_breakdown(task, user_context)
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), self.latency_budget)
+        except (asyncio.TimeoutError, StopAsyncIteration, OSError, ProviderError):
+            self.fallbacks += 1
+            await stream.aclose()
+            return
+
+        steps = []
+        event = first
+        try:
+            while True:
+                kind, value = event
+                if kind == "breakdown":
+                    if self.cache:
+                        self.cache.put(task, value, user_context)
+                    yield event
+                    return
+                if kind == "step":
+                    steps.append(value)
+                yield event
+                event = await stream.__anext__()
+        except (StopAsyncIteration, asyncio.TimeoutError, OSError, ProviderError):
+            # The model stalled mid-answer: keep the steps already shown, skip the cache
+            self.fallbacks += 1
+            yield "breakdown", {
+                "steps": steps,
+                "encouragement": "Remember: progress, not perfection. You're doing great!",
+                "source": self.primary.name,
+                "partial": True,
+            }
+
+    async def astream_breakdown(self, task: str, user_context: str = "",
+                                gmail_address: str = None) -> AsyncIterator[Tuple[str, Any]]:
+        produced = False
+        async for event in self._astream_primary(task, user_context):
+            produced = True
+            yield event
+        if not produced:
+            async for event in self.fallback.astream_breakdown(task, user_context, gmail_address):
+                yield event
+
+    def stream_breakdown(self, task: str, user_context: str = "",
+                         gmail_address: str = None) -> Iterator[Tuple[str, Any]]:
+        events = iterate_sync(self._astream_primary(task, user_context))
+        first = next(events, None)
+        if first is None:
+            # Fall back in the caller's thread so template code keeps its context
+            yield from self.fallback.stream_breakdown(task, user_context, gmail_address)
+            return
+        yield first
+        yield from events
+
+    async def aclose(self):
+        await self.primary.aclose()
+
+
+def create_default_provider(template_fn: Callable[..., Dict[str, Any]] = demo_task_breakdown) -> BreakdownProvider:
+    """Build the provider chain from environment settings.
+
+    Without ``OPENAI_API_KEY`` (or a ``FOCUSCOACH_LLM_BASE_URL`` pointing at a
+    local server) the app stays on the template engine.
+    """
+    template = TemplateBreakdownProvider(template_fn)
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+    base_url = os.environ.get("FOCUSCOACH_LLM_BASE_URL", "")
+    if not api_key and not base_url:
+        return template
+
+    llm = LLMBreakdownProvider(
+        base_url or "https://api.openai.com/v1",
+        api_key=api_key,
+        model=os.environ.get("FOCUSCOACH_LLM_MODEL", "gpt-4o-mini"),
+        pool_size=int(os.environ.get("FOCUSCOACH_LLM_POOL_SIZE", "8")),
+    )
+    cache = SemanticResponseCache(os.environ.get("FOCUSCOACH_CACHE_PATH", "focuscoach_cache.sqlite3"))
+    budget = float(os.environ.get("FOCUSCOACH_LLM_BUDGET", "8"))
+    return CachedBreakdownProvider(llm, template, cache, latency_budget=budget)
@@ -0,0 +1,177 @@
+"""
+Reminder Rendering
+Bulk rendering of encouraging reminder and Slack messages for reminder workers.
+
+``create_encouraging_reminder`` is fine for one message at a time; dispatch
+renders whole batches. ``ReminderRenderer`` does the per-template work once:
+every variant is pre-split around ``{time_until}`` for each event type label,
+"time until" wording comes from lookup tables filled in one pass over the
+batch, and Slack messages are assembled from a pre-split skeleton. Output is
+identical to ``create_encouraging_reminder`` + ``format_calendar_reminder_message``
+for the same variant.
+"""
+
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from focuscoach.calendar import ENCOURAGING_MESSAGES, EVENT_TYPE_LABELS
+from focuscoach.slack import SLACK_REMINDER_TEMPLATE
+
+# Placeholder used to split a template around the fields filled at render time
+_SLOT = "\x00"
+
+# "N minutes" / "N hours" wording for every value format_time_until can produce below a day
+_MINUTES = [f"{n} minutes" for n in range(60)]
+_HOURS = [f"{n} hours" for n in range(24)]
+
+# "%I:%M %p" for every minute of the day
+_CLOCK = [f"{(minute // 60) % 12 or 12:02d}:{minute % 60:02d} {'AM' if minute < 720 else 'PM'}"
+          for minute in range(1440)]
+
+
+def clock_label(moment: datetime) -> str:
+    """``moment.strftime("%I:%M %p")`` from the lookup table"""
+    return _CLOCK[moment.hour * 60 + moment.minute]
+
+
+def _split(template: str, **fields: str) -> List[str]:
+    """Fill the known fields and split on the rest, so rendering is a single join"""
+    return template.format(**fields).split(_SLOT)
+
+
+def time_until_buckets(seconds: Sequence[float], days_cache: Optional[Dict[int, str]] = None) -> List[str]:
+    """``format_time_until`` for a whole batch, from lookup tables instead of per-event formatting"""
+    days_cache = {} if days_cache is None else days_cache
+    wording = []
+    append = wording.append
+    for value in seconds:
+        if value < 3600:
+            minutes = int(value / 60)
+            append(_MINUTES[minutes] if minutes >= 0 else f"{minutes} minutes")
+        elif value < 86400:
+            append(_HOURS[int(value / 3600)])
+        else:
+            days = int(value / 86400)
+            text = days_cache.get(days)
+            if text is None:
+                text = days_cache[days] = f"{days} days"
+            append(text)
+    return wording
+
+
+class VariantRotation:
+    """Per-user message variant choice that never repeats until every variant was used.
+
+    Each user walks the variants in order from an offset derived from their
+    id, so two users with reminders at the same moment usually see different
+    wording while one user never gets the same line twice in a row. Only a
+    counter per (user, reminder type) is kept.
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple[Hashable, str], int] = {}
+
+    def next(self, user_id: Hashable, reminder_type: str, variants: int) -> int:
+        key = (user_id, reminder_type)
+        count = self._counters.get(key)
+        if count is None:
+            count = zlib.crc32(f"{user_id}:{reminder_type}".encode("utf-8"))
+        self._counters[key] = count + 1
+        return count % variants
+
+    def forget(self, user_id: Hashable):
+        """Drop a user's rotation state (e.g. after they unsubscribe)"""
+        for key in [key for key in self._counters if key[0] == user_id]:
+            del self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class ReminderRenderer:
+    """Precompiled reminder templates and batch rendering into reusable buffers"""
+
+    def __init__(self, messages: Dict[str, List[str]] = None, labels: Dict[str, str] = None,
+                 rotation: Optional[VariantRotation] = None):
+        self.messages = ENCOURAGING_MESSAGES if messages is None else messages
+        self.labels = EVENT_TYPE_LABELS if labels is None else labels
+        self.rotation = rotation or VariantRotation()
+        # (reminder type, event type) -> one split template per variant
+        self._compiled: Dict[Tuple[str, str], List[List[str]]] = {}
+        self._slack = _split(SLACK_REMINDER_TEMPLATE, reminder_message=_SLOT, title=_SLOT, time=_SLOT,
+                             priority=_SLOT)
+        self._priorities: Dict[str, str] = {}
+        self._days: Dict[int, str] = {}
+
+    def _variants(self, reminder_type: str, event_type: str) -> List[List[str]]:
+        key = (reminder_type, event_type)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            templates = self.messages.get(reminder_type, self.messages["upcoming"])
+            label = self.labels.get(event_type, "event")
+            compiled = self._compiled[key] = [_split(template, event_type=label, time_until=_SLOT)
+                                              for template in templates]
+        return compiled
+
+    def render(self, event: Dict[str, Any], reminder_type: str = "upcoming", user_id: Hashable = None,
+               now: Optional[datetime] = None) -> str:
+        """One reminder, for callers that are not batching"""
+        out: List[str] = []
+        self.render_into(out, [event], [user_id], reminder_type, now)
+        return out[0]
+
+    def render_into(self, out: List[str], events: Sequence[Dict[str, Any]], user_ids: Sequence[Hashable],
+                    reminder_type: str = "upcoming", now: Optional[datetime] = None,
+                    variants: Optional[Sequence[int]] = None) -> int:
+        """Render one reminder per event into ``out`` and return how many were written.
+
+        ``out`` is overwritten from the start and only grows, so a worker can
+        keep one list per batch slot instead of allocating a result list per
+        batch. ``user_ids`` drives the no-repeat rotation; pass ``variants``
+        to pick template indices explicitly instead.
+        """
+        now = now or datetime.now()
+        wording = time_until_buckets([(event["start_time"] - now).total_seconds() for event in events], self._days)
+        shortfall = len(events) - len(out)
+        if shortfall > 0:
+            out.extend([""] * shortfall)
+
+        rotation = self.rotation.next
+        for index, event in enumerate(events):
+            compiled = self._variants(reminder_type, event["type"])
+            variant = variants[index] if variants is not None else rotation(user_ids[index], reminder_type,
+                                                                            len(compiled))
+            out[index] = wording[index].join(compiled[variant])
+        return len(events)
+
+    def slack_into(self, out: List[str], events: Sequence[Dict[str, Any]], reminders: Sequence[str]) -> int:
+        """Wrap already rendered reminders in the Slack message, same buffer rules as ``render_into``"""
+        head, after_message, after_title, after_time, tail = self._slack
+        shortfall = len(events) - len(out)
+        if shortfall > 0:
+            out.extend([""] * shortfall)
+
+        priorities = self._priorities
+        for index, event in enumerate(events):
+            priority = priorities.get(event["priority"])
+            if priority is None:
+                priority = priorities[event["priority"]] = event["priority"].title()
+            out[index] = "".join((head, reminders[index], after_message, event["title"], after_title,
+                                  clock_label(event["start_time"]), after_time, priority, tail))
+        return len(events)
+
+
+if __name__ == "__main__":
+    from focuscoach.calendar import get_calendar_events
+
+    renderer = ReminderRenderer()
+    now = datetime.now()
+    events = get_calendar_events(now) * 2
+    reminders: List[str] = []
+    messages: List[str] = []
+    count = renderer.render_into(reminders, events, ["sam"] * len(events), now=now)
+    renderer.slack_into(messages, events[:count], reminders)
+    for line in reminders[:count]:
+        print(line)
+    print(messages[0])
@@ -0,0 +1,117 @@
+"""
+Reminder Core
+Mandatory reminder scheduling against an explicit reminder book
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Seconds per unit accepted in reminder wording such as "30 minutes before" or "1 day before"
+OFFSET_UNITS = {"week": 604800, "day": 86400, "hour": 3600, "minute": 60}
+
+
+class ReminderOffset(NamedTuple):
+    """How long before an event a reminder fires, kept as whole seconds"""
+
+    seconds: int
+
+    @property
+    def delta(self) -> timedelta:
+        return timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        for unit, size in OFFSET_UNITS.items():
+            if self.seconds and self.seconds % size == 0:
+                amount = self.seconds // size
+                return f"{amount} {unit}{'s' if amount != 1 else ''} before"
+        return f"{self.seconds} seconds before"
+
+
+@lru_cache(maxsize=256)
+def parse_reminder_offset(text: str) -> Optional[ReminderOffset]:
+    """Parse reminder wording once; returns None for wording that is not an offset"""
+    words = text.lower().split()
+    if len(words) < 2 or not words[0].isdigit():
+        return None
+    size = OFFSET_UNITS.get(words[1].rstrip("s"))
+    return ReminderOffset(int(words[0]) * size) if size else None
+
+
+def parse_reminder_offsets(reminder_times: Iterable[Union[str, ReminderOffset]]) -> Tuple[ReminderOffset, ...]:
+    """Typed offsets for a list of wordings or offsets, largest first, without duplicates"""
+    offsets = {time if isinstance(time, ReminderOffset) else parse_reminder_offset(time) for time in reminder_times}
+    offsets.discard(None)
+    return tuple(sorted(offsets, reverse=True))
+
+
+def reminder_offsets(reminder: Dict[str, Any]) -> Tuple[ReminderOffset, ...]:
+    """Offsets of a scheduled reminder; reminders stored before offsets existed are parsed on the fly"""
+    offsets = reminder.get("offsets")
+    return offsets if offsets is not None else parse_reminder_offsets(reminder.get("reminder_times", []))
+
+
+class ReminderBook:
+    """Scheduled reminders for one user, split into tasks and meetings.
+
+    The dicts are used as given, so the Streamlit shell can wrap the ones it
+    keeps in ``st.session_state`` while workers keep their own.
+    """
+
+    def __init__(self, task_reminders: Dict[str, Dict[str, Any]] = None,
+                 meeting_reminders: Dict[str, Dict[str, Any]] = None):
+        self.task_reminders = {} if task_reminders is None else task_reminders
+        self.meeting_reminders = {} if meeting_reminders is None else meeting_reminders
+
+    def reminders_for(self, event_type: str) -> Dict[str, Dict[str, Any]]:
+        """Tasks live in their own book; every other event type counts as a meeting"""
+        return self.task_reminders if event_type == "task" else self.meeting_reminders
+
+
+def schedule_mandatory_reminder(book: ReminderBook, task_name: str, event_type: str,
+                                reminder_times: List[Union[str, ReminderOffset]],
+                                calendar_event: Dict[str, Any] = None,
+                                now: Optional[datetime] = None, recurrence: Optional[str] = None) -> Dict[str, Any]:
+    """Schedule mandatory reminders for tasks or meetings.
+
+    ``reminder_times`` are parsed once into ``offsets``. ``recurrence`` is an
+    RRULE (e.g. ``"FREQ=WEEKLY;BYDAY=MO"``) that repeats the calendar event;
+    see ``focuscoach.recurring`` for its lazy expansion.
+    """
+    reminder_schedule = {
+        "task_name": task_name,
+        "event_type": event_type,
+        "reminder_times": [str(time) for time in reminder_times],
+        "offsets": parse_reminder_offsets(reminder_times),
+        "recurrence": recurrence,
+        "scheduled_at": now or datetime.now(),
+        "calendar_event": calendar_event,
+        "status": "scheduled"
+    }
+
+    book.reminders_for(event_type)[task_name] = reminder_schedule
+    return reminder_schedule
+
+
+def validate_reminder_schedule(book: ReminderBook, task_name: str, event_type: str) -> bool:
+    """Check if mandatory reminders are scheduled for a task/meeting"""
+    return task_name in book.reminders_for(event_type)
+
+
+def get_upcoming_calendar_events_with_reminders(book: ReminderBook,
+                                                calendar_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get calendar events that need reminder scheduling.
+
+    Reminders are keyed by title, so instances of a recurring event share one
+    entry and only the first instance listed is returned.
+    """
+    seen = set()
+    events = []
+    for event in calendar_events:
+        key = (event['title'], event['type'])
+        # Check if reminders are already scheduled
+        if key in seen or validate_reminder_schedule(book, event['title'], event['type']):
+            continue
+        seen.add(key)
+        events.append(event)
+    return events
@@ -0,0 +1,141 @@
+"""
+Breakdown Rendering
+Builds the consolidated markdown/HTML blocks used to render task breakdowns
+"""
+
+import threading
+from collections import OrderedDict
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+# Steps per consolidated step-card block when rendering a breakdown
+STEP_BLOCK_SIZE = 5
+
+STEPS_HEADING = "### 📝 Your Step-by-Step Plan\n\n"
+
+
+def _text(value: Any) -> str:
+    # Breakdowns can come from an LLM now, so never pass raw text into HTML
+    return escape(str(value), quote=False)
+
+
+def step_card_html(number: int, step: Dict[str, Any]) -> str:
+    """One step card; kept free of blank lines so it stays a single HTML block"""
+    return (
+        '<div class="step-card">'
+        f"<h4>Step {number}: {_text(step.get('description', 'No description'))}</h4>"
+        f"<p><strong>⏱️ Time:</strong> {_text(step.get('estimated_time', '15'))} minutes</p>"
+        f"<p><strong>💡 Tips:</strong> {_text(step.get('tips', 'Take your time and be patient with yourself'))}</p>"
+        "</div>"
+    )
+
+
+def steps_block_html(steps: List[Dict[str, Any]], first_number: int) -> str:
+    """Several step cards joined into one markdown message"""
+    return "\n".join(step_card_html(first_number + i, step) for i, step in enumerate(steps))
+
+
+def _notice_html(css_class: str, title: str, body: str) -> str:
+    body = _text(body).replace("\n", "<br>")
+    return f'<div class="{css_class}"><h4>{title}</h4><p>{body}</p></div>'
+
+
+def context_block_html(breakdown: Dict[str, Any]) -> str:
+    """Deadline and urgency notices shown above the steps (empty if neither applies)"""
+    parts = []
+    if breakdown.get("deadline_context"):
+        parts.append(_notice_html("demo-notice", "📅 Deadline Information", breakdown["deadline_context"]))
+    if breakdown.get("urgency_note"):
+        parts.append(_notice_html("encouragement-box", "⚡ Priority Level", breakdown["urgency_note"]))
+    return "\n\n".join(parts)
+
+
+def _bullet_section(title: str, items: List[str]) -> str:
+    bullets = "\n".join(f"- {_text(item)}" for item in items)
+    return f"### {title}\n\n{bullets}"
+
+
+def sections_markdown(breakdown: Dict[str, Any]) -> str:
+    """Everything after the steps (techniques, accommodations, tips, encouragement) as one message"""
+    parts = []
+    if breakdown.get("focus_techniques"):
+        parts.append(_bullet_section("🎯 Suggested Focus Techniques", breakdown["focus_techniques"]))
+    if breakdown.get("accommodations"):
+        parts.append(_bullet_section("🛠️ Accommodations & Tools", breakdown["accommodations"]))
+    if breakdown.get("sensory_tips"):
+        tips = "\n".join(f'<div class="sensory-tip">{_text(tip)}</div>' for tip in breakdown["sensory_tips"])
+        parts.append(f"### 🌿 Sensory-Friendly Tips\n\n{tips}")
+    if breakdown.get("deadline_tips"):
+        parts.append(_bullet_section("⏰ Deadline Management Tips", breakdown["deadline_tips"]))
+    if breakdown.get("encouragement"):
+        parts.append(_notice_html("encouragement-box", "💪 Encouragement", breakdown["encouragement"]))
+    return "\n\n".join(parts)
+
+
+def template_fragments(breakdown: Dict[str, Any]) -> Tuple[List[str], str]:
+    """Pre-render the shared part of a template breakdown: step blocks and trailing sections"""
+    steps = breakdown.get("steps", [])
+    blocks = [
+        steps_block_html(steps[start:start + STEP_BLOCK_SIZE], start + 1)
+        for start in range(0, len(steps), STEP_BLOCK_SIZE)
+    ]
+    if blocks:
+        blocks[0] = STEPS_HEADING + blocks[0]
+    return blocks, sections_markdown(breakdown)
+
+
+class FragmentCache:
+    """Size-bounded LRU of pre-rendered template fragments shared by all sessions.
+
+    Only template breakdowns are cached. The key includes the urgency note,
+    because urgency shifts step time estimates, and whether deadline tips are
+    present; deadline and urgency notices are rendered per request.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[List[str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(breakdown: Dict[str, Any]) -> Optional[tuple]:
+        template = breakdown.get("template")
+        if not template:
+            return None
+        return template, breakdown.get("urgency_note", ""), bool(breakdown.get("deadline_tips"))
+
+    def fragments(self, breakdown: Dict[str, Any]) -> Tuple[List[str], str]:
+        """Return (step blocks, sections) for a breakdown, rendering on first use"""
+        key = self.key_for(breakdown)
+        if key is None:
+            return template_fragments(breakdown)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        rendered = template_fragments(breakdown)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def warm(self, breakdowns) -> int:
+        """Pre-render fragments for the given breakdowns (e.g. every template at startup)"""
+        for breakdown in breakdowns:
+            self.fragments(breakdown)
+        return len(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,75 @@
+"""
+Session Registry
+Tracks the browser sessions that hold state in process-wide engines (partner
+matching, calendar sync) so that state is released once a session is gone.
+
+Each run ``touch``es the session's user; engines register a release callback
+with ``on_end``. ``sweep`` releases users whose session is no longer alive
+and has not been seen for ``grace`` seconds, so a tab that reconnects after a
+network blip keeps its state while a closed one stops leaking it.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class SessionRegistry:
+    """Users with state in shared engines, and how to release it when their session ends"""
+
+    def __init__(self, grace: float = 300.0, interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.grace = grace
+        self.interval = interval
+        self.clock = clock
+        self.released = 0
+        self._sessions: Dict[Hashable, Tuple[Hashable, float]] = {}
+        self._releases: Dict[Hashable, Dict[str, Tuple[Callable[..., Any], tuple]]] = {}
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def touch(self, user_id: Hashable, session_id: Hashable, now: Optional[float] = None):
+        """Record that ``user_id`` is in use by ``session_id``"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._sessions[user_id] = (session_id, now)
+
+    def on_end(self, user_id: Hashable, name: str, release: Callable[..., Any], *args):
+        """Call ``release(*args)`` when the user's session ends; one callback per ``name``"""
+        with self._lock:
+            self._releases.setdefault(user_id, {})[name] = (release, args)
+
+    def sweep(self, is_alive: Callable[[Hashable], bool], now: Optional[float] = None,
+              force: bool = False) -> List[Hashable]:
+        """Release users whose session is gone; runs at most once per ``interval`` unless forced"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if not force and now - self._last_sweep < self.interval:
+                return []
+            self._last_sweep = now
+            ended = [user_id for user_id, (session_id, seen) in self._sessions.items()
+                     if now - seen >= self.grace and not is_alive(session_id)]
+            releases = []
+            for user_id in ended:
+                del self._sessions[user_id]
+                releases.extend(self._releases.pop(user_id, {}).values())
+        # Outside the lock: a release may take an engine's own lock
+        for release, args in releases:
+            release(*args)
+        self.released += len(ended)
+        return ended
+
+
+if __name__ == "__main__":
+    registry = SessionRegistry(grace=120, interval=60, clock=lambda: 0.0)
+    partners = {"alex": "sam", "sam": "alex"}
+    for user_id in partners:
+        registry.touch(user_id, f"session-{user_id}", now=0.0)
+        registry.on_end(user_id, "partner_match", partners.pop, user_id, None)
+    open_tabs = {"session-alex"}
+
+    print(f"After 30s: released {registry.sweep(open_tabs.__contains__, now=30.0)} (sweeps once a minute)")
+    print(f"After 90s: released {registry.sweep(open_tabs.__contains__, now=90.0)} (sam's tab may still reconnect)")
+    print(f"After 200s: released {registry.sweep(open_tabs.__contains__, now=200.0)}; partners left: {partners}")
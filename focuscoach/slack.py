@@ -0,0 +1,67 @@
+"""
+Slack Core
+Slack sharing and calendar reminder messages (demo transport)
+"""
+
+from typing import Any, Dict
+
+from focuscoach.calendar import create_encouraging_reminder
+
+
+def send_to_slack(task_breakdown: Any, workspace: str, channel: str) -> Dict[str, Any]:
+    """Simulate sending task breakdown to Slack (demo version)"""
+    # In a real implementation, this would use Slack API
+    # For demo purposes, we'll simulate the action
+    return {
+        "success": True,
+        "message": f"Task breakdown sent to #{channel} in {workspace} workspace",
+        "slack_url": f"https://{workspace}.slack.com/channels/{channel}"
+    }
+
+
+# Slack message around an encouraging reminder; also precompiled by focuscoach.reminder_render
+SLACK_REMINDER_TEMPLATE = """
+🧠 FocusCoach Calendar Reminder
+
+{reminder_message}
+
+📅 **Event**: {title}
+⏰ **Time**: {time}
+📊 **Priority**: {priority}
+
+💡 **Gentle Tip**: Take a moment to prepare - you've got this!
+🎯 **Next**: Focus on what you can control right now
+    """
+
+
+def format_calendar_reminder_message(event: Dict[str, Any], reminder_message: str) -> str:
+    """Format the Slack message around an encouraging reminder"""
+    return SLACK_REMINDER_TEMPLATE.format(
+        reminder_message=reminder_message,
+        title=event['title'],
+        time=event['start_time'].strftime('%I:%M %p'),
+        priority=event['priority'].title()
+    )
+
+
+def send_calendar_reminder_to_slack(event: Dict[str, Any], workspace: str, channel: str,
+                                    reminder_type: str = "upcoming") -> Dict[str, Any]:
+    """Send calendar reminder to Slack with encouraging message"""
+    reminder_message = create_encouraging_reminder(event, reminder_type)
+
+    return {
+        "success": True,
+        "message": f"Calendar reminder sent to #{channel}",
+        "reminder": reminder_message,
+        "slack_message": format_calendar_reminder_message(event, reminder_message)
+    }
+
+
+def send_digest_to_slack(digest_message: str, event_count: int, workspace: str, channel: str) -> Dict[str, Any]:
+    """Send one digest covering several calendar reminders (demo version)"""
+    return {
+        "success": True,
+        "message": (f"Reminder digest for {event_count} events sent to #{channel}" if event_count > 1
+                    else f"Calendar reminder sent to #{channel}"),
+        "slack_message": digest_message
+    }
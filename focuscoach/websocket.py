@@ -0,0 +1,132 @@
+"""
+WebSocket Core
+Minimal RFC 6455 framing on asyncio streams for the body-doubling rooms and
+their load client: handshake, frame encoding, message reads and a client
+connector. No extensions (permessage-deflate) or subprotocols.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+from typing import Dict, Optional, Tuple
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    """Protocol violation; ``code`` is the close code to send"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def handshake_response(headers: Dict[str, str]) -> bytes:
+    """The 101 response for an upgrade request's (lower-cased) headers"""
+    key = headers.get("sec-websocket-key")
+    if headers.get("upgrade", "").lower() != "websocket" or not key:
+        raise WebSocketError(1002, "not a websocket upgrade")
+    return (f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode("ascii")
+
+
+def _mask(data: bytes, mask: bytes) -> bytes:
+    # One big-integer XOR instead of a Python loop per byte
+    length = len(data)
+    if not length:
+        return data
+    key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+    return (int.from_bytes(data, "big") ^ key).to_bytes(length, "big")
+
+
+def encode_frame(payload: bytes, opcode: int = OP_TEXT, mask: bool = False) -> bytes:
+    """One final frame; servers send unmasked, clients must mask"""
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        head = bytes((0x80 | opcode, mask_bit | length))
+    elif length < 1 << 16:
+        head = bytes((0x80 | opcode, mask_bit | 126)) + length.to_bytes(2, "big")
+    else:
+        head = bytes((0x80 | opcode, mask_bit | 127)) + length.to_bytes(8, "big")
+    if not mask:
+        return head + payload
+    key = os.urandom(4)
+    return head + key + _mask(payload, key)
+
+
+def close_frame(code: int = 1000, mask: bool = False) -> bytes:
+    return encode_frame(code.to_bytes(2, "big"), OP_CLOSE, mask)
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int) -> Tuple[bool, int, bytes]:
+    """``(fin, opcode, payload)`` of the next frame, unmasked"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+    if length > max_size:
+        raise WebSocketError(1009, f"frame of {length} bytes is over the {max_size} byte limit")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length) if length else b""
+    return bool(first & 0x80), first & 0x0F, _mask(payload, key) if key else payload
+
+
+async def read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_size: int = 1 << 16,
+                       mask: bool = False) -> Optional[Tuple[int, bytes]]:
+    """The next data message ``(opcode, payload)``, reassembled; None once the peer closes.
+
+    Pings are answered here; pongs are skipped. ``mask`` is set by clients
+    so their replies are masked.
+    """
+    opcode, parts, size = None, [], 0
+    while True:
+        fin, frame_opcode, payload = await read_frame(reader, max_size)
+        if frame_opcode >= OP_CLOSE:
+            if frame_opcode == OP_CLOSE:
+                if not writer.is_closing():
+                    writer.write(encode_frame(payload[:2], OP_CLOSE, mask))
+                return None
+            if frame_opcode == OP_PING:
+                writer.write(encode_frame(payload, OP_PONG, mask))
+            continue
+        if frame_opcode != OP_CONTINUATION:
+            if opcode is not None:
+                raise WebSocketError(1002, "new message before the previous one finished")
+            opcode = frame_opcode
+        elif opcode is None:
+            raise WebSocketError(1002, "continuation without a message")
+        size += len(payload)
+        if size > max_size:
+            raise WebSocketError(1009, f"message over the {max_size} byte limit")
+        parts.append(payload)
+        if fin:
+            return opcode, b"".join(parts)
+
+
+async def connect(host: str, port: int, path: str, timeout: float = 10.0
+                  ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a client websocket; frames written on it must be masked"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    head = (await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)).decode("latin-1")
+    if not head.startswith("HTTP/1.1 101") or accept_key(key) not in head:
+        writer.close()
+        raise WebSocketError(1002, f"handshake refused: {head.splitlines()[0] if head else 'no response'}")
+    return reader, writer
@@ -4,14 +4,38 @@ Optimized for public sharing and demo purposes
 """
 
 import streamlit as st
-import json
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import itertools
 import os
+import time
+import uuid
 from datetime import datetime, timedelta
 from focus_techniques import FocusTechniqueManager, PomodoroTimer
-import requests
-import base64
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from focuscoach import (BREAKDOWN_TEMPLATES, ReminderBook, create_encouraging_reminder, demo_task_breakdown,
+                        get_gmail_deadlines, get_upcoming_calendar_events_with_reminders,
+                        schedule_mandatory_reminder, validate_reminder_schedule)
+from focuscoach.calendar_sync import CalendarSync, FakeCalendarProvider
+from focuscoach.digest import DigestCoalescer, event_notifications, render_digest
+from focuscoach.ics import load_calendar_events
+from focuscoach.ics_export import export_cache, plan_start
+from focuscoach.instrumentation import instrumentation
+from focuscoach.providers import breakdown_events, create_default_provider, run_sync
+from focuscoach.recurring import RECURRENCE_PRESETS, next_fire
+from focuscoach.sessions import SessionRegistry
+from focuscoach.rendering import (STEP_BLOCK_SIZE, STEPS_HEADING, context_block_html, fragment_cache,
+                                  sections_markdown, steps_block_html)
+
+# Sections decorated with @fragment rerun on their own when one of their widgets
+# changes (st.fragment, Streamlit 1.37+) instead of rerunning the whole app. On
+# older Streamlit, or with FOCUSCOACH_FRAGMENTS=0, they are plain functions.
+fragment = getattr(st, "fragment", None) if os.environ.get("FOCUSCOACH_FRAGMENTS", "1") != "0" else None
+fragment = fragment or (lambda func: func)
+
+# Hit rates of the process-wide render caches, read whenever metrics are exported
+instrumentation.add_collector("fragment_cache", lambda: {"hits": fragment_cache.hits, "misses": fragment_cache.misses,
+                                                         "entries": len(fragment_cache)})
+instrumentation.add_collector("export_cache", lambda: {"hits": export_cache.hits, "misses": export_cache.misses})
 
 # Page configuration
 st.set_page_config(
@@ -22,7 +46,7 @@ st.set_page_config(
 )
 
 # Professional CSS for neurodivergent-friendly design
-st.markdown("""
+APP_CSS = """
 <style>
     /* Import professional fonts */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=JetBrains+Mono:wght@400;500;600&display=swap');
@@ -392,7 +416,7 @@ st.markdown("""
         border: 1px solid var(--border-light);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -426,6 +450,10 @@ def initialize_session_state():
         st.session_state.calendar_reminders_enabled = False
     if 'reminder_frequency' not in st.session_state:
         st.session_state.reminder_frequency = "30 minutes before"
+    if 'digest_mode' not in st.session_state:
+        st.session_state.digest_mode = True
+    if 'digest_window_minutes' not in st.session_state:
+        st.session_state.digest_window_minutes = 60
     if 'mandatory_reminders_enabled' not in st.session_state:
         st.session_state.mandatory_reminders_enabled = True
     if 'task_reminders' not in st.session_state:
@@ -433,654 +461,354 @@ def initialize_session_state():
     if 'meeting_reminders' not in st.session_state:
         st.session_state.meeting_reminders = {}
 
-def send_to_slack(task_breakdown, workspace, channel):
-    """Simulate sending task breakdown to Slack (demo version)"""
-    # In a real implementation, this would use Slack API
-    # For demo purposes, we'll simulate the action
-    return {
-        "success": True,
-        "message": f"Task breakdown sent to #{channel} in {workspace} workspace",
-        "slack_url": f"https://{workspace}.slack.com/channels/{channel}"
-    }
+def reminder_book():
+    """This session's scheduled reminders as a core ReminderBook"""
+    return ReminderBook(st.session_state.task_reminders, st.session_state.meeting_reminders)
 
-def get_calendar_events():
-    """Simulate getting calendar events (demo version)"""
-    # In a real implementation, this would use Google Calendar API
-    # For demo purposes, we'll return sample calendar events
-    from datetime import datetime, timedelta
-    
-    now = datetime.now()
-    sample_events = [
-        {
-            "title": "Team Standup",
-            "start_time": now + timedelta(hours=2),
-            "end_time": now + timedelta(hours=2, minutes=30),
-            "type": "meeting",
-            "priority": "medium"
-        },
-        {
-            "title": "Quarterly Report Deadline",
-            "start_time": now + timedelta(days=3),
-            "end_time": now + timedelta(days=3),
-            "type": "deadline",
-            "priority": "high"
-        },
-        {
-            "title": "Focus Time - Deep Work",
-            "start_time": now + timedelta(hours=4),
-            "end_time": now + timedelta(hours=5),
-            "type": "focus",
-            "priority": "low"
-        },
-        {
-            "title": "Client Presentation",
-            "start_time": now + timedelta(days=1, hours=10),
-            "end_time": now + timedelta(days=1, hours=11),
-            "type": "presentation",
-            "priority": "high"
-        }
-    ]
-    return sample_events
-
-def create_encouraging_reminder(event, reminder_type="upcoming"):
-    """Create encouraging, non-overwhelming reminders"""
-    
-    encouraging_messages = {
-        "upcoming": [
-            "🌟 You've got this! Your {event_type} is coming up in {time_until}",
-            "💪 Ready to shine? Your {event_type} starts in {time_until}",
-            "🎯 You're prepared and capable! {time_until} until your {event_type}",
-            "✨ Take a deep breath - you're going to do great! {time_until} until {event_type}",
-            "🚀 Your future self will thank you for being ready! {time_until} until {event_type}"
-        ],
-        "deadline": [
-            "📅 Gentle reminder: Your {event_type} is due in {time_until}",
-            "⏰ You're making great progress! {time_until} left for your {event_type}",
-            "🎯 One step at a time - you have {time_until} for your {event_type}",
-            "💡 Remember: progress over perfection! {time_until} until {event_type}",
-            "🌟 You're doing amazing work! {time_until} left for your {event_type}"
-        ],
-        "focus": [
-            "🧠 Time for some focused magic! Your {event_type} starts in {time_until}",
-            "🎧 Ready to dive deep? {time_until} until your {event_type}",
-            "⚡ Your brain is ready for this! {time_until} until {event_type}",
-            "🔋 Energy check: You've got this! {time_until} until {event_type}",
-            "🎯 Focus mode activated! {time_until} until your {event_type}"
-        ],
-        "meeting": [
-            "👥 Ready to connect? Your {event_type} starts in {time_until}",
-            "🤝 You bring valuable insights! {time_until} until your {event_type}",
-            "💬 Your voice matters! {time_until} until your {event_type}",
-            "🌟 You're going to contribute great ideas! {time_until} until {event_type}",
-            "🎯 Ready to collaborate? {time_until} until your {event_type}"
-        ]
-    }
-    
-    # Calculate time until event
-    from datetime import datetime
-    now = datetime.now()
-    time_diff = event["start_time"] - now
-    
-    if time_diff.total_seconds() < 3600:  # Less than 1 hour
-        time_until = f"{int(time_diff.total_seconds() / 60)} minutes"
-    elif time_diff.total_seconds() < 86400:  # Less than 1 day
-        time_until = f"{int(time_diff.total_seconds() / 3600)} hours"
-    else:  # More than 1 day
-        time_until = f"{int(time_diff.total_seconds() / 86400)} days"
-    
-    # Get event type for message
-    event_type_map = {
-        "meeting": "meeting",
-        "deadline": "deadline",
-        "focus": "focus session",
-        "presentation": "presentation"
-    }
-    event_type = event_type_map.get(event["type"], "event")
-    
-    # Select appropriate message
-    messages = encouraging_messages.get(reminder_type, encouraging_messages["upcoming"])
-    import random
-    message_template = random.choice(messages)
+@st.cache_resource
+def get_calendar_sync():
+    """Process-wide calendar sync engine (the demo runs on the local fake provider)"""
+    return CalendarSync(FakeCalendarProvider())
+
+@st.cache_resource
+def get_session_registry():
+    """Sessions holding state in the shared engines, released a few minutes after their tab closes"""
+    return SessionRegistry()
+
+def session_alive(session_id):
+    # Without a server runtime (tests, bare mode) nothing can be told apart from a live tab
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+def track_session():
+    """Keep this session's shared state and release the state of sessions that have ended"""
+    registry = get_session_registry()
+    ctx = get_script_run_ctx()
+    if ctx is not None and 'calendar_user' in st.session_state:
+        registry.touch(st.session_state.calendar_user, ctx.session_id)
+    registry.sweep(session_alive)
+
+def calendar_user_id():
+    """This session's id in the process-wide calendar sync, matching engine and notification router"""
+    if 'calendar_user' not in st.session_state:
+        user = st.session_state.calendar_user = uuid.uuid4().hex
+        sync = get_calendar_sync()
+        sync.provider.seed_demo(user)
+        track_session()
+        # The demo calendar and its synced copy go when the session does
+        registry = get_session_registry()
+        registry.on_end(user, "calendar_sync", sync.remove_user, user)
+        registry.on_end(user, "calendar_provider", sync.provider.remove_user, user)
+    return st.session_state.calendar_user
+
+def on_session_end(name, release, *args):
+    """Call ``release(*args)`` once this browser session has ended"""
+    get_session_registry().on_end(calendar_user_id(), name, release, *args)
+
+def current_calendar_events():
+    """Events imported from the user's .ics export, or the user's incrementally synced calendar"""
+    if st.session_state.calendar_events:
+        return st.session_state.calendar_events
     
-    return message_template.format(event_type=event_type, time_until=time_until)
+    # Only fetches when notified of changes or the last sync is stale, and then only the delta
+    return get_calendar_sync().refresh(calendar_user_id(), reminder_book()).sorted_events()
 
-def send_calendar_reminder_to_slack(event, workspace, channel, reminder_type="upcoming"):
-    """Send calendar reminder to Slack with encouraging message"""
-    reminder_message = create_encouraging_reminder(event, reminder_type)
+@st.cache_resource
+def get_notification_outbox():
+    """Shared outbox and sender; Slack posts are queued with their state change and sent idempotently.
+
+    Setting ``FOCUSCOACH_SMTP_HOST`` adds an ``email`` channel over pooled SMTP connections.
+    """
+    from focuscoach.outbox import DemoSlackChannel, Outbox, OutboxSender
     
-    # Format the Slack message
-    slack_message = f"""
-🧠 FocusCoach Calendar Reminder
+    outbox = Outbox(os.environ.get("FOCUSCOACH_OUTBOX_PATH", ":memory:"))
+    slack_channel = DemoSlackChannel()
+    channels = {"slack": slack_channel}
+    if os.environ.get("FOCUSCOACH_SMTP_HOST"):
+        from focuscoach.email_channel import EmailChannel, SMTPPool
+        
+        channels["email"] = EmailChannel(SMTPPool(os.environ["FOCUSCOACH_SMTP_HOST"],
+                                                  int(os.environ.get("FOCUSCOACH_SMTP_PORT", "25"))))
+    return outbox, OutboxSender(outbox, channels), slack_channel
+
+@st.cache_resource
+def get_notification_router():
+    """Shared router fanning reminders out to Slack, in-app and (with SMTP configured) email"""
+    from focuscoach.router import ChannelLane, InAppInbox, NotificationRouter, email_payload, slack_payload
+    
+    _, sender, slack_channel = get_notification_outbox()
+    inbox = InAppInbox()
+    lanes = [ChannelLane("slack", slack_channel, slack_payload), ChannelLane("in_app", inbox)]
+    if "email" in sender.channels:
+        lanes.append(ChannelLane("email", sender.channels["email"].send, email_payload))
+    return run_sync(NotificationRouter(lanes).start()), inbox
 
-{reminder_message}
+@st.cache_resource
+def get_breakdown_provider():
+    """Shared breakdown provider (templates, or cached LLM with template fallback)"""
+    provider = create_default_provider(instrumentation.traced("core.demo_task_breakdown")(demo_task_breakdown))
+    cache = getattr(provider, "cache", None)
+    if cache is not None:
+        instrumentation.add_collector("response_cache", lambda: {"hits": cache.hits, "misses": cache.misses,
+                                                                 "fallbacks": provider.fallbacks})
+    return provider
 
-📅 **Event**: {event['title']}
-⏰ **Time**: {event['start_time'].strftime('%I:%M %p')}
-📊 **Priority**: {event['priority'].title()}
+@st.cache_resource
+def warm_fragment_cache():
+    """Pre-render every built-in template once per process"""
+    return fragment_cache.warm(demo_task_breakdown(key) for key in BREAKDOWN_TEMPLATES)
 
-💡 **Gentle Tip**: Take a moment to prepare - you've got this!
-🎯 **Next**: Focus on what you can control right now
+def _display_prerendered_breakdown(breakdown, emit, stats, started):
+    """Render a template breakdown from the shared fragment cache.
+
+    Only the deadline and urgency notices are formatted per request.
     """
-    
-    return {
-        "success": True,
-        "message": f"Calendar reminder sent to #{channel}",
-        "reminder": reminder_message,
-        "slack_message": slack_message
-    }
+    context = context_block_html(breakdown)
+    if context:
+        emit(st, context)
+    
+    blocks, sections = fragment_cache.fragments(breakdown)
+    for block in blocks:
+        emit(st, block)
+        if stats["time_to_first_step_ms"] is None:
+            stats["time_to_first_step_ms"] = (time.perf_counter() - started) * 1000
+    if sections:
+        emit(st, sections)
+    
+    stats["steps"] = len(breakdown.get("steps", []))
+    stats["fragment_cache_hits"] = fragment_cache.hits
+    stats["total_ms"] = (time.perf_counter() - started) * 1000
+    st.session_state.last_render_stats = stats
+    return breakdown
 
-def schedule_mandatory_reminder(task_name, event_type, reminder_times, calendar_event=None):
-    """Schedule mandatory reminders for tasks or meetings"""
-    from datetime import datetime, timedelta
-    
-    reminder_schedule = {
-        "task_name": task_name,
-        "event_type": event_type,
-        "reminder_times": reminder_times,
-        "scheduled_at": datetime.now(),
-        "calendar_event": calendar_event,
-        "status": "scheduled"
-    }
-    
-    # Store in session state
-    if event_type == "task":
-        st.session_state.task_reminders[task_name] = reminder_schedule
-    else:
-        st.session_state.meeting_reminders[task_name] = reminder_schedule
-    
-    return reminder_schedule
+@instrumentation.traced("render.breakdown_stream")
+def display_breakdown_stream(events, flush_interval=0.15):
+    """Render a breakdown progressively from provider stream events.
 
-def validate_reminder_schedule(task_name, event_type):
-    """Check if mandatory reminders are scheduled for a task/meeting"""
-    if event_type == "task":
-        return task_name in st.session_state.task_reminders
-    else:
-        return task_name in st.session_state.meeting_reminders
+    Steps are written as they arrive but batched into consolidated step-card
+    blocks, so a 15-step plan costs a handful of delta messages instead of
+    dozens. Returns the final breakdown and records time-to-first-step and
+    message count in ``st.session_state.last_render_stats``.
+    """
+    started = time.perf_counter()
+    stats = {"messages": 0, "steps": 0, "time_to_first_step_ms": None, "total_ms": None}
 
-def get_upcoming_calendar_events_with_reminders():
-    """Get calendar events that need reminder scheduling"""
-    calendar_events = get_calendar_events()
-    events_needing_reminders = []
-    
-    for event in calendar_events:
-        # Check if reminders are already scheduled
-        if not validate_reminder_schedule(event['title'], event['type']):
-            events_needing_reminders.append(event)
-    
-    return events_needing_reminders
+    def emit(container, body):
+        container.markdown(body, unsafe_allow_html=True)
+        stats["messages"] += 1
 
-def get_gmail_deadlines(gmail_address):
-    """Simulate getting deadlines from Gmail (demo version)"""
-    # In a real implementation, this would use Gmail API
-    # For demo purposes, we'll return sample deadlines
-    sample_deadlines = [
-        {
-            "title": "Quarterly Report Due",
-            "date": "2024-01-15",
-            "priority": "high",
-            "source": "email from SEC"
-        },
-        {
-            "title": "Board Meeting Preparation",
-            "date": "2024-01-20",
-            "priority": "medium",
-            "source": "calendar invite"
-        },
-        {
-            "title": "Audit Review Meeting",
-            "date": "2024-01-25",
-            "priority": "high",
-            "source": "email from auditor"
-        },
-        {
-            "title": "Tax Filing Deadline",
-            "date": "2024-01-31",
-            "priority": "high",
-            "source": "IRS reminder email"
-        }
-    ]
-    
-    return sample_deadlines
-
-def analyze_deadlines_for_task(task, deadlines):
-    """Analyze deadlines to provide personalized task breakdown"""
-    relevant_deadlines = []
-    urgency_level = "medium"
-    
-    # Check for relevant deadlines
-    for deadline in deadlines:
-        if any(keyword in task.lower() for keyword in ["report", "quarterly", "audit", "tax", "meeting"]):
-            if any(keyword in deadline["title"].lower() for keyword in ["report", "quarterly", "audit", "tax", "meeting"]):
-                relevant_deadlines.append(deadline)
-    
-    # Determine urgency
-    if relevant_deadlines:
-        high_priority_count = sum(1 for d in relevant_deadlines if d["priority"] == "high")
-        if high_priority_count > 0:
-            urgency_level = "high"
-        elif len(relevant_deadlines) > 2:
-            urgency_level = "high"
-    
-    return relevant_deadlines, urgency_level
-
-def personalize_task_breakdown(task, breakdown, deadlines, urgency):
-    """Personalize task breakdown based on deadlines and urgency"""
-    personalized_breakdown = breakdown.copy()
-    
-    # Add deadline context
-    if deadlines:
-        deadline_context = f"📅 **Upcoming Deadlines:**\n"
-        for deadline in deadlines[:3]:  # Show top 3 relevant deadlines
-            deadline_context += f"• {deadline['title']} - {deadline['date']} ({deadline['priority']} priority)\n"
-        
-        personalized_breakdown["deadline_context"] = deadline_context
-    
-    # Adjust time estimates based on urgency
-    if urgency == "high":
-        # Reduce time estimates for urgent tasks
-        for step in personalized_breakdown["steps"]:
-            current_time = int(step["estimated_time"])
-            step["estimated_time"] = str(max(5, current_time - 5))  # Reduce by 5 minutes, minimum 5
-        personalized_breakdown["urgency_note"] = "⚡ **High Priority Task** - Time estimates have been adjusted for urgency"
-    elif urgency == "low":
-        # Increase time estimates for less urgent tasks
-        for step in personalized_breakdown["steps"]:
-            current_time = int(step["estimated_time"])
-            step["estimated_time"] = str(current_time + 5)  # Add 5 minutes
-        personalized_breakdown["urgency_note"] = "🐌 **Low Priority Task** - You have more time to work on this"
-    
-    # Add deadline-specific tips
-    if deadlines:
-        personalized_breakdown["deadline_tips"] = [
-            "Set up calendar reminders for each step",
-            "Break work into smaller chunks to meet deadlines",
-            "Ask for help if you're falling behind",
-            "Prioritize the most critical sections first"
-        ]
-    
-    return personalized_breakdown
-
-def demo_task_breakdown(task: str, user_context: str = "", gmail_address: str = None) -> dict:
-    """Demo version of task breakdown (no API key required)"""
-    
-    # Get deadlines if Gmail is connected
-    deadlines = []
-    urgency = "medium"
-    if gmail_address:
-        try:
-            # Check if session state is available (when running in Streamlit)
-            if hasattr(st.session_state, 'gmail_connected') and st.session_state.gmail_connected:
-                deadlines = get_gmail_deadlines(gmail_address)
-                relevant_deadlines, urgency = analyze_deadlines_for_task(task, deadlines)
-                st.session_state.user_deadlines = deadlines
-            else:
-                # Demo mode - simulate Gmail connection
-                deadlines = get_gmail_deadlines(gmail_address)
-                relevant_deadlines, urgency = analyze_deadlines_for_task(task, deadlines)
-        except:
-            # Fallback for when session state is not available
-            deadlines = get_gmail_deadlines(gmail_address)
-            relevant_deadlines, urgency = analyze_deadlines_for_task(task, deadlines)
-    
-    # Pre-defined breakdowns for common tasks
-    demo_breakdowns = {
-        "prepare quarterly report": {
-            "steps": [
-                {"description": "Create the Cover Page with company details", "estimated_time": "10", "tips": "Add company name, ticker symbol, CIK, quarter/year, filing date, and SEC file number"},
-                {"description": "Set up Part I - Financial Information section", "estimated_time": "5", "tips": "Create headers for Item 1 (Financial Statements) and Item 2 (MD&A)"},
-                {"description": "Add Condensed Consolidated Balance Sheets", "estimated_time": "30", "tips": "Include assets, liabilities, and shareholders' equity for current quarter and prior year-end"},
-                {"description": "Create Income Statement (Operations)", "estimated_time": "25", "tips": "Show revenue, expenses, net income/loss for current quarter and YTD vs. prior year"},
-                {"description": "Add Comprehensive Income Statement", "estimated_time": "20", "tips": "Include net income plus other comprehensive income (foreign currency, unrealized gains/losses)"},
-                {"description": "Create Cash Flow Statement", "estimated_time": "25", "tips": "Show cash from operating, investing, and financing activities (current quarter and YTD vs. prior year)"},
-                {"description": "Add Shareholders' Equity Statement", "estimated_time": "20", "tips": "Document changes in stock, retained earnings, treasury stock, etc."},
-                {"description": "Write Notes to Financial Statements", "estimated_time": "45", "tips": "Include critical accounting policies, segment info, debt, legal proceedings, risks, subsequent events"},
-                {"description": "Write Management's Discussion & Analysis (MD&A)", "estimated_time": "60", "tips": "Explain results of operations, liquidity, trends, risks, uncertainties, and critical accounting estimates"},
-                {"description": "Add Market Risk Disclosures (Item 3)", "estimated_time": "20", "tips": "Document exposure to interest rate, foreign currency, commodity price, or equity price risks"},
-                {"description": "Complete Controls and Procedures (Item 4)", "estimated_time": "15", "tips": "Evaluate disclosure controls and internal controls, get CEO and CFO signatures"},
-                {"description": "Add Part II - Other Information", "estimated_time": "30", "tips": "Include legal proceedings, risk factors, unregistered sales, defaults, other material events"},
-                {"description": "Create Exhibits section", "estimated_time": "20", "tips": "List certifications, press releases, material contracts, XBRL data files"},
-                {"description": "Add required signatures", "estimated_time": "5", "tips": "Get signatures from principal executive and financial officers"},
-                {"description": "Final review and compliance check", "estimated_time": "30", "tips": "Ensure GAAP compliance, check filing deadlines (40-45 days after quarter-end), review for completeness"}
-            ],
-            "focus_techniques": ["Time blocking for each financial statement", "Pomodoro technique (25 min work, 5 min break)", "Body doubling with accounting team", "Use focus app like Forest", "Break into morning/afternoon sessions"],
-            "accommodations": ["Use noise-cancelling headphones", "Set up a comfortable workspace with dual monitors", "Take sensory breaks when needed", "Ask for help from accounting team", "Use templates and checklists", "Have backup data sources ready"],
-            "sensory_tips": ["Use natural lighting if possible", "Try instrumental music for focus", "Have fidget tools nearby", "Take movement breaks every hour", "Use comfortable ergonomic setup", "Keep water and healthy snacks nearby"],
-            "encouragement": "Quarterly reports are complex but you've got this! Take it one financial statement at a time. Remember, progress not perfection - every section completed is a win!"
-        },
-        "clean my room": {
-            "steps": [
-                {"description": "Start by making your bed", "estimated_time": "3", "tips": "This gives you an instant sense of accomplishment!"},
-                {"description": "Pick up and put away 5 items", "estimated_time": "10", "tips": "Start small - even 5 items is progress"},
-                {"description": "Sort clothes into clean/dirty piles", "estimated_time": "15", "tips": "Use a timer and take breaks"},
-                {"description": "Put dirty clothes in hamper, hang clean ones", "estimated_time": "10", "tips": "Don't worry about folding perfectly - just get them off the floor"},
-                {"description": "Organize one surface (desk, dresser, etc.)", "estimated_time": "20", "tips": "Focus on one area at a time"},
-                {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Hydrate and stretch"},
-                {"description": "Tackle one more area", "estimated_time": "15", "tips": "Celebrate what you've accomplished so far"},
-                {"description": "Do a final sweep - put away any remaining items", "estimated_time": "10", "tips": "You're almost done! Just a few more items to go"}
-            ],
-            "focus_techniques": ["Chunking technique", "Body doubling with a friend", "Use a timer for each step"],
-            "accommodations": ["Play music you enjoy", "Use a comfortable outfit", "Take breaks when needed", "Ask for help if you get overwhelmed"],
-            "sensory_tips": ["Open windows for fresh air", "Use gloves if textures bother you", "Take movement breaks", "Use a comfortable pace"],
-            "encouragement": "Every small step makes a difference! You're doing great!"
-        },
-        "study for exam": {
-            "steps": [
-                {"description": "Gather all your study materials (books, notes, laptop)", "estimated_time": "5", "tips": "Set up your study space first - it helps your brain get ready"},
-                {"description": "Review the study guide or syllabus", "estimated_time": "15", "tips": "Don't try to memorize everything at once"},
-                {"description": "Create a study schedule for the week", "estimated_time": "10", "tips": "Break it into manageable chunks"},
-                {"description": "Start with the easiest topic first", "estimated_time": "20", "tips": "Build confidence by starting with what you know"},
-                {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Move around and hydrate"},
-                {"description": "Study one challenging topic for 25 minutes", "estimated_time": "25", "tips": "Use the Pomodoro technique"},
-                {"description": "Take another 5-minute break", "estimated_time": "5", "tips": "Stretch and have a snack"},
-                {"description": "Review what you just studied", "estimated_time": "10", "tips": "Summarize in your own words"},
-                {"description": "Create flashcards or summary notes", "estimated_time": "15", "tips": "Writing helps you remember better"},
-                {"description": "Test yourself on what you studied", "estimated_time": "10", "tips": "Quiz yourself - it's the best way to see what you know"}
-            ],
-            "focus_techniques": ["Pomodoro technique", "Active recall methods", "Study with a friend"],
-            "accommodations": ["Use noise-cancelling headphones", "Find a quiet study space", "Take regular breaks", "Use study apps if helpful"],
-            "sensory_tips": ["Good lighting is important", "Comfortable seating", "Have water and snacks nearby", "Take movement breaks"],
-            "encouragement": "You're building knowledge step by step. You've got this!"
-        },
-        "write a blog post": {
-            "steps": [
-                {"description": "Open your document and add a working title", "estimated_time": "3", "tips": "Don't worry about the perfect title - you can change it later"},
-                {"description": "Brainstorm 5-7 key points you want to cover", "estimated_time": "10", "tips": "Use bullet points - don't overthink it"},
-                {"description": "Write the introduction paragraph", "estimated_time": "15", "tips": "Start with a hook - why should people read this?"},
-                {"description": "Write the first main point", "estimated_time": "20", "tips": "Just start writing - you can edit later"},
-                {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Step away and stretch"},
-                {"description": "Write the second main point", "estimated_time": "20", "tips": "Keep the momentum going"},
-                {"description": "Add the third main point", "estimated_time": "20", "tips": "You're getting into the flow now"},
-                {"description": "Write a conclusion paragraph", "estimated_time": "10", "tips": "Summarize your main points and add a call to action"},
-                {"description": "Read through and edit for clarity", "estimated_time": "15", "tips": "Read it out loud to catch any awkward phrases"},
-                {"description": "Add a final title and publish", "estimated_time": "5", "tips": "You did it! Time to share your thoughts with the world"}
-            ],
-            "focus_techniques": ["Pomodoro technique", "Free writing", "Body doubling with a writing partner"],
-            "accommodations": ["Use a distraction-free writing app", "Set up a comfortable writing space", "Have water and snacks nearby", "Take breaks when you get stuck"],
-            "sensory_tips": ["Good lighting is important", "Comfortable seating", "Background music if helpful", "Take movement breaks"],
-            "encouragement": "Your voice matters! Every word you write is progress."
-        },
-        "plan a presentation": {
-            "steps": [
-                {"description": "Open a new document and write your topic at the top", "estimated_time": "2", "tips": "Keep it simple - just the main topic"},
-                {"description": "Write down your main message in one sentence", "estimated_time": "5", "tips": "What do you want people to remember?"},
-                {"description": "Create an outline with 3-5 main points", "estimated_time": "15", "tips": "Use bullet points - keep it simple"},
-                {"description": "Write a brief introduction", "estimated_time": "10", "tips": "Tell them what you're going to tell them"},
-                {"description": "Develop your first main point", "estimated_time": "20", "tips": "Add examples or stories to make it interesting"},
-                {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Step away and think about your audience"},
-                {"description": "Develop your second main point", "estimated_time": "20", "tips": "Keep it relevant to your main message"},
-                {"description": "Add your third main point", "estimated_time": "20", "tips": "You're building a strong case"},
-                {"description": "Write a conclusion that summarizes your points", "estimated_time": "10", "tips": "End with a clear takeaway"},
-                {"description": "Practice your presentation out loud", "estimated_time": "15", "tips": "Practice makes perfect - you've got this!"}
-            ],
-            "focus_techniques": ["Time blocking", "Practice with a friend", "Record yourself practicing"],
-            "accommodations": ["Use presentation software you're comfortable with", "Practice in a quiet space", "Have notes as backup", "Ask for feedback from trusted people"],
-            "sensory_tips": ["Practice in the actual space if possible", "Wear comfortable clothes", "Have water nearby", "Take deep breaths before starting"],
-            "encouragement": "You have valuable insights to share. Your audience is lucky to hear from you!"
-        },
-        "prepare for job interview": {
-            "steps": [
-                {"description": "Research the company and role thoroughly", "estimated_time": "30", "tips": "Check their website, LinkedIn, recent news, and job description"},
-                {"description": "Prepare your elevator pitch (30 seconds)", "estimated_time": "15", "tips": "Practice introducing yourself and your key strengths"},
-                {"description": "Prepare answers to common questions", "estimated_time": "45", "tips": "Use STAR method: Situation, Task, Action, Result"},
-                {"description": "Prepare 3-5 thoughtful questions to ask them", "estimated_time": "15", "tips": "Show genuine interest in the role and company"},
-                {"description": "Plan your outfit and test it", "estimated_time": "10", "tips": "Choose something comfortable and professional"},
-                {"description": "Prepare your portfolio/resume materials", "estimated_time": "20", "tips": "Print copies, organize digital files, prepare examples"},
-                {"description": "Practice with a friend or in front of a mirror", "estimated_time": "30", "tips": "Practice your answers out loud - it helps with confidence"},
-                {"description": "Plan your route and timing", "estimated_time": "10", "tips": "Check traffic, parking, and arrive 10 minutes early"},
-                {"description": "Prepare for virtual interview (if applicable)", "estimated_time": "15", "tips": "Test your camera, microphone, and internet connection"},
-                {"description": "Get a good night's sleep", "estimated_time": "0", "tips": "Rest is crucial for clear thinking and confidence"}
-            ],
-            "focus_techniques": ["Time blocking for each preparation area", "Practice with a friend", "Record yourself answering questions"],
-            "accommodations": ["Prepare in a quiet space", "Use notes as backup", "Practice relaxation techniques", "Have water nearby"],
-            "sensory_tips": ["Wear comfortable clothes", "Test your setup beforehand", "Have backup plans", "Take deep breaths before starting"],
-            "encouragement": "You've got this! Your unique perspective and skills are valuable. Be yourself and show your passion!"
-        },
-        "conduct performance review": {
-            "steps": [
-                {"description": "Review employee's job description and goals", "estimated_time": "15", "tips": "Understand their role and what was expected"},
-                {"description": "Gather performance data and examples", "estimated_time": "20", "tips": "Collect specific examples of achievements and areas for improvement"},
-                {"description": "Prepare the review document", "estimated_time": "30", "tips": "Use a structured format with clear sections"},
-                {"description": "Schedule the meeting with advance notice", "estimated_time": "5", "tips": "Give them time to prepare their own thoughts"},
-                {"description": "Prepare your talking points", "estimated_time": "20", "tips": "Focus on specific examples and constructive feedback"},
-                {"description": "Set up a comfortable meeting space", "estimated_time": "5", "tips": "Choose a private, comfortable location"},
-                {"description": "Start with positive feedback", "estimated_time": "10", "tips": "Begin with what they're doing well"},
-                {"description": "Discuss areas for improvement constructively", "estimated_time": "15", "tips": "Be specific and offer support"},
-                {"description": "Set goals for the next period", "estimated_time": "15", "tips": "Make goals SMART: Specific, Measurable, Achievable, Relevant, Time-bound"},
-                {"description": "Document the discussion", "estimated_time": "10", "tips": "Write down key points and agreed-upon actions"}
-            ],
-            "focus_techniques": ["Time blocking for preparation", "Practice with a colleague", "Use a structured approach"],
-            "accommodations": ["Prepare in advance", "Use templates and checklists", "Have backup materials", "Take breaks if needed"],
-            "sensory_tips": ["Choose a comfortable meeting space", "Have water available", "Use natural lighting", "Take notes to stay focused"],
-            "encouragement": "Performance reviews are about growth and development. You're helping your team member succeed!"
-        },
-        "manage project deadline": {
-            "steps": [
-                {"description": "Break down the project into smaller tasks", "estimated_time": "20", "tips": "List every task, no matter how small"},
-                {"description": "Estimate time for each task", "estimated_time": "15", "tips": "Be realistic - add buffer time for unexpected issues"},
-                {"description": "Prioritize tasks by importance and urgency", "estimated_time": "10", "tips": "Use the Eisenhower Matrix: urgent/important, not urgent/important, etc."},
-                {"description": "Create a project timeline", "estimated_time": "15", "tips": "Use a calendar or project management tool"},
-                {"description": "Identify potential roadblocks", "estimated_time": "10", "tips": "Think about what could go wrong and plan alternatives"},
-                {"description": "Set up regular check-ins", "estimated_time": "5", "tips": "Schedule daily or weekly progress reviews"},
-                {"description": "Start with the most critical tasks", "estimated_time": "30", "tips": "Tackle the hardest or most important work first"},
-                {"description": "Track progress daily", "estimated_time": "10", "tips": "Update your task list and adjust timeline as needed"},
-                {"description": "Communicate with stakeholders", "estimated_time": "15", "tips": "Keep everyone informed of progress and any issues"},
-                {"description": "Prepare for the final push", "estimated_time": "20", "tips": "Review everything, do final quality checks, and prepare for delivery"}
-            ],
-            "focus_techniques": ["Time blocking for each task", "Pomodoro technique for focused work", "Regular breaks to maintain energy"],
-            "accommodations": ["Use project management tools", "Set up reminders and alerts", "Ask for help when needed", "Break work into smaller chunks"],
-            "sensory_tips": ["Create a comfortable workspace", "Use noise-cancelling headphones if needed", "Take movement breaks", "Stay hydrated"],
-            "encouragement": "You can meet this deadline! Break it down into manageable pieces and tackle one task at a time."
-        },
-        "handle difficult conversation": {
-            "steps": [
-                {"description": "Clarify the issue and your goals", "estimated_time": "10", "tips": "What exactly needs to be discussed? What outcome do you want?"},
-                {"description": "Prepare your key points", "estimated_time": "15", "tips": "Write down the main points you want to make"},
-                {"description": "Practice what you want to say", "estimated_time": "20", "tips": "Practice out loud - it helps you feel more confident"},
-                {"description": "Choose the right time and place", "estimated_time": "5", "tips": "Pick a private, comfortable setting when both parties are calm"},
-                {"description": "Start with a positive or neutral opening", "estimated_time": "5", "tips": "Begin with something like 'I'd like to discuss...' or 'I've noticed...'"},
-                {"description": "Use 'I' statements", "estimated_time": "10", "tips": "Say 'I feel...' instead of 'You always...' to avoid blame"},
-                {"description": "Listen actively to their response", "estimated_time": "15", "tips": "Really listen to understand their perspective"},
-                {"description": "Stay calm and focused", "estimated_time": "10", "tips": "Take deep breaths if you feel emotional"},
-                {"description": "Work toward a solution together", "estimated_time": "15", "tips": "Focus on finding a resolution that works for both parties"},
-                {"description": "Follow up on any agreements", "estimated_time": "5", "tips": "Check in later to ensure the solution is working"}
-            ],
-            "focus_techniques": ["Practice with a trusted friend", "Use breathing exercises", "Prepare talking points in advance"],
-            "accommodations": ["Prepare in advance", "Have notes as backup", "Take breaks if needed", "Ask for support from a colleague"],
-            "sensory_tips": ["Choose a comfortable setting", "Have water available", "Use calming techniques", "Take deep breaths"],
-            "encouragement": "Difficult conversations are part of professional growth. You're being brave by addressing issues directly and constructively."
-        },
-        "prepare for team meeting": {
-            "steps": [
-                {"description": "Define the meeting purpose and agenda", "estimated_time": "10", "tips": "What needs to be accomplished? What topics will be covered?"},
-                {"description": "Prepare necessary materials", "estimated_time": "15", "tips": "Gather reports, data, presentations, or other documents needed"},
-                {"description": "Send agenda to participants in advance", "estimated_time": "5", "tips": "Give everyone time to prepare and contribute"},
-                {"description": "Set up the meeting space or technology", "estimated_time": "10", "tips": "Test equipment, reserve room, or set up virtual meeting"},
-                {"description": "Prepare your talking points", "estimated_time": "15", "tips": "Outline what you want to say and key questions to ask"},
-                {"description": "Anticipate questions and prepare answers", "estimated_time": "10", "tips": "Think about what others might ask and how you'll respond"},
-                {"description": "Prepare for different scenarios", "estimated_time": "10", "tips": "What if someone disagrees? What if the discussion goes off-topic?"},
-                {"description": "Set time limits for each agenda item", "estimated_time": "5", "tips": "Keep the meeting focused and on schedule"},
-                {"description": "Prepare follow-up actions", "estimated_time": "10", "tips": "Think about what needs to happen after the meeting"},
-                {"description": "Arrive early to set up", "estimated_time": "5", "tips": "Give yourself time to get comfortable and organized"}
-            ],
-            "focus_techniques": ["Time blocking for preparation", "Practice your opening", "Use a structured approach"],
-            "accommodations": ["Prepare in advance", "Use templates and checklists", "Have backup materials", "Take breaks if needed"],
-            "sensory_tips": ["Choose a comfortable meeting space", "Have water available", "Use natural lighting", "Take notes to stay focused"],
-            "encouragement": "You're facilitating important discussions that help your team succeed. Your preparation shows your commitment to the team!"
-        },
-        "create project proposal": {
-            "steps": [
-                {"description": "Define the problem or opportunity", "estimated_time": "15", "tips": "Clearly articulate what you're trying to solve or achieve"},
-                {"description": "Research the background and context", "estimated_time": "30", "tips": "Gather relevant data, market research, and stakeholder information"},
-                {"description": "Define your proposed solution", "estimated_time": "25", "tips": "Be specific about what you're proposing and how it addresses the problem"},
-                {"description": "Create a project timeline", "estimated_time": "15", "tips": "Break down the work into phases with realistic timeframes"},
-                {"description": "Estimate costs and resources needed", "estimated_time": "20", "tips": "Be thorough but realistic about budget and resource requirements"},
-                {"description": "Identify risks and mitigation strategies", "estimated_time": "15", "tips": "Think about what could go wrong and how you'll address it"},
-                {"description": "Define success metrics", "estimated_time": "10", "tips": "How will you measure if the project is successful?"},
-                {"description": "Write the executive summary", "estimated_time": "20", "tips": "Summarize the key points in 1-2 pages"},
-                {"description": "Create supporting materials", "estimated_time": "25", "tips": "Charts, graphs, detailed timelines, and other visual aids"},
-                {"description": "Review and refine the proposal", "estimated_time": "20", "tips": "Check for clarity, completeness, and persuasiveness"}
-            ],
-            "focus_techniques": ["Time blocking for each section", "Research in focused sessions", "Use templates and examples"],
-            "accommodations": ["Break work into smaller chunks", "Use project management tools", "Ask for feedback from colleagues", "Take breaks between sections"],
-            "sensory_tips": ["Create a comfortable workspace", "Use natural lighting", "Have water and snacks nearby", "Take movement breaks"],
-            "encouragement": "Your proposal could lead to exciting new opportunities! Take it one section at a time and don't worry about perfection on the first draft."
-        },
-        "handle customer complaint": {
-            "steps": [
-                {"description": "Listen actively to the customer", "estimated_time": "10", "tips": "Let them fully explain their issue without interrupting"},
-                {"description": "Acknowledge their concern", "estimated_time": "5", "tips": "Show empathy and understanding for their situation"},
-                {"description": "Ask clarifying questions", "estimated_time": "10", "tips": "Get specific details about what went wrong and when"},
-                {"description": "Take detailed notes", "estimated_time": "5", "tips": "Document everything for follow-up and resolution"},
-                {"description": "Apologize sincerely", "estimated_time": "5", "tips": "Take responsibility for any mistakes on your part"},
-                {"description": "Explain what happened (if you know)", "estimated_time": "10", "tips": "Be honest about what went wrong without making excuses"},
-                {"description": "Propose a solution", "estimated_time": "15", "tips": "Offer specific steps to resolve the issue"},
-                {"description": "Get their agreement on the solution", "estimated_time": "10", "tips": "Make sure they're satisfied with your proposed resolution"},
-                {"description": "Follow up on the resolution", "estimated_time": "10", "tips": "Check back to ensure the issue is fully resolved"},
-                {"description": "Document the incident", "estimated_time": "10", "tips": "Record what happened and how it was resolved for future reference"}
-            ],
-            "focus_techniques": ["Stay calm and focused", "Use active listening", "Take notes to stay organized"],
-            "accommodations": ["Prepare standard responses", "Use templates for documentation", "Ask for help from a supervisor if needed"],
-            "sensory_tips": ["Choose a quiet space for the conversation", "Have water available", "Take deep breaths if needed"],
-            "encouragement": "Handling complaints well can turn unhappy customers into loyal ones. You're doing important work for the business!"
-        }
-    }
-    
-    # Try to find a matching breakdown with improved matching
-    task_lower = task.lower()
-    breakdown = None
-    
-    # Check for exact matches first
-    for key, bd in demo_breakdowns.items():
-        if key in task_lower:
-            breakdown = bd
+    events = iter(events)
+    with st.spinner("Creating a neurodivergent-friendly plan..."):
+        first = next(events, None)
+
+    breakdown = {}
+    block, block_start, placeholder = [], 1, None
+    last_flush = started
+    for kind, value in itertools.chain([first] if first else [], events):
+        if kind == "context":
+            if value.get("template"):
+                # Whole template breakdown is known: reuse its pre-rendered fragments
+                return _display_prerendered_breakdown(value, emit, stats, started)
+            if context_block_html(value):
+                emit(st, context_block_html(value))
+            continue
+        if kind == "breakdown":
+            breakdown = value
             break
-    
-    # If no exact match, try keyword matching
-    if not breakdown:
-        if any(keyword in task_lower for keyword in ["quarterly", "report", "10-q", "sec"]):
-            if any(keyword in task_lower for keyword in ["quarterly", "report"]):
-                breakdown = demo_breakdowns["prepare quarterly report"]
-        elif any(keyword in task_lower for keyword in ["clean", "room", "organize"]):
-            breakdown = demo_breakdowns["clean my room"]
-        elif any(keyword in task_lower for keyword in ["study", "exam", "test", "learn"]):
-            breakdown = demo_breakdowns["study for exam"]
-        elif any(keyword in task_lower for keyword in ["write", "blog", "article", "post"]):
-            breakdown = demo_breakdowns["write a blog post"]
-        elif any(keyword in task_lower for keyword in ["presentation", "present", "speech", "talk"]):
-            breakdown = demo_breakdowns["plan a presentation"]
-        elif any(keyword in task_lower for keyword in ["interview", "job", "career", "hiring"]):
-            breakdown = demo_breakdowns["prepare for job interview"]
-        elif any(keyword in task_lower for keyword in ["performance", "review", "evaluation", "feedback"]):
-            breakdown = demo_breakdowns["conduct performance review"]
-        elif any(keyword in task_lower for keyword in ["project", "deadline", "timeline", "deliverable"]):
-            breakdown = demo_breakdowns["manage project deadline"]
-        elif any(keyword in task_lower for keyword in ["difficult", "conversation", "conflict", "confrontation"]):
-            breakdown = demo_breakdowns["handle difficult conversation"]
-        elif any(keyword in task_lower for keyword in ["meeting", "team", "agenda", "facilitate"]):
-            breakdown = demo_breakdowns["prepare for team meeting"]
-        elif any(keyword in task_lower for keyword in ["proposal", "project", "business", "pitch"]):
-            breakdown = demo_breakdowns["create project proposal"]
-        elif any(keyword in task_lower for keyword in ["complaint", "customer", "service", "issue"]):
-            breakdown = demo_breakdowns["handle customer complaint"]
-    
-    # Default breakdown for any task
-    if not breakdown:
-        breakdown = {
-            "steps": [
-                {"description": f"Start with: {task}", "estimated_time": "15", "tips": "Break it into smaller pieces"},
-                {"description": "Take a 5-minute break", "estimated_time": "5", "tips": "Rest and recharge"},
-                {"description": "Continue with the next part", "estimated_time": "15", "tips": "Keep going at your own pace"},
-                {"description": "Review what you've accomplished", "estimated_time": "10", "tips": "Celebrate your progress"}
-            ],
-            "focus_techniques": ["Pomodoro technique", "Body doubling", "Time blocking"],
-            "accommodations": ["Use timers", "Take frequent breaks", "Ask for help when needed"],
-            "sensory_tips": ["Comfortable lighting", "Noise-cancelling headphones", "Fidget tools"],
-            "encouragement": "Remember: progress, not perfection. You're doing great!"
-        }
-    
-    # Personalize based on deadlines and urgency
-    if gmail_address and deadlines:
-        relevant_deadlines, urgency = analyze_deadlines_for_task(task, deadlines)
-        breakdown = personalize_task_breakdown(task, breakdown, relevant_deadlines, urgency)
-    
+
+        if placeholder is None:
+            placeholder = st.empty()
+        block.append(value)
+        stats["steps"] += 1
+
+        now = time.perf_counter()
+        if len(block) == STEP_BLOCK_SIZE or now - last_flush >= flush_interval:
+            body = steps_block_html(block, block_start)
+            if block_start == 1:
+                body = STEPS_HEADING + body
+            emit(placeholder, body)
+            last_flush = now
+            if stats["time_to_first_step_ms"] is None:
+                stats["time_to_first_step_ms"] = (now - started) * 1000
+            if len(block) == STEP_BLOCK_SIZE:
+                block_start += len(block)
+                block, placeholder = [], None
+
+    if block:
+        body = steps_block_html(block, block_start)
+        if block_start == 1:
+            body = STEPS_HEADING + body
+        emit(placeholder, body)
+        if stats["time_to_first_step_ms"] is None:
+            stats["time_to_first_step_ms"] = (time.perf_counter() - started) * 1000
+
+    sections = sections_markdown(breakdown)
+    if sections:
+        emit(st, sections)
+
+    stats["total_ms"] = (time.perf_counter() - started) * 1000
+    st.session_state.last_render_stats = stats
     return breakdown
 
+@instrumentation.traced("render.calendar_export")
+def display_calendar_export(task, breakdown):
+    """Offer the plan, starting at the next quarter hour, as an .ics download"""
+    plan = {
+        "task": task,
+        "breakdown": breakdown,
+        "start": plan_start(),
+        "reminder": st.session_state.task_reminders.get(task),
+    }
+    st.download_button(
+        "📅 Add Plan to My Calendar (.ics)",
+        data=export_cache.export([plan]),
+        file_name="focuscoach-plan.ics",
+        mime="text/calendar",
+        help="Each step becomes a calendar event with a gentle alarm; re-downloading updates the same events"
+    )
+
+@instrumentation.traced("render.display_task_breakdown")
 def display_task_breakdown(breakdown):
     """Display the task breakdown in a user-friendly format"""
     if 'error' in breakdown:
         st.error(breakdown['error'])
         return
     
-    # Show deadline context if available
-    if 'deadline_context' in breakdown:
-        st.markdown(f"""
-        <div class="demo-notice">
-            <h4>📅 Deadline Information</h4>
-            <p>{breakdown['deadline_context']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Show urgency note if available
-    if 'urgency_note' in breakdown:
-        st.markdown(f"""
-        <div class="encouragement-box">
-            <h4>⚡ Priority Level</h4>
-            <p>{breakdown['urgency_note']}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Steps
-    st.subheader("📝 Your Step-by-Step Plan")
-    for i, step in enumerate(breakdown.get('steps', []), 1):
-        with st.container():
-            st.markdown(f"""
-            <div class="step-card">
-                <h4>Step {i}: {step.get('description', 'No description')}</h4>
-                <p><strong>⏱️ Time:</strong> {step.get('estimated_time', '15')} minutes</p>
-                <p><strong>💡 Tips:</strong> {step.get('tips', 'Take your time and be patient with yourself')}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    display_breakdown_stream(breakdown_events(breakdown))
+
+@fragment
+@instrumentation.traced("sidebar.accessibility")
+def sidebar_accessibility():
+    """Accessibility toggles"""
+    st.markdown("### ♿ Accessibility Options")
+    col1, col2 = st.columns(2)
+    with col1:
+        high_contrast = st.checkbox("High Contrast", help="Increase contrast for better visibility")
+    with col2:
+        large_text = st.checkbox("Large Text", help="Increase text size for easier reading")
+
+@fragment
+@instrumentation.traced("sidebar.preferences")
+def sidebar_preferences():
+    """Free-text needs and focus timing preferences"""
+    st.markdown("### ⚙️ Your Preferences")
+    st.session_state.user_context = st.text_area(
+        "Tell me about your needs:",
+        value=st.session_state.user_context,
+        help="Share any specific challenges, preferences, or accommodations you need",
+        height=100
+    )
     
-    # Focus techniques
-    if breakdown.get('focus_techniques'):
-        st.subheader("🎯 Suggested Focus Techniques")
-        for technique in breakdown['focus_techniques']:
-            st.markdown(f"• {technique}")
-    
-    # Accommodations
-    if breakdown.get('accommodations'):
-        st.subheader("🛠️ Accommodations & Tools")
-        for accommodation in breakdown['accommodations']:
-            st.markdown(f"• {accommodation}")
-    
-    # Sensory tips
-    if breakdown.get('sensory_tips'):
-        st.subheader("🌿 Sensory-Friendly Tips")
-        for tip in breakdown['sensory_tips']:
-            st.markdown(f"""
-            <div class="sensory-tip">
-                {tip}
-            </div>
-            """, unsafe_allow_html=True)
+    # Focus session preferences
+    st.markdown("### 🎯 Focus Preferences")
+    focus_duration = st.slider("Preferred focus time (minutes)", 5, 60, 25, help="How long do you like to focus at once?")
+    break_duration = st.slider("Preferred break time (minutes)", 2, 30, 5, help="How long do you like your breaks?")
+
+@fragment
+@instrumentation.traced("sidebar.gmail")
+def sidebar_gmail():
+    """Gmail connection and upcoming deadlines"""
+    st.markdown("### 📧 Gmail Integration")
+    gmail_address = st.text_input(
+        "Gmail Address (Optional):",
+        placeholder="your.email@gmail.com",
+        help="Connect your Gmail to get personalized deadline information"
+    )
     
-    # Deadline-specific tips
-    if breakdown.get('deadline_tips'):
-        st.subheader("⏰ Deadline Management Tips")
-        for tip in breakdown['deadline_tips']:
-            st.markdown(f"• {tip}")
+    if st.button("🔗 Connect Gmail", type="secondary"):
+        if gmail_address and "@gmail.com" in gmail_address:
+            st.session_state.gmail_connected = True
+            st.success("✅ Gmail connected! I'll analyze your deadlines.")
+            # Get deadlines
+            st.session_state.user_deadlines = get_gmail_deadlines(gmail_address)
+        else:
+            st.warning("Please enter a valid Gmail address")
+    
+    if st.session_state.gmail_connected:
+        st.success("📧 Gmail Connected")
+        if st.session_state.user_deadlines:
+            st.write("**Upcoming Deadlines:**")
+            for deadline in st.session_state.user_deadlines[:3]:
+                st.write(f"• {deadline['title']} - {deadline['date']}")
+
+@fragment
+@instrumentation.traced("sidebar.help")
+def sidebar_help():
+    """Emergency help button"""
+    st.markdown("### 🆘 Need Help?")
+    if st.button("🆘 I'm Overwhelmed", help="Get immediate support and calming techniques"):
+        st.info("""
+        **You're not alone! Here's what you can do:**
+        
+        1. **Take a deep breath** - Count to 4, hold for 4, exhale for 4
+        2. **Step away** - Take a 5-minute break
+        3. **Break it down** - What's the smallest next step?
+        4. **Ask for help** - Reach out to someone you trust
+        5. **Be kind to yourself** - You're doing your best
+        """)
+
+def save_with_notice(kind, name, value, text):
+    """Save a reminder or breakdown and, with Slack connected, queue its post in the same outbox transaction"""
+    from focuscoach.outbox import idempotency_key
+    
+    outbox, sender, _ = get_notification_outbox()
+    user = calendar_user_id()
+    with outbox.transaction() as tx:
+        tx.put(f"{kind}:{user}:{name}", value)
+        if st.session_state.get('slack_connected'):
+            post = {"workspace": st.session_state.slack_workspace, "channel": st.session_state.slack_channel,
+                    "text": text}
+            tx.enqueue("slack", post, idempotency_key(kind, user, name, text))
+    if tx.enqueued:
+        sender.drain()
+
+def schedule_reminders(name, event_type, reminder_times, calendar_event=None, recurrence=None):
+    """Schedule mandatory reminders; the session's book changes only once the outbox has committed them"""
+    schedule = schedule_mandatory_reminder(ReminderBook(), name, event_type, reminder_times, calendar_event,
+                                           recurrence=recurrence)
+    save_with_notice("reminder", name, schedule,
+                     f"⏰ Reminders set for {name}: {', '.join(schedule['reminder_times'])}")
+    reminder_book().reminders_for(event_type)[name] = schedule
+
+def record_completed_task(task, breakdown):
+    """Count a finished breakdown and celebrate it once, when it happens"""
+    save_with_notice("breakdown", task, breakdown,
+                     f"🧠 Broke down \"{task}\" into {len(breakdown.get('steps', []))} steps")
+    st.session_state.completed_tasks = st.session_state.get('completed_tasks', 0) + 1
+    st.balloons()
+
+def count_emitted_elements():
+    """Count, per element type, what this session sends to the browser (when instrumentation is on)"""
+    ctx = get_script_run_ctx() if instrumentation.enabled else None
+    enqueue = getattr(ctx, "_enqueue", None)
+    if enqueue is None or getattr(enqueue, "counts_elements", False):
+        return
     
-    # Encouragement
-    if breakdown.get('encouragement'):
-        st.markdown(f"""
-        <div class="encouragement-box">
-            <h4>💪 Encouragement</h4>
-            <p>{breakdown['encouragement']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # The run context lives as long as the session, so its queue is wrapped once
+    def counting_enqueue(msg):
+        if msg.HasField("delta"):
+            delta = msg.delta
+            kind = delta.new_element.WhichOneof("type") if delta.HasField("new_element") else delta.WhichOneof("type")
+            instrumentation.count("elements_emitted", type=kind or "unknown")
+        enqueue(msg)
+    counting_enqueue.counts_elements = True
+    ctx._enqueue = counting_enqueue
 
 def main():
     """Main application interface"""
-    initialize_session_state()
+    count_emitted_elements()
+    with instrumentation.span("css"):
+        st.markdown(APP_CSS, unsafe_allow_html=True)
+    with instrumentation.span("session_state"):
+        initialize_session_state()
+        track_session()
+    # A full run redraws both mandatory-reminder checkboxes, so nothing is left to sync
+    st.session_state.mandatory_reminders_changed = False
+    render_app()
+
+def render_app():
+    """Header, sidebar and the selected page"""
+    with instrumentation.span("core.warm_fragment_cache"):
+        warm_fragment_cache()
     
     # Header
     st.markdown("""
@@ -1091,22 +819,24 @@ def main():
     """, unsafe_allow_html=True)
     
     # Demo notice
-    st.markdown("""
-    <div class="demo-notice">
-        <h4>🎬 Demo Mode</h4>
-        <p>This is a demo version of FocusCoach. In the full version, you can connect your OpenAI API key for personalized AI responses and Google Calendar for automatic scheduling.</p>
-    </div>
-    """, unsafe_allow_html=True)
+    if get_breakdown_provider().name == "template":
+        st.markdown("""
+        <div class="demo-notice">
+            <h4>🎬 Demo Mode</h4>
+            <p>This is a demo version of FocusCoach. In the full version, you can connect your OpenAI API key for personalized AI responses and Google Calendar for automatic scheduling.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown("""
+        <div class="demo-notice">
+            <h4>🤖 AI Mode</h4>
+            <p>Task breakdowns are generated by your configured AI model. Built-in templates are used automatically if it is slow or unavailable.</p>
+        </div>
+        """, unsafe_allow_html=True)
     
     # Sidebar for navigation and settings
-    with st.sidebar:
-        # Accessibility options
-        st.markdown("### ♿ Accessibility Options")
-        col1, col2 = st.columns(2)
-        with col1:
-            high_contrast = st.checkbox("High Contrast", help="Increase contrast for better visibility")
-        with col2:
-            large_text = st.checkbox("Large Text", help="Increase text size for easier reading")
+    with st.sidebar, instrumentation.span("sidebar"):
+        sidebar_accessibility()
         
         # Navigation
         st.markdown("### 🎯 Navigation")
@@ -1118,23 +848,11 @@ def main():
             "Slack Integration",
             "Reminder Scheduler",
             "About FocusCoach"
-        ], help="Select what you'd like to work on")
+        ] + (["Instrumentation"] if instrumentation.enabled else []), help="Select what you'd like to work on")
         
-        # User preferences
-        st.markdown("### ⚙️ Your Preferences")
-        st.session_state.user_context = st.text_area(
-            "Tell me about your needs:",
-            value=st.session_state.user_context,
-            help="Share any specific challenges, preferences, or accommodations you need",
-            height=100
-        )
-        
-        # Focus session preferences
-        st.markdown("### 🎯 Focus Preferences")
-        focus_duration = st.slider("Preferred focus time (minutes)", 5, 60, 25, help="How long do you like to focus at once?")
-        break_duration = st.slider("Preferred break time (minutes)", 2, 30, 5, help="How long do you like your breaks?")
+        sidebar_preferences()
         
-        # Reminder preferences
+        # Reminder preferences are read by every page, so changing them reruns the whole app
         st.markdown("### ⏰ Reminder Settings")
         reminder_frequency = st.selectbox(
             "Default Reminder Frequency",
@@ -1144,36 +862,9 @@ def main():
         )
         st.session_state.reminder_frequency = reminder_frequency
         
-        mandatory_reminders = st.checkbox(
-            "Enable Mandatory Reminders",
-            value=st.session_state.mandatory_reminders_enabled,
-            help="Require reminder scheduling before completing tasks"
-        )
-        st.session_state.mandatory_reminders_enabled = mandatory_reminders
-        
-        # Gmail Integration
-        st.markdown("### 📧 Gmail Integration")
-        gmail_address = st.text_input(
-            "Gmail Address (Optional):",
-            placeholder="your.email@gmail.com",
-            help="Connect your Gmail to get personalized deadline information"
-        )
-        
-        if st.button("🔗 Connect Gmail", type="secondary"):
-            if gmail_address and "@gmail.com" in gmail_address:
-                st.session_state.gmail_connected = True
-                st.success("✅ Gmail connected! I'll analyze your deadlines.")
-                # Get deadlines
-                st.session_state.user_deadlines = get_gmail_deadlines(gmail_address)
-            else:
-                st.warning("Please enter a valid Gmail address")
+        mandatory_reminders_checkbox("sidebar_mandatory_reminders")
         
-        if st.session_state.gmail_connected:
-            st.success("📧 Gmail Connected")
-            if st.session_state.user_deadlines:
-                st.write("**Upcoming Deadlines:**")
-                for deadline in st.session_state.user_deadlines[:3]:
-                    st.write(f"• {deadline['title']} - {deadline['date']}")
+        sidebar_gmail()
         
         # Quick tips with better formatting
         st.markdown("### 💡 Quick Tips")
@@ -1187,27 +878,15 @@ def main():
         </div>
         """, unsafe_allow_html=True)
         
-        # Emergency help
-        st.markdown("### 🆘 Need Help?")
-        if st.button("🆘 I'm Overwhelmed", help="Get immediate support and calming techniques"):
-            st.info("""
-            **You're not alone! Here's what you can do:**
-            
-            1. **Take a deep breath** - Count to 4, hold for 4, exhale for 4
-            2. **Step away** - Take a 5-minute break
-            3. **Break it down** - What's the smallest next step?
-            4. **Ask for help** - Reach out to someone you trust
-            5. **Be kind to yourself** - You're doing your best
-            """)
+        sidebar_help()
         
         # Progress tracking
         if 'completed_tasks' not in st.session_state:
             st.session_state.completed_tasks = 0
         
         st.markdown("### 📊 Your Progress")
-        st.metric("Tasks Completed", st.session_state.completed_tasks)
-        if st.session_state.completed_tasks > 0:
-            st.balloons()
+        # Filled in after the page, which may finish a breakdown
+        progress = st.empty()
     
     # Main content based on selected page
     if page == "Task Breakdown":
@@ -1224,7 +903,139 @@ def main():
         reminder_scheduler_page()
     elif page == "About FocusCoach":
         about_page()
+    elif page == "Instrumentation":
+        instrumentation_page()
+    
+    progress.metric("Tasks Completed", st.session_state.completed_tasks)
 
+# Quick-test buttons per row: (heading, [(widget key, label, help, task), ...])
+QUICK_TESTS = [
+    ("### 🏠 Personal Tasks", [
+        ("clean_room", "🧹 Clean Room", "Get 8 organization steps", "clean my room"),
+        ("study_exam", "📚 Study Exam", "Get 10 study techniques", "study for exam"),
+        ("blog_post", "✍️ Blog Post", "Get 10 writing steps", "write a blog post"),
+        ("presentation", "🎤 Presentation", "Get 10 presentation steps", "plan a presentation"),
+        ("job_interview", "💼 Job Interview", "Get 10 interview prep steps", "prepare for job interview"),
+    ]),
+    ("### 💼 Work Tasks", [
+        ("quarterly_report", "📊 Quarterly Report", "Get 15 detailed SEC-compliant steps", "prepare quarterly report"),
+        ("performance_review", "👥 Performance Review", "Get 10 review steps", "conduct performance review"),
+        ("project_deadline", "⏰ Project Deadline", "Get 10 deadline management steps", "manage project deadline"),
+        ("difficult_conversation", "💬 Difficult Conversation", "Get 10 conversation steps",
+         "handle difficult conversation"),
+        ("team_meeting", "🤝 Team Meeting", "Get 10 meeting prep steps", "prepare for team meeting"),
+    ]),
+    ("### 🏢 Business Tasks", [
+        ("project_proposal", "📋 Project Proposal", "Get 10 proposal steps", "create project proposal"),
+        ("customer_complaint", "😤 Customer Complaint", "Get 10 complaint handling steps", "handle customer complaint"),
+        ("business_plan", "📈 Business Plan", "Get detailed business planning steps", "create business plan"),
+        ("budget_planning", "💰 Budget Planning", "Get detailed budget steps", "create budget"),
+        ("data_analysis", "📊 Data Analysis", "Get detailed analysis steps", "analyze data"),
+    ]),
+]
+
+# Reminder-gate checkboxes: (widget key, reminder time)
+GATE_REMINDERS = [
+    ("gate_15", "15 minutes before"),
+    ("gate_30", "30 minutes before"),
+    ("gate_1h", "1 hour before"),
+]
+
+def sync_mandatory_reminders(key):
+    """Checkbox callback: copy the changed checkbox into the shared setting"""
+    st.session_state.mandatory_reminders_enabled = st.session_state[key]
+    st.session_state.mandatory_reminders_changed = True
+
+def mandatory_reminders_checkbox(key):
+    """A checkbox for the shared mandatory-reminders setting (sidebar and Reminder Scheduler each have one)"""
+    if st.session_state.get('mandatory_reminders_changed'):
+        # Only a page fragment rerun gets here with the flag set (main() clears it), and the sidebar
+        # checkbox outside that fragment still shows the old setting: rerun the whole app
+        st.rerun()
+    # Seeded through its key rather than value=, which would give the widget a new id (and drop the
+    # user's click) every time the setting flips
+    st.session_state[key] = st.session_state.mandatory_reminders_enabled
+    st.checkbox(
+        "Enable Mandatory Reminders",
+        help="Require reminder scheduling before completing tasks",
+        key=key,
+        on_change=sync_mandatory_reminders,
+        args=(key,)
+    )
+
+def request_breakdown(task=None):
+    """Button callback: queue a quick-test task, or the typed one"""
+    st.session_state.pending_breakdown = (task or st.session_state.get('task_input') or "").strip()
+
+def schedule_gate_reminders(task):
+    """Gate callback: schedule the selected reminders so this same rerun can go on to the breakdown"""
+    selected = []
+    if st.session_state.get('gate_default', True):
+        selected.append(st.session_state.reminder_frequency)
+    selected.extend(reminder for key, reminder in GATE_REMINDERS if st.session_state.get(key))
+    if not selected:
+        st.session_state.gate_error = "Please select at least one reminder time!"
+        return
+    schedule_reminders(task, "task", selected)
+    st.session_state.gate_notice = "✅ Reminders scheduled! Proceeding with task breakdown..."
+
+def reminders_ready(task):
+    """Whether ``task`` may be broken down: mandatory reminders are off, or it has them"""
+    return not st.session_state.mandatory_reminders_enabled or validate_reminder_schedule(reminder_book(), task, "task")
+
+def reminder_gate(task):
+    """Mandatory-reminder check before a breakdown; shows the quick setup and returns False until reminders exist"""
+    if reminders_ready(task):
+        notice = st.session_state.pop('gate_notice', None)
+        if notice:
+            st.success(notice)
+        return True
+    
+    st.warning("⚠️ **Mandatory Reminders Required**")
+    st.markdown(f"""
+    <div class="break-card">
+        <h4>📅 Schedule Reminders for "{task}"</h4>
+        <p>Before proceeding with this task breakdown, you must schedule reminders to ensure you stay on track!</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Quick reminder scheduling
+    st.markdown("### ⏰ Quick Reminder Setup")
+    st.info(f"💡 **Default reminder frequency**: {st.session_state.reminder_frequency}")
+    
+    for column, (key, reminder) in zip(st.columns(len(GATE_REMINDERS)), GATE_REMINDERS):
+        with column:
+            st.checkbox(reminder, key=key)
+    
+    # Add default frequency as pre-selected
+    st.checkbox(f"Use default: {st.session_state.reminder_frequency}", value=True, key="gate_default")
+    
+    st.button("✅ Schedule Reminders & Continue", type="primary", key="gate_schedule",
+              on_click=schedule_gate_reminders, args=(task,))
+    error = st.session_state.pop('gate_error', None)
+    if error:
+        st.error(error)
+    return False
+
+def run_breakdown(task):
+    """Stream the breakdown for ``task`` and offer it as a calendar file"""
+    # Get Gmail address from sidebar if connected
+    gmail_address = None
+    if st.session_state.gmail_connected:
+        # In a real app, this would come from the sidebar input
+        gmail_address = "demo@example.com"  # Demo Gmail address
+    
+    # Steps render as the provider produces them
+    events = get_breakdown_provider().stream_breakdown(task, st.session_state.user_context, gmail_address)
+    breakdown = display_breakdown_stream(events)
+    st.session_state.task_breakdown = breakdown
+    display_calendar_export(task, breakdown)
+    
+    # Track progress
+    record_completed_task(task, breakdown)
+
+@fragment
+@instrumentation.traced("page.task_breakdown")
 def task_breakdown_page():
     """Task breakdown and planning interface"""
     # Modern header with better spacing
@@ -1282,80 +1093,12 @@ def task_breakdown_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # First row - Personal tasks
-    st.markdown("### 🏠 Personal Tasks")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        if st.button("🧹 Clean Room", help="Get 8 organization steps", key="clean_room"):
-            st.session_state.clean_room_clicked = True
-            st.rerun()
-    with col2:
-        if st.button("📚 Study Exam", help="Get 10 study techniques", key="study_exam"):
-            st.session_state.study_exam_clicked = True
-            st.rerun()
-    with col3:
-        if st.button("✍️ Blog Post", help="Get 10 writing steps", key="blog_post"):
-            st.session_state.blog_post_clicked = True
-            st.rerun()
-    with col4:
-        if st.button("🎤 Presentation", help="Get 10 presentation steps", key="presentation"):
-            st.session_state.presentation_clicked = True
-            st.rerun()
-    with col5:
-        if st.button("💼 Job Interview", help="Get 10 interview prep steps", key="job_interview"):
-            st.session_state.job_interview_clicked = True
-            st.rerun()
-    
-    # Second row - Work tasks
-    st.markdown("### 💼 Work Tasks")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        if st.button("📊 Quarterly Report", help="Get 15 detailed SEC-compliant steps", key="quarterly_report"):
-            st.session_state.quarterly_report_clicked = True
-            st.rerun()
-    with col2:
-        if st.button("👥 Performance Review", help="Get 10 review steps", key="performance_review"):
-            st.session_state.performance_review_clicked = True
-            st.rerun()
-    with col3:
-        if st.button("⏰ Project Deadline", help="Get 10 deadline management steps", key="project_deadline"):
-            st.session_state.project_deadline_clicked = True
-            st.rerun()
-    with col4:
-        if st.button("💬 Difficult Conversation", help="Get 10 conversation steps", key="difficult_conversation"):
-            st.session_state.difficult_conversation_clicked = True
-            st.rerun()
-    with col5:
-        if st.button("🤝 Team Meeting", help="Get 10 meeting prep steps", key="team_meeting"):
-            st.session_state.team_meeting_clicked = True
-            st.rerun()
-    
-    # Third row - Business tasks
-    st.markdown("### 🏢 Business Tasks")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        if st.button("📋 Project Proposal", help="Get 10 proposal steps", key="project_proposal"):
-            st.session_state.project_proposal_clicked = True
-            st.rerun()
-    with col2:
-        if st.button("😤 Customer Complaint", help="Get 10 complaint handling steps", key="customer_complaint"):
-            st.session_state.customer_complaint_clicked = True
-            st.rerun()
-    with col3:
-        if st.button("📈 Business Plan", help="Get detailed business planning steps", key="business_plan"):
-            st.session_state.business_plan_clicked = True
-            st.rerun()
-    with col4:
-        if st.button("💰 Budget Planning", help="Get detailed budget steps", key="budget_planning"):
-            st.session_state.budget_planning_clicked = True
-            st.rerun()
-    with col5:
-        if st.button("📊 Data Analysis", help="Get detailed analysis steps", key="data_analysis"):
-            st.session_state.data_analysis_clicked = True
-            st.rerun()
+    # Buttons queue their task in a callback, which runs before this rerun renders the page
+    for heading, buttons in QUICK_TESTS:
+        st.markdown(heading)
+        for column, (key, label, help_text, task) in zip(st.columns(len(buttons)), buttons):
+            with column:
+                st.button(label, help=help_text, key=key, on_click=request_breakdown, args=(task,))
     
     # Task input with better design
     st.markdown("""
@@ -1364,7 +1107,7 @@ def task_breakdown_page():
     </div>
     """, unsafe_allow_html=True)
     
-    task_input = st.text_area(
+    st.text_area(
         "Describe your task:",
         placeholder="e.g., Prepare quarterly report, Clean my room, Study for exam...",
         height=120,
@@ -1372,217 +1115,20 @@ def task_breakdown_page():
         key="task_input"
     )
     
-    # Check if any quick test button was clicked
-    task = None
-    button_clicked = False
-    
-    # Check for button clicks and set task accordingly
-    if st.session_state.get('clean_room_clicked', False):
-        task = "clean my room"
-        button_clicked = True
-        st.session_state.clean_room_clicked = False
-    elif st.session_state.get('study_exam_clicked', False):
-        task = "study for exam"
-        button_clicked = True
-        st.session_state.study_exam_clicked = False
-    elif st.session_state.get('blog_post_clicked', False):
-        task = "write a blog post"
-        button_clicked = True
-        st.session_state.blog_post_clicked = False
-    elif st.session_state.get('presentation_clicked', False):
-        task = "plan a presentation"
-        button_clicked = True
-        st.session_state.presentation_clicked = False
-    elif st.session_state.get('job_interview_clicked', False):
-        task = "prepare for job interview"
-        button_clicked = True
-        st.session_state.job_interview_clicked = False
-    elif st.session_state.get('quarterly_report_clicked', False):
-        task = "prepare quarterly report"
-        button_clicked = True
-        st.session_state.quarterly_report_clicked = False
-    elif st.session_state.get('performance_review_clicked', False):
-        task = "conduct performance review"
-        button_clicked = True
-        st.session_state.performance_review_clicked = False
-    elif st.session_state.get('project_deadline_clicked', False):
-        task = "manage project deadline"
-        button_clicked = True
-        st.session_state.project_deadline_clicked = False
-    elif st.session_state.get('difficult_conversation_clicked', False):
-        task = "handle difficult conversation"
-        button_clicked = True
-        st.session_state.difficult_conversation_clicked = False
-    elif st.session_state.get('team_meeting_clicked', False):
-        task = "prepare for team meeting"
-        button_clicked = True
-        st.session_state.team_meeting_clicked = False
-    elif st.session_state.get('project_proposal_clicked', False):
-        task = "create project proposal"
-        button_clicked = True
-        st.session_state.project_proposal_clicked = False
-    elif st.session_state.get('customer_complaint_clicked', False):
-        task = "handle customer complaint"
-        button_clicked = True
-        st.session_state.customer_complaint_clicked = False
-    elif st.session_state.get('business_plan_clicked', False):
-        task = "create business plan"
-        button_clicked = True
-        st.session_state.business_plan_clicked = False
-    elif st.session_state.get('budget_planning_clicked', False):
-        task = "create budget"
-        button_clicked = True
-        st.session_state.budget_planning_clicked = False
-    elif st.session_state.get('data_analysis_clicked', False):
-        task = "analyze data"
-        button_clicked = True
-        st.session_state.data_analysis_clicked = False
-    
-    # Use input if no button was clicked
-    if not button_clicked:
-        task = task_input
-    
     # Break down button with better design
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🚀 Break Down This Task", type="primary", use_container_width=True):
-            if task and task.strip():
-                # Check if mandatory reminders are enabled
-                if st.session_state.mandatory_reminders_enabled:
-                    # Check if reminders are already scheduled for this task
-                    if not validate_reminder_schedule(task, "task"):
-                        st.warning("⚠️ **Mandatory Reminders Required**")
-                        st.markdown(f"""
-                        <div class="break-card">
-                            <h4>📅 Schedule Reminders for "{task}"</h4>
-                            <p>Before proceeding with this task breakdown, you must schedule reminders to ensure you stay on track!</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Quick reminder scheduling
-                        st.markdown("### ⏰ Quick Reminder Setup")
-                        st.info(f"💡 **Default reminder frequency**: {st.session_state.reminder_frequency}")
-                        
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            reminder_15 = st.checkbox("15 minutes before", key="manual_quick_15")
-                        with col2:
-                            reminder_30 = st.checkbox("30 minutes before", key="manual_quick_30")
-                        with col3:
-                            reminder_1h = st.checkbox("1 hour before", key="manual_quick_1h")
-                        
-                        # Add default frequency as pre-selected
-                        default_selected = st.checkbox(f"Use default: {st.session_state.reminder_frequency}", value=True, key="manual_default")
-                        
-                        selected_quick_reminders = []
-                        if default_selected:
-                            selected_quick_reminders.append(st.session_state.reminder_frequency)
-                        if reminder_15:
-                            selected_quick_reminders.append("15 minutes before")
-                        if reminder_30:
-                            selected_quick_reminders.append("30 minutes before")
-                        if reminder_1h:
-                            selected_quick_reminders.append("1 hour before")
-                        
-                        if st.button("✅ Schedule Reminders & Continue", type="primary", key="manual_schedule"):
-                            if selected_quick_reminders:
-                                # Schedule reminders
-                                schedule_mandatory_reminder(task, "task", selected_quick_reminders)
-                                st.success("✅ Reminders scheduled! Proceeding with task breakdown...")
-                                st.rerun()
-                            else:
-                                st.error("Please select at least one reminder time!")
-                        else:
-                            st.stop()
-                
-                with st.spinner("Creating a neurodivergent-friendly plan..."):
-                    # Get Gmail address from sidebar if connected
-                    gmail_address = None
-                    if st.session_state.gmail_connected:
-                        # In a real app, this would come from the sidebar input
-                        gmail_address = "demo@example.com"  # Demo Gmail address
-                    
-                    breakdown = demo_task_breakdown(task, st.session_state.user_context, gmail_address)
-                    st.session_state.task_breakdown = breakdown
-                
-                # Track progress
-                if 'completed_tasks' not in st.session_state:
-                    st.session_state.completed_tasks = 0
-                st.session_state.completed_tasks += 1
-                
-                display_task_breakdown(breakdown)
-            else:
-                st.warning("Please enter a task to break down!")
-    
-    # Auto-trigger breakdown if button was clicked
-    if button_clicked and task and task.strip():
-        # Check if mandatory reminders are enabled
-        if st.session_state.mandatory_reminders_enabled:
-            # Check if reminders are already scheduled for this task
-            if not validate_reminder_schedule(task, "task"):
-                st.warning("⚠️ **Mandatory Reminders Required**")
-                st.markdown(f"""
-                <div class="break-card">
-                    <h4>📅 Schedule Reminders for "{task}"</h4>
-                    <p>Before proceeding with this task breakdown, you must schedule reminders to ensure you stay on track!</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Quick reminder scheduling
-                st.markdown("### ⏰ Quick Reminder Setup")
-                st.info(f"💡 **Default reminder frequency**: {st.session_state.reminder_frequency}")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    reminder_15 = st.checkbox("15 minutes before", key="quick_15")
-                with col2:
-                    reminder_30 = st.checkbox("30 minutes before", key="quick_30")
-                with col3:
-                    reminder_1h = st.checkbox("1 hour before", key="quick_1h")
-                
-                # Add default frequency as pre-selected
-                default_selected = st.checkbox(f"Use default: {st.session_state.reminder_frequency}", value=True, key="auto_default")
-                
-                selected_quick_reminders = []
-                if default_selected:
-                    selected_quick_reminders.append(st.session_state.reminder_frequency)
-                if reminder_15:
-                    selected_quick_reminders.append("15 minutes before")
-                if reminder_30:
-                    selected_quick_reminders.append("30 minutes before")
-                if reminder_1h:
-                    selected_quick_reminders.append("1 hour before")
-                
-                if st.button("✅ Schedule Reminders & Continue", type="primary"):
-                    if selected_quick_reminders:
-                        # Schedule reminders
-                        schedule_mandatory_reminder(task, "task", selected_quick_reminders)
-                        st.success("✅ Reminders scheduled! Proceeding with task breakdown...")
-                        st.rerun()
-                    else:
-                        st.error("Please select at least one reminder time!")
-                        st.stop()
-                else:
-                    st.stop()
-        
-        with st.spinner("Creating a neurodivergent-friendly plan..."):
-            # Get Gmail address from sidebar if connected
-            gmail_address = None
-            if st.session_state.gmail_connected:
-                # In a real app, this would come from the sidebar input
-                gmail_address = "demo@example.com"  # Demo Gmail address
-            
-            breakdown = demo_task_breakdown(task, st.session_state.user_context, gmail_address)
-            st.session_state.task_breakdown = breakdown
-        
-        # Track progress
-        if 'completed_tasks' not in st.session_state:
-            st.session_state.completed_tasks = 0
-        st.session_state.completed_tasks += 1
-        
-        display_task_breakdown(breakdown)
+        st.button("🚀 Break Down This Task", type="primary", use_container_width=True, on_click=request_breakdown)
+    
+    # The requested task stays pending until its breakdown runs, so the reminder gate's own
+    # widgets can rerun the page without losing it
+    task = st.session_state.get('pending_breakdown')
+    if task == "":
+        st.session_state.pending_breakdown = None
+        st.warning("Please enter a task to break down!")
+    elif task and reminder_gate(task):
+        st.session_state.pending_breakdown = None
+        run_breakdown(task)
     
     # Show reminder settings status
     if st.session_state.mandatory_reminders_enabled:
@@ -1592,7 +1138,8 @@ def task_breakdown_page():
         </div>
         """.format(reminder_frequency=st.session_state.reminder_frequency), unsafe_allow_html=True)
     
-    # Show progress if tasks have been completed
+    # Show progress if tasks have been completed. This is the live count: the sidebar's Tasks
+    # Completed sits outside the page fragment and catches up on the next full run
     if st.session_state.get('completed_tasks', 0) > 0:
         st.markdown("""
         <div style="background: #d1fae5; padding: 1rem; border-radius: 8px; border-left: 4px solid #10b981; margin: 1rem 0;">
@@ -1600,6 +1147,8 @@ def task_breakdown_page():
         </div>
         """.format(completed_tasks=st.session_state.completed_tasks), unsafe_allow_html=True)
 
+@fragment
+@instrumentation.traced("page.focus_sessions")
 def focus_sessions_page():
     """Focus session management"""
     st.header("⏰ Focus Sessions")
@@ -1617,12 +1166,21 @@ def focus_sessions_page():
         break_time = st.slider("Break duration (minutes)", 2, 15, 5)
         
         if st.button("🚀 Start Focus Session", type="primary"):
-            session_info = st.session_state.focus_manager.suggest_focus_session(task_type)
+            focus_manager = st.session_state.focus_manager
+            technique = focus_manager.suggest_technique(task_type)
+            session_info = focus_manager.create_focus_session(technique, duration)
+            session_info.start()
             st.session_state.current_session = {
+                'id': uuid.uuid4().hex,
                 'type': task_type,
+                'technique': focus_manager.get_technique_info(technique).get('name', technique.value),
+                'accommodations': session_info.accommodations,
                 'duration': duration,
                 'break_time': break_time,
-                'start_time': datetime.now()
+                'start_time': session_info.start_time,
+                'end_time': session_info.end_time,
+                'paused_remaining': None,
+                'completed': False
             }
             st.success(f"Focus session started! Duration: {duration} minutes")
     
@@ -1630,18 +1188,37 @@ def focus_sessions_page():
         st.subheader("📊 Session Statistics")
         if 'current_session' in st.session_state:
             session = st.session_state.current_session
-            elapsed = datetime.now() - session['start_time']
-            remaining = timedelta(minutes=session['duration']) - elapsed
+            if not session['completed']:
+                # The countdown runs in the browser; it only reruns the app on pause/resume or completion
+                from focuscoach.countdown import focus_countdown, new_event
+                event = new_event(focus_countdown(session['id'], session['end_time'], session['duration'],
+                                                  session['paused_remaining'], label=session['technique'],
+                                                  key="focus_countdown"), st.session_state)
+                if event and event.get('session') == session['id']:
+                    if event['event'] == 'pause':
+                        session['paused_remaining'] = event['remaining']
+                    elif event['event'] == 'resume':
+                        session['end_time'] = datetime.now() + timedelta(seconds=event['remaining'])
+                        session['paused_remaining'] = None
+                    elif event['event'] == 'complete':
+                        session['completed'] = True
+                if session['paused_remaining'] is None and session['end_time'] <= datetime.now():
+                    session['completed'] = True
             
-            st.metric("Elapsed Time", f"{elapsed.seconds // 60} minutes")
-            st.metric("Remaining", f"{remaining.seconds // 60} minutes")
+            st.metric("Started", session['start_time'].strftime("%I:%M %p"))
+            if session['paused_remaining'] is not None and not session['completed']:
+                st.metric("Paused", f"{int(session['paused_remaining']) // 60} minutes left")
+            else:
+                st.metric("Ends", session['end_time'].strftime("%I:%M %p"))
             
-            if remaining.total_seconds() <= 0:
+            if session['completed']:
                 st.success("🎉 Focus session complete! Time for a break!")
                 if st.button("☕ Take a Break"):
                     st.info("Great job! Take a {break_time} minute break.".format(
                         break_time=session['break_time']
                     ))
+            elif session['accommodations']:
+                st.caption("Tips: " + " · ".join(session['accommodations'][:2]))
     
     # Focus techniques
     st.subheader("🧠 Focus Techniques")
@@ -1656,6 +1233,8 @@ def focus_sessions_page():
     for technique in techniques:
         st.markdown(f"• {technique}")
 
+@fragment
+@instrumentation.traced("page.focus_techniques")
 def focus_techniques_page():
     """Focus techniques and accommodations"""
     st.header("🧠 Focus Techniques & Accommodations")
@@ -1695,6 +1274,9 @@ def focus_techniques_page():
                 st.write("**Accommodations:**")
                 for accommodation in info['accommodations']:
                     st.write(f"• {accommodation}")
+                if technique == "Body Doubling":
+                    display_partner_match()
+                    display_body_doubling_rooms()
     
     with col2:
         st.subheader("🌿 Sensory Accommodations")
@@ -1731,6 +1313,82 @@ def focus_techniques_page():
                 for tip in tips:
                     st.write(f"• {tip}")
 
+def seed_demo_partners(engine, now):
+    """Demo calendars for tomorrow, so a lone user has someone to match with"""
+    from focuscoach.matching import synthetic_calendars
+    
+    for user_id, events, techniques in synthetic_calendars(2000, now + timedelta(days=1)):
+        engine.set_user(user_id, events, techniques)
+
+@st.cache_resource
+def get_matching_engine():
+    """Shared partner matching over the next two days, seeded with demo calendars still waiting for a partner"""
+    from focuscoach.matching import MatchingEngine
+    
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    engine = MatchingEngine(now, now + timedelta(days=2))
+    seed_demo_partners(engine, now)
+    return engine
+
+def matching_engine():
+    """The shared matching engine, its two-day horizon rolled forward on the hour"""
+    engine = get_matching_engine()
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    # Only the first session in a new hour moves it (and refreshes the demo calendars)
+    if engine.advance(now, now + timedelta(days=2)):
+        seed_demo_partners(engine, now)
+    return engine
+
+def display_partner_match():
+    """Find a body-doubling partner whose free time overlaps the user's calendar"""
+    technique_labels = {"Body Doubling": "body_doubling", "Pomodoro": "pomodoro", "Time Blocking": "time_blocking"}
+    preferred = st.multiselect("Work together using", list(technique_labels), default=["Body Doubling"],
+                               key="partner_techniques")
+    if st.button("🤝 Find a Partner", key="find_partner", disabled=not preferred):
+        engine = matching_engine()
+        user = calendar_user_id()
+        # A closed tab leaves no ghost partner behind
+        on_session_end("partner_match", engine.remove_user, user)
+        engine.set_user(user, current_calendar_events(), [technique_labels[label] for label in preferred])
+        engine.rematch()
+        match = engine.partner(user)
+        if match is None:
+            st.info("No one shares free time with you in the next two days yet - we'll keep looking")
+        else:
+            label = next(name for name, value in technique_labels.items() if value == match.technique)
+            st.success(f"Matched for {label}: {match.start.strftime('%a %I:%M %p')} - "
+                       f"{match.end.strftime('%I:%M %p')}")
+
+@st.cache_data(ttl=5, show_spinner=False)
+def body_doubling_rooms(rooms_url):
+    """Open rooms from the body-doubling server (``python -m focuscoach.body_doubling``)"""
+    import json
+    from urllib.request import urlopen
+    
+    try:
+        with urlopen(f"{rooms_url}/rooms", timeout=2) as response:
+            return json.loads(response.read())["rooms"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def display_body_doubling_rooms():
+    """Live body-doubling rooms, when a room server is configured"""
+    rooms_url = os.environ.get("FOCUSCOACH_ROOMS_URL", "").rstrip("/")
+    if not rooms_url:
+        return
+    rooms = body_doubling_rooms(rooms_url)
+    if rooms is None:
+        st.caption("Body-doubling rooms are unavailable right now")
+        return
+    st.write("**Live rooms:**")
+    for room in rooms[:5]:
+        timer = " - shared timer running" if room["timer"] else ""
+        st.write(f"• {room['room']}: {room['participants']} here, {room['focusing']} focusing{timer}")
+    join_url = rooms_url.replace("http", "ws", 1)
+    st.caption(f"Join from any websocket client at {join_url}/rooms/<room>?user=<your id>")
+
+@fragment
+@instrumentation.traced("page.gmail_integration")
 def gmail_integration_page():
     """Gmail integration and deadline management"""
     st.header("📧 Gmail Integration & Deadline Management")
@@ -1815,8 +1473,13 @@ def gmail_integration_page():
     - **Local Processing**: All analysis happens securely on your device
     """)
 
+@fragment
+@instrumentation.traced("page.slack_integration")
 def slack_integration_page():
     """Slack integration for team collaboration"""
+    # Integration clients are loaded on first visit to keep cold starts fast
+    from focuscoach.outbox import idempotency_key
+
     st.header("💬 Slack Integration")
     
     st.markdown("""
@@ -1891,6 +1554,36 @@ def slack_integration_page():
             help="How far in advance to send reminders"
         )
         
+        digest_mode = st.checkbox(
+            "Digest Mode",
+            value=st.session_state.digest_mode,
+            help="Combine reminders that come due close together into one calmer message"
+        )
+        
+        digest_window = st.slider(
+            "Digest Window (minutes)",
+            min_value=15,
+            max_value=120,
+            value=st.session_state.digest_window_minutes,
+            step=15,
+            disabled=not digest_mode,
+            help="Reminders due within this window of each other are sent together"
+        )
+        
+        delivery_channels = st.multiselect(
+            "Deliver Reminders To",
+            ["Slack", "In-app", "Email"],
+            default=st.session_state.get('notification_channels', ["Slack", "In-app"]),
+            help="Each channel is sent to independently, so a slow one never holds up the others"
+        )
+        
+        reminder_email = st.text_input(
+            "Reminder Email",
+            value=st.session_state.get('reminder_email', ""),
+            placeholder="you@example.com",
+            disabled="Email" not in delivery_channels
+        )
+        
         if st.button("💬 Connect Slack", type="primary", key="connect_slack"):
             if workspace and channel:
                 st.session_state.slack_connected = True
@@ -1898,6 +1591,10 @@ def slack_integration_page():
                 st.session_state.slack_channel = channel
                 st.session_state.calendar_reminders_enabled = enable_calendar
                 st.session_state.reminder_frequency = reminder_frequency
+                st.session_state.digest_mode = digest_mode
+                st.session_state.digest_window_minutes = digest_window
+                st.session_state.notification_channels = delivery_channels
+                st.session_state.reminder_email = reminder_email
                 st.success("Slack connected! (Demo mode)")
             else:
                 st.warning("Please enter both workspace and channel")
@@ -1913,7 +1610,7 @@ def slack_integration_page():
         
         # Show upcoming calendar events
         st.markdown("### 📅 Upcoming Calendar Events")
-        calendar_events = get_calendar_events()
+        calendar_events = current_calendar_events()
         
         for event in calendar_events:
             priority_emoji = "🔴" if event["priority"] == "high" else "🟡" if event["priority"] == "medium" else "🟢"
@@ -1975,19 +1672,72 @@ def slack_integration_page():
         ```
         """)
         
+        # Digest preview: reminders due close together go out as one message
+        if st.session_state.digest_mode:
+            coalescer = DigestCoalescer(timedelta(minutes=st.session_state.digest_window_minutes))
+            digests = coalescer.coalesce(event_notifications(
+                calendar_user_id(), calendar_events,
+                [st.session_state.get('reminder_frequency', '30 minutes before')]
+            ))
+            # The busiest digest is both the preview and what Test Calendar Reminder sends
+            preview = max(digests, key=lambda digest: len(digest['events']))
+            st.markdown("**Reminder Digest Message:**")
+            st.markdown(f"```\n{render_digest(preview)}\n```")
+            st.caption(f"Digest mode sends {coalescer.messages} messages instead of "
+                       f"{coalescer.notifications} ({coalescer.calls_saved} outbound calls saved)")
+        
         # Test buttons
         col1, col2 = st.columns(2)
         with col1:
             if st.button("📤 Test Task Share", key="test_task_share"):
-                result = send_to_slack("Sample task breakdown", st.session_state.slack_workspace, st.session_state.slack_channel)
-                st.success(result["message"])
+                outbox, sender, slack_channel = get_notification_outbox()
+                share = {"workspace": st.session_state.slack_workspace, "channel": st.session_state.slack_channel,
+                         "text": "Sample task breakdown"}
+                key = idempotency_key("share", calendar_user_id(), share)
+                with outbox.transaction() as tx:
+                    tx.put(f"share:{calendar_user_id()}:{key}", share)
+                    queued = tx.enqueue("slack", share, key)
+                sender.drain()
+                if queued and key in slack_channel.posted:
+                    st.success(slack_channel.posted[key]["message"])
+                elif queued:
+                    st.warning("Slack is unavailable right now - your share is queued and will be retried")
+                else:
+                    st.info("Already shared to this channel - skipped the duplicate post")
         
         with col2:
             if st.button("📅 Test Calendar Reminder", key="test_calendar_reminder"):
-                sample_event = calendar_events[0]
-                result = send_calendar_reminder_to_slack(sample_event, st.session_state.slack_workspace, st.session_state.slack_channel)
-                st.success(result["message"])
-                st.info(f"Reminder: {result['reminder']}")
+                router, inbox = get_notification_router()
+                user = calendar_user_id()
+                router.set_channels(user, notification_addresses())
+                if st.session_state.digest_mode:
+                    text = render_digest(preview)
+                    notification = {"kind": "digest", "user_id": user, "text": text,
+                                    "subject": f"FocusCoach digest: {len(preview['events'])} upcoming events"}
+                else:
+                    reminder = create_encouraging_reminder(calendar_events[0], "upcoming")
+                    text = f"Reminder: {reminder}"
+                    notification = {"kind": "reminder", "user_id": user, "event": calendar_events[0],
+                                    "reminder": reminder}
+                # Queued, not awaited: the lanes deliver in the background while this rerun finishes
+                sent_to = router.submit(notification)
+                labels = {"slack": f"#{st.session_state.slack_channel.lstrip('#')}", "in_app": "in-app",
+                          "email": st.session_state.get('reminder_email')}
+                if sent_to:
+                    st.success(f"Calendar reminder on its way to {', '.join(labels[name] for name in sent_to)}")
+                    st.info(text)
+                else:
+                    st.warning("No delivery channel is available - choose one under Deliver Reminders To")
+                    if "Email" in st.session_state.get('notification_channels', []) and "email" not in router.lanes:
+                        st.caption("Email delivery needs FOCUSCOACH_SMTP_HOST set on the server")
+        
+        # In-app notifications delivered by the router
+        router, inbox = get_notification_router()
+        recent = list(inbox.messages.get(calendar_user_id(), []))[:5]
+        if recent:
+            st.markdown("### 🔔 In-app Notifications")
+            for message in recent:
+                st.markdown(f"```\n{message.strip()}\n```")
     
     else:
         st.markdown("### 💬 Slack Integration Demo")
@@ -2003,6 +1753,32 @@ def slack_integration_page():
         - **Progress Visibility**: Team can see your achievements
         """)
 
+def notification_addresses():
+    """Where this session's reminders go, as the router's ``{channel: address}``"""
+    chosen = st.session_state.get('notification_channels', ["Slack", "In-app"])
+    addresses = {}
+    if "Slack" in chosen:
+        addresses["slack"] = {"workspace": st.session_state.slack_workspace, "channel": st.session_state.slack_channel}
+    if "In-app" in chosen:
+        addresses["in_app"] = True
+    if "Email" in chosen and st.session_state.get('reminder_email'):
+        addresses["email"] = st.session_state.reminder_email
+    return addresses
+
+def display_recurrence(reminder_info):
+    """How a recurring reminder repeats and when it fires next"""
+    if not reminder_info.get('recurrence') or not reminder_info.get('calendar_event'):
+        return
+    
+    label = next((name for name, rule in RECURRENCE_PRESETS.items() if rule == reminder_info['recurrence']),
+                 reminder_info['recurrence'])
+    upcoming = next_fire(reminder_info)
+    st.markdown(f"**Repeats**: {label}")
+    if upcoming:
+        st.markdown(f"**Next Reminder**: {upcoming.strftime('%B %d, %Y at %I:%M %p')}")
+
+@fragment
+@instrumentation.traced("page.reminder_scheduler")
 def reminder_scheduler_page():
     """Mandatory reminder scheduling page"""
     st.header("⏰ Mandatory Reminder Scheduler")
@@ -2020,12 +1796,7 @@ def reminder_scheduler_page():
     col1, col2 = st.columns(2)
     
     with col1:
-        mandatory_enabled = st.checkbox(
-            "Enable Mandatory Reminders",
-            value=st.session_state.mandatory_reminders_enabled,
-            help="Require reminder scheduling before completing tasks"
-        )
-        st.session_state.mandatory_reminders_enabled = mandatory_enabled
+        mandatory_reminders_checkbox("page_mandatory_reminders")
     
     with col2:
         default_frequency = st.selectbox(
@@ -2035,17 +1806,45 @@ def reminder_scheduler_page():
             help="Default reminder timing for new events"
         )
     
+    # Calendar import
+    uploaded_calendar = st.file_uploader(
+        "📥 Import your calendar (.ics export from Google Calendar, Outlook or Apple Calendar)",
+        type=["ics"],
+        help="Events in the next 30 days are imported; recurring events are expanded automatically"
+    )
+    if uploaded_calendar is not None:
+        import_key = (uploaded_calendar.name, uploaded_calendar.size)
+        if st.session_state.get('calendar_import_key') != import_key:
+            try:
+                st.session_state.calendar_events = load_calendar_events(uploaded_calendar)
+                st.session_state.calendar_import_key = import_key
+            except Exception as error:
+                # An unreadable file keeps whatever calendar was showing before
+                st.session_state.calendar_import_key = None
+                st.error(f"Couldn't read {uploaded_calendar.name}: {error}")
+        if st.session_state.get('calendar_import_key') == import_key:
+            st.success(f"📅 Imported {len(st.session_state.calendar_events)} events from {uploaded_calendar.name}")
+    elif st.session_state.get('calendar_import_key'):
+        # Upload removed: fall back to the demo calendar
+        st.session_state.calendar_events = []
+        st.session_state.calendar_import_key = None
+    
     st.markdown("---")
     
     # Show upcoming calendar events that need reminders
     st.markdown("### 📅 Calendar Events Requiring Reminders")
     
-    events_needing_reminders = get_upcoming_calendar_events_with_reminders()
+    events_needing_reminders = get_upcoming_calendar_events_with_reminders(reminder_book(), current_calendar_events())
     
     if events_needing_reminders:
         st.warning(f"⚠️ **{len(events_needing_reminders)} events** need reminder scheduling!")
         
-        for i, event in enumerate(events_needing_reminders):
+        # Keep the page light for large imports; scheduling one reveals the next
+        shown_events = events_needing_reminders[:20]
+        if len(events_needing_reminders) > len(shown_events):
+            st.caption(f"Showing the next {len(shown_events)} events")
+        
+        for i, event in enumerate(shown_events):
             with st.expander(f"📅 {event['title']} - {event['start_time'].strftime('%I:%M %p')}", expanded=True):
                 col1, col2 = st.columns([2, 1])
                 
@@ -2067,16 +1866,24 @@ def reminder_scheduler_page():
                     
                     # Get selected reminders
                     selected_reminders = [time for time, selected in reminder_options.items() if selected]
+                    
+                    repeats = st.selectbox(
+                        "Repeats",
+                        list(RECURRENCE_PRESETS),
+                        key=f"repeats_{i}",
+                        help="Recurring events (stand-ups, weekly reviews) keep their reminders for every occurrence"
+                    )
                 
                 with col2:
                     if st.button(f"✅ Schedule Reminders", key=f"schedule_{i}", type="primary"):
                         if selected_reminders:
                             # Schedule the reminders
-                            schedule_mandatory_reminder(
+                            schedule_reminders(
                                 event['title'], 
                                 event['type'], 
                                 selected_reminders, 
-                                event
+                                event,
+                                recurrence=RECURRENCE_PRESETS[repeats]
                             )
                             st.success(f"✅ Reminders scheduled for {event['title']}")
                             st.rerun()
@@ -2084,7 +1891,7 @@ def reminder_scheduler_page():
                             st.error("Please select at least one reminder time!")
                     
                     # Show reminder status
-                    if validate_reminder_schedule(event['title'], event['type']):
+                    if validate_reminder_schedule(reminder_book(), event['title'], event['type']):
                         st.success("✅ Reminders Scheduled")
                     else:
                         st.error("❌ No Reminders Set")
@@ -2103,6 +1910,7 @@ def reminder_scheduler_page():
             with st.expander(f"📝 {task_name}", expanded=False):
                 st.markdown(f"**Scheduled**: {reminder_info['scheduled_at'].strftime('%B %d, %Y at %I:%M %p')}")
                 st.markdown(f"**Reminder Times**: {', '.join(reminder_info['reminder_times'])}")
+                display_recurrence(reminder_info)
                 st.markdown(f"**Status**: {reminder_info['status']}")
                 
                 if st.button(f"🗑️ Remove Reminders", key=f"remove_task_{task_name}"):
@@ -2116,6 +1924,7 @@ def reminder_scheduler_page():
             with st.expander(f"👥 {meeting_name}", expanded=False):
                 st.markdown(f"**Scheduled**: {reminder_info['scheduled_at'].strftime('%B %d, %Y at %I:%M %p')}")
                 st.markdown(f"**Reminder Times**: {', '.join(reminder_info['reminder_times'])}")
+                display_recurrence(reminder_info)
                 st.markdown(f"**Status**: {reminder_info['status']}")
                 
                 if st.button(f"🗑️ Remove Reminders", key=f"remove_meeting_{meeting_name}"):
@@ -2124,6 +1933,14 @@ def reminder_scheduler_page():
     
     if not st.session_state.task_reminders and not st.session_state.meeting_reminders:
         st.info("No reminders currently scheduled. Add some calendar events to get started!")
+    else:
+        st.download_button(
+            "📅 Export Reminders to My Calendar (.ics)",
+            data=export_cache.export([], reminder_book()),
+            file_name="focuscoach-reminders.ics",
+            mime="text/calendar",
+            help="Scheduled reminders for calendar events, as alarms your calendar app will ring"
+        )
     
     st.markdown("---")
     
@@ -2153,6 +1970,8 @@ def reminder_scheduler_page():
         </div>
         """, unsafe_allow_html=True)
 
+@fragment
+@instrumentation.traced("page.about")
 def about_page():
     """About FocusCoach"""
     st.header("🧠 About FocusCoach")
@@ -2233,5 +2052,54 @@ def about_page():
     </div>
     """, unsafe_allow_html=True)
 
+@fragment
+def instrumentation_page():
+    """Admin view of rerun timings (FOCUSCOACH_INSTRUMENT=1)"""
+    st.header("⏱️ Instrumentation")
+    st.caption("Timings are per process, since it started. Percentiles are interpolated within latency buckets, in ms. "
+               "*Page* is the page function alone (including fragment reruns), *rerun* the whole script while "
+               "that page is showing.")
+    if st.button("🔄 Refresh"):
+        pass  # The click reruns this page with fresh numbers
+    
+    st.subheader("Per page")
+    rows = instrumentation.page_percentiles()
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No page has been timed yet.")
+    
+    snapshot = instrumentation.snapshot()
+    st.subheader("Spans")
+    st.dataframe([{"span": name, **{key: value for key, value in histogram.items() if key != "buckets"}}
+                  for name, histogram in snapshot["latency"].items()], use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Counters")
+        st.dataframe([{"counter": counter["name"], "labels": ", ".join(f"{key}={value}" for key, value in counter["labels"].items()),
+                       "value": counter["value"]} for counter in snapshot["counters"]],
+                     use_container_width=True, hide_index=True)
+    with col2:
+        st.subheader("Caches")
+        st.json(snapshot["collected"])
+    
+    st.subheader(f"Slow runs (≥ {instrumentation.slow_ms:g} ms)")
+    if not snapshot["slow_runs"]:
+        st.info("None so far. FOCUSCOACH_PROFILE=cprofile,tracemalloc adds a profile and top allocations to each one.")
+    for report in reversed(snapshot["slow_runs"]):
+        with st.expander(f"{report['at']} · {report['page'] or report['run']} · {report['ms']} ms"):
+            st.json({"spans_ms": report["spans"], "counters": report["counters"], **report.get("memory", {})})
+            if "profile_top" in report:
+                st.caption(f"Full profile: `{report['profile_path']}` (open with `python -m pstats` or snakeviz)")
+                st.code(report["profile_top"], language="text")
+    
+    st.subheader("Export")
+    if instrumentation.port is not None:
+        st.markdown(f"Prometheus: `http://127.0.0.1:{instrumentation.port}/metrics`")
+    if instrumentation.export_path and st.button("💾 Write metrics file now"):
+        st.success(f"Wrote `{instrumentation.export(instrumentation.export_path)}`")
+
 if __name__ == "__main__":
-    main()
+    with instrumentation.span("rerun"):
+        main()